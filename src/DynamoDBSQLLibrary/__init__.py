@@ -22,13 +22,16 @@
 Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
 """
 
-from DynamoDBSQLLibrary.keywords import Assertion, Query, SessionManager
+from robot.utils import is_falsy, is_truthy
+from DynamoDBSQLLibrary.cache import STATEMENT_CACHE_SIZE, STATEMENTS
+from DynamoDBSQLLibrary.keywords import Assertion, Bulk, Query, SessionManager
+from DynamoDBSQLLibrary.metrics import METRICS
 from DynamoDBSQLLibrary.version import get_version
 
 __version__ = get_version()
 
 
-class DynamoDBSQLLibrary(Assertion, Query, SessionManager):
+class DynamoDBSQLLibrary(Assertion, Bulk, Query, SessionManager):
     """DynamoDBSQLibrary is a [https://goo.gl/KlZhhW|big data] testing library for
     [http://goo.gl/lES6WM|Robot Framework] that gives you the capability to execute
     scan and query operations against multiple [https://goo.gl/C4yE9H|Amazon DynamoDB]
@@ -88,14 +91,57 @@ class DynamoDBSQLLibrary(Assertion, Query, SessionManager):
     ROBOT_EXIT_ON_FAILURE = True
     ROBOT_LIBRARY_SCOPE = 'GLOBAL'
     ROBOT_LIBRARY_VERSION = __version__
+    ROBOT_LISTENER_API_VERSION = 2
 
     # pylint: disable=super-init-not-called
-    def __init__(self):
-        """DynamoDBSQLLibrary can be imported without argument.
+    def __init__(self, lazy=False, statement_cache_size=STATEMENT_CACHE_SIZE, metadata_ttl=0,
+                 metrics_file=None):
+        # pylint: disable=line-too-long
+        """DynamoDBSQLLibrary can be imported with optional arguments.
+
+        Arguments:
+        - ``lazy``: Defer the client creation of every DynamoDB session until the session
+                    is used for the first time. (Default ``False``)
+        - ``statement_cache_size``: Maximum number of parsed DQL statements to reuse,
+                                    ``0`` disables the cache. (Default 256)
+        - ``metadata_ttl``: Seconds to reuse described table metadata in every DynamoDB
+                            session, ``0`` describes the table on every schema lookup.
+                            (Default 0)
+        - ``metrics_file``: The JSON file to write the latency histograms into when the
+                            library is closed, relative to the output directory. Without
+                            it, no histograms are recorded. (Optional)
+
+        With ``metrics_file``, latency histograms are recorded per session label and statement type for
+        ``Query DynamoDB``, ``List DynamoDB Tables``, ``DynamoDB Table Should Exist``,
+        ``DynamoDB Table Should Not Exist`` and ``Create DynamoDB Session``, split into
+        ``parse``, ``network``, ``materialize`` and ``total`` phases. Every histogram
+        contains the count, min, max, mean, p50, p90, p99 and p99.9 latencies, and its
+        buckets, in microseconds.
 
         Examples:
-        | = Keyword Definition =         | = Description =               |
-        | Library `|` DynamoDBSQLLibrary | Initiate DynamoDB SQL library |
+        | = Keyword Definition =                                                | = Description =                       |
+        | Library `|` DynamoDBSQLLibrary                                        | Initiate DynamoDB SQL library         |
+        | Library `|` DynamoDBSQLLibrary `|` lazy=True                          | Create DynamoDB sessions on first use |
+        | Library `|` DynamoDBSQLLibrary `|` statement_cache_size=0             | Parse every DQL statement             |
+        | Library `|` DynamoDBSQLLibrary `|` metadata_ttl=60                    | Cache table schemas for a minute      |
+        | Library `|` DynamoDBSQLLibrary `|` metrics_file=dynamodb-metrics.json | Record latency histograms             |
         """
+        # pylint: disable=line-too-long
         for base in DynamoDBSQLLibrary.__bases__:
             base.__init__(self)
+        self._lazy = is_truthy(lazy)
+        self._metadata_ttl = metadata_ttl
+        STATEMENTS.resize(statement_cache_size)
+        self._metrics_file = None if is_falsy(metrics_file) else metrics_file
+        METRICS.enabled = self._metrics_file is not None
+        self.ROBOT_LIBRARY_LISTENER = self
+
+    def _close(self):
+        """Stops the background queries, closes the cursors, releases the snapshots and writes
+        the latency histograms when the library goes out of scope.
+        """
+        self._shutdown_queries()
+        self.close_all_dynamodb_cursors()
+        self._snapshots.clear()
+        if self._metrics_file is not None:
+            METRICS.write(self._metrics_file)
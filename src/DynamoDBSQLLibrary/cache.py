@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+from collections import Counter, OrderedDict
+from re import compile as re_compile
+from sys import getsizeof
+from threading import Lock
+from weakref import WeakSet
+
+READ_ACTIONS = ('SCAN', 'SELECT')
+RESULT_CACHE_SIZE = 64 * 1024 * 1024
+STATEMENT_CACHE_SIZE = 256
+WHITESPACE = re_compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")|\s+""")
+
+
+class StatementCache():
+    """Thread-safe least recently used cache of parsed DQL statements."""
+
+    def __init__(self, size=STATEMENT_CACHE_SIZE):
+        self._hits = 0
+        self._lock = Lock()
+        self._misses = 0
+        self._size = int(size)
+        self._trees = OrderedDict()
+
+    def clear(self):
+        """Removes all parsed statements, and resets the statistics."""
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+            self._trees.clear()
+
+    def parse(self, commands):
+        """Returns the parsed statements of given commands."""
+        with self._lock:
+            tree = self._trees.get(commands)
+            if tree is not None:
+                self._hits += 1
+                self._trees.move_to_end(commands)
+                return tree
+            self._misses += 1
+        # pylint: disable=import-outside-toplevel
+        from dql.grammar import parser
+        tree = parser.parseString(commands)
+        if self._size > 0 and self._is_reusable(tree):
+            with self._lock:
+                self._trees[commands] = tree
+                while len(self._trees) > self._size:
+                    self._trees.popitem(last=False)
+        return tree
+
+    def resize(self, size):
+        """Changes the maximum number of parsed statements, 0 disables the cache."""
+        with self._lock:
+            self._size = int(size)
+            while len(self._trees) > max(self._size, 0):
+                self._trees.popitem(last=False)
+
+    def statistics(self):
+        """Returns cache size and hit/miss statistics."""
+        with self._lock:
+            return {'hits': self._hits, 'max_size': self._size,
+                    'misses': self._misses, 'size': len(self._trees)}
+
+    @staticmethod
+    def _is_reusable(tree):
+        """Returns True if executing given statements does not mutate them."""
+        for statement in tree:
+            if statement.action in ('ANALYZE', 'EXPLAIN'):
+                statement = statement[1]
+            # THROTTLE clause is removed from the parse tree on execution
+            if statement.throttle:
+                return False
+        return True
+
+
+STATEMENTS = StatementCache()
+
+
+class ResultCache():
+    """Thread-safe least recently used cache of read-only query results of a DynamoDB session,
+    bounded by the estimated memory size of the results.
+
+    Results are keyed by the commands with normalized white space outside of quoted strings.
+    Writes to a table through any DynamoDB session remove its results from all caches.
+    """
+
+    _instances = WeakSet()
+    _instances_lock = Lock()
+
+    def __init__(self, max_bytes=0):
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = Lock()
+        self._max_bytes = int(max_bytes)
+        self._stats = dict.fromkeys(('evictions', 'hits', 'invalidations', 'misses'), 0)
+        self._writes = Counter()
+        with ResultCache._instances_lock:
+            ResultCache._instances.add(self)
+
+    @property
+    def enabled(self):
+        """Returns True if the cache keeps results."""
+        return self._max_bytes > 0
+
+    def fetch(self, commands, tables, factory):
+        """Returns a copy of the cached response of given commands, or of the response returned
+        by the factory, which is cached unless given tables were written in the meantime.
+        """
+        key = WHITESPACE.sub(lambda match: match.group(1) or ' ', str(commands).strip())
+        tables = frozenset(tables)
+        with self._lock:
+            entry = self._entries.get(key)
+            version = self._version(tables)
+            if entry is None:
+                self._stats['misses'] += 1
+            else:
+                self._stats['hits'] += 1
+                self._entries.move_to_end(key)
+        if entry is not None:
+            return self._copy(entry[1])
+        response = factory()
+        size = self._sizeof(response)
+        if size > self._max_bytes:
+            return response
+        cached = self._copy(response)
+        with self._lock:
+            if version == self._version(tables) and size <= self._max_bytes:
+                self._pop(key)
+                self._entries[key] = (tables, cached, size)
+                self._bytes += size
+                self._evict(self._max_bytes)
+        return response
+
+    def invalidate(self, tablename=None):
+        """Removes the cached results of given table, or of all tables."""
+        with self._lock:
+            if tablename is None:
+                self._generation += 1
+            else:
+                self._writes[tablename] += 1
+            keys = [key for key, (tables, _, _) in self._entries.items()
+                    if tablename is None or tablename in tables]
+            for key in keys:
+                self._pop(key)
+            self._stats['invalidations'] += len(keys)
+
+    def resize(self, max_bytes):
+        """Changes the maximum estimated size of the results in bytes, 0 disables the cache."""
+        with self._lock:
+            self._max_bytes = int(max_bytes)
+            self._evict(max(self._max_bytes, 0))
+
+    def statistics(self):
+        """Returns cache size and hit/miss statistics."""
+        with self._lock:
+            return dict(self._stats, bytes=self._bytes, max_bytes=self._max_bytes,
+                        size=len(self._entries))
+
+    @classmethod
+    def invalidate_all(cls, tablename):
+        """Removes the cached results of given table from the caches of all sessions."""
+        with cls._instances_lock:
+            caches = list(cls._instances)
+        for cache in caches:
+            cache.invalidate(tablename)
+
+    @staticmethod
+    def _copy(value):
+        """Returns a copy of given response, its immutable attribute values are shared."""
+        if isinstance(value, list):
+            return [ResultCache._copy(item) for item in value]
+        if isinstance(value, dict):
+            return {key: ResultCache._copy(item) for key, item in value.items()}
+        if isinstance(value, set):
+            return set(value)
+        return value
+
+    def _evict(self, max_bytes):
+        """Removes the least recently used results until they fit into given size."""
+        while self._entries and self._bytes > max_bytes:
+            self._pop(next(iter(self._entries)))
+            self._stats['evictions'] += 1
+
+    def _pop(self, key):
+        """Removes the results of given key."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _version(self, tables):
+        """Returns the invalidation counters of given tables."""
+        return self._generation, tuple(self._writes[table] for table in sorted(tables))
+
+    @staticmethod
+    def _sizeof(value):
+        """Returns the estimated memory size of given response in bytes."""
+        size = getsizeof(value)
+        if isinstance(value, dict):
+            size += sum(getsizeof(key) + ResultCache._sizeof(item) for key, item in value.items())
+        elif isinstance(value, (frozenset, list, set, tuple)):
+            size += sum(ResultCache._sizeof(item) for item in value)
+        return size
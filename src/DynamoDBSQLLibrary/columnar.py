@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+from array import array
+from collections import Counter
+from decimal import Decimal
+from functools import lru_cache
+from math import isnan
+
+INT64_MAX = 2 ** 63 - 1
+INT64_MIN = -2 ** 63
+# fixed width string columns take 4 bytes per character of their longest value in every row
+MAX_STRING_WIDTH = 32
+NAN = float('nan')
+NUMBER_TYPES = frozenset((Decimal, float, int))
+
+
+def column_duplicates(column):
+    """Returns the number of duplicated values of the given column, and the first of them
+    in sorted order, missing values are ignored.
+    """
+    numpy = _numpy()
+    values = present_values(column)
+    if numpy is not None and isinstance(values, numpy.ndarray) and values.dtype != object:
+        uniques, counts = numpy.unique(values, return_counts=True)
+        duplicated = uniques[counts > 1]
+        total = int((counts[counts > 1] - 1).sum())
+        return total, (duplicated[0].item() if total else None)
+    counts = Counter(values)
+    duplicated = sorted(value for value, times in counts.items() if times > 1)
+    return sum(counts[value] - 1 for value in duplicated), (duplicated[0] if duplicated else None)
+
+
+def column_outside(column, minimum=None, maximum=None):
+    """Returns the number of values of the given column outside of the inclusive range,
+    and the row index of the first of them, missing values are ignored.
+    """
+    numpy = _numpy()
+    if numpy is not None and isinstance(column, numpy.ndarray) and column.dtype != object:
+        outside = numpy.zeros(len(column), dtype=bool)
+        if minimum is not None:
+            outside |= column < minimum
+        if maximum is not None:
+            outside |= column > maximum
+        indexes = numpy.flatnonzero(outside)
+        return len(indexes), (int(indexes[0]) if len(indexes) else None)
+    indexes = [index for index, value in enumerate(column) if not _is_missing(value) and (
+        (minimum is not None and value < minimum) or (maximum is not None and value > maximum))]
+    return len(indexes), (indexes[0] if indexes else None)
+
+
+def column_statistics(column):
+    """Returns the count of present and missing values of the given column, the min and
+    max of the present values, and their sum and mean for numeric columns.
+    """
+    values = present_values(column)
+    statistics = {'count': len(values), 'missing': len(column) - len(values)}
+    if statistics['count'] == 0:
+        return dict(statistics, min=None, max=None, sum=None)
+    if is_numeric(values) and not isinstance(values, array):
+        return dict(statistics, min=values.min().item(), max=values.max().item(),
+                    sum=values.sum().item(), mean=values.mean().item())
+    if hasattr(values, 'tolist'):
+        values = values.tolist()
+    statistics.update(min=min(values), max=max(values))
+    if isinstance(column, array):
+        statistics.update(sum=sum(values), mean=sum(values) / len(values))
+    return statistics
+
+
+def is_numeric(column):
+    """Returns True if the given column holds numbers."""
+    numpy = _numpy()
+    if numpy is not None and isinstance(column, numpy.ndarray):
+        return column.dtype.kind in 'fi'
+    return isinstance(column, array)
+
+
+def present_values(column):
+    """Returns the values of the given column without the missing ones."""
+    numpy = _numpy()
+    if numpy is not None and isinstance(column, numpy.ndarray):
+        if column.dtype.kind == 'f':
+            return column[~numpy.isnan(column)]
+        if column.dtype == object:
+            return column[numpy.not_equal(column, None)]
+        return column
+    return [value for value in column if not _is_missing(value)]
+
+
+def to_columns(items):
+    """Returns the given items as a dictionary of attribute name to column of values.
+
+    Numeric attributes are int64 columns when every item has an integral value,
+    otherwise float64 columns with NaN for missing values. String attributes are
+    NumPy fixed width string columns when every item has a value of at most
+    ``MAX_STRING_WIDTH`` characters, otherwise NumPy object columns with None for
+    missing values. Without NumPy, numeric
+    columns are ``array`` columns and string columns are tuples. Other attributes
+    are lists of values with None for missing values.
+    """
+    rows = 0
+    values = {}
+    for item in items:
+        for name, value in item.items():
+            column = values.get(name)
+            if column is None:
+                column = values[name] = [None] * rows
+            elif len(column) < rows:
+                column.extend([None] * (rows - len(column)))
+            column.append(value)
+        rows += 1
+    for column in values.values():
+        column.extend([None] * (rows - len(column)))
+    return {name: _to_column(column) for name, column in values.items()}
+
+
+def _is_missing(value):
+    """Returns True if the given value is a missing value of a column."""
+    return value is None or (isinstance(value, float) and isnan(value))
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """Returns the NumPy module imported on first use, or None if it is not installed."""
+    try:
+        # pylint: disable-next=import-outside-toplevel
+        import numpy
+    except ImportError:  # pragma: no cover
+        return None
+    return numpy
+
+
+def _to_column(values):
+    """Returns the compact column of the given attribute values."""
+    types = set(map(type, values))
+    complete = type(None) not in types
+    types.discard(type(None))
+    if types and types <= NUMBER_TYPES:
+        return _to_numeric_column(values, complete)
+    if types == {str}:
+        numpy = _numpy()
+        if numpy is None:
+            return tuple(values)
+        fixed = complete and max(map(len, values)) <= MAX_STRING_WIDTH
+        return numpy.array(values, dtype=str if fixed else object)
+    return values
+
+
+def _to_numeric_column(values, complete):
+    """Returns the int64 column of complete integral values, or the float64 column."""
+    numpy = _numpy()
+    try:
+        integers = list(map(int, values)) if complete else None
+    except (OverflowError, ValueError):
+        integers = None
+    if integers == values and INT64_MIN <= min(integers) and max(integers) <= INT64_MAX:
+        if numpy is None:
+            return array('q', integers)
+        return numpy.array(integers, dtype=numpy.int64)
+    if complete:
+        floats = map(float, values)
+    else:
+        floats = (NAN if value is None else float(value) for value in values)
+    if numpy is None:
+        return array('d', floats)
+    return numpy.fromiter(floats, dtype=numpy.float64, count=len(values))
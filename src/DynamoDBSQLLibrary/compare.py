@@ -0,0 +1,357 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+from collections import Counter
+from collections.abc import Mapping
+from contextlib import contextmanager
+from decimal import Decimal
+from gc import disable, enable, isenabled
+from itertools import zip_longest
+from operator import itemgetter
+from os import path as os_path
+from pickle import dump, HIGHEST_PROTOCOL, load
+from sys import modules
+from tempfile import TemporaryDirectory
+
+BINARY_MODULES = ('boto3.dynamodb.types', 'dynamo3.types')
+# canonical form converters by exact value type, filled on first use of each type
+CONVERTERS = {}
+FIRST = itemgetter(0)
+MAX_ITEMS = 100000
+MISSING = object()
+PARTITIONS = 64
+# equal values of these types hash equally, so they are their own canonical form
+PLAIN_TYPES = frozenset((Decimal, int, str, type(None)))
+STRING_TYPES = frozenset((str,))
+
+
+def binary_types():
+    """Returns the boto3 and dynamo3 Binary types of the already imported modules.
+    Binary values can not exist before their module is imported, so checking them
+    does not import boto3 or dynamo3.
+    """
+    return tuple(modules[name].Binary for name in BINARY_MODULES if name in modules)
+
+
+def canonical(value):
+    """Returns the hashable canonical form of given value.
+
+    Numbers are equal by value regardless of their int, float or Decimal type,
+    boto3 and dynamo3 Binary values are equal by their bytes, maps are equal regardless
+    of their key order, and nested lists and sets regardless of their item order.
+    Tuples keep their item order.
+    """
+    kind = type(value)
+    if kind in PLAIN_TYPES:
+        return value
+    converter = CONVERTERS.get(kind)
+    if converter is None:
+        converter = CONVERTERS[kind] = _converter(kind)
+    return converter(value)
+
+
+def multiset_equal(items1, items2):
+    """Returns True if both given iterables contain the same items the same number of times,
+    regardless of their order.
+    """
+    with _gc_paused():
+        counts = Counter(map(canonical, items1))
+        counts.subtract(map(canonical, items2))
+    return not any(counts.values())
+
+
+def _binary(value):
+    """Returns the canonical form of given boto3 or dynamo3 Binary value."""
+    return ('B', bytes(value.value))
+
+
+def _bool(value):
+    """Returns the canonical form of given boolean value."""
+    return ('b', value)
+
+
+def _bytes(value):
+    """Returns the canonical form of given bytes value."""
+    return ('B', bytes(value))
+
+
+def _converter(kind):
+    """Returns the canonical form converter of given value type."""
+    for types, converter in ((Mapping, _map), (list, _list), ((set, frozenset), _set),
+                             (tuple, _tuple), (bool, _bool), (float, _float),
+                             (binary_types(), _binary), ((bytes, bytearray), _bytes),
+                             ((Decimal, int, str), _plain)):
+        if issubclass(kind, types):
+            return converter
+    return _repr
+
+
+def _float(value):
+    """Returns the canonical form of given float value."""
+    return Decimal(repr(value))
+
+
+@contextmanager
+def _gc_paused():
+    """Pauses the cyclic garbage collector, canonical forms can not have reference cycles,
+    but their many small tuples trigger collections that traverse all live objects.
+    """
+    enabled = isenabled()
+    disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            enable()
+
+
+def _list(value):
+    """Returns the hashable canonical form of given list regardless of its item order."""
+    items = value
+    if not PLAIN_TYPES.issuperset(map(type, items)):
+        items = list(map(canonical, items))
+    if PLAIN_TYPES.issuperset(map(type, items)):
+        try:
+            # a sorted tuple of numbers or strings is cheaper than a counter
+            return ('L', tuple(sorted(items)))
+        except (ArithmeticError, TypeError):
+            pass
+    return ('C', frozenset(Counter(items).items()))
+
+
+def _map(value):
+    """Returns the hashable canonical form of given map regardless of its key order."""
+    pairs = [(key, item if type(item) in PLAIN_TYPES else canonical(item))
+             for key, item in value.items()]
+    if STRING_TYPES.issuperset(map(type, value)):
+        # a tuple sorted by unique string keys is cheaper than a frozenset of pairs
+        return ('M', tuple(sorted(pairs, key=FIRST)))
+    return ('K', frozenset(pairs))
+
+
+def _plain(value):
+    """Returns the canonical form of given subclassed number or string value."""
+    return value
+
+
+def _repr(value):
+    """Returns the canonical form of given value of other types."""
+    return ('O', repr(value))
+
+
+def _set(value):
+    """Returns the hashable canonical form of given set."""
+    if PLAIN_TYPES.issuperset(map(type, value)):
+        return ('Z', frozenset(value))
+    return ('Z', frozenset(map(canonical, value)))
+
+
+def _tuple(value):
+    """Returns the hashable canonical form of given tuple in its item order."""
+    return ('T', tuple(map(canonical, value)))
+
+
+def diff_streams(items1, items2, max_mismatches=10, max_items=MAX_ITEMS):
+    """Returns the items with different counts in given iterables regardless of their order.
+
+    Both iterables are consumed in lockstep, and only their unmatched items are kept.
+    See ``StreamDiff`` for the memory bound. Each mismatch is a tuple of kind, item and
+    count difference, where kind is ``extra`` for items more often in the first iterable,
+    or ``missing`` for items more often in the second iterable. Stops after
+    ``max_mismatches`` mismatches, zero reports all mismatches.
+    """
+    with StreamDiff(max_items) as diff:
+        for item1, item2 in zip_longest(items1, items2, fillvalue=MISSING):
+            if item1 is not MISSING:
+                diff.add(item1, 1)
+            if item2 is not MISSING:
+                diff.add(item2, -1)
+        mismatches = []
+        for item, difference in diff.differences():
+            mismatches.append(('extra' if difference > 0 else 'missing', item, abs(difference)))
+            if len(mismatches) == max_mismatches:
+                break
+        return mismatches
+
+
+def diff_by_key(items1, items2, key, max_mismatches=10):
+    """Returns mismatches between given lists of maps, hash joined by given key.
+
+    Each mismatch is a tuple of kind, key value and attribute differences, where kind
+    is ``extra`` for items only in the first list, ``missing`` for items only in the
+    second list, or ``changed`` for items with the same key value but different
+    attributes. Attribute differences are tuples of attribute name, first and second
+    value, or ``MISSING`` for absent attributes. When the key is absent from or repeated
+    across the items of either list, the items can not be joined, and they are matched
+    as a whole instead, see ``diff_streams``, with whole items in place of key values
+    and ``None`` attribute differences. Stops after ``max_mismatches`` mismatches,
+    zero reports all mismatches.
+    """
+    keys1 = _unique_keys(items1, key)
+    keys2 = _unique_keys(items2, key) if keys1 is not None else None
+    if keys2 is None:
+        mismatches = []
+        for kind, item, count in diff_streams(items1, items2, max_mismatches):
+            mismatches.extend([(kind, item, None)] * count)
+        return mismatches[:max_mismatches] if max_mismatches else mismatches
+    index = dict(zip(keys2, items2))
+    mismatches = []
+    for form, item in zip(keys1, items1):
+        if max_mismatches and len(mismatches) >= max_mismatches:
+            return mismatches
+        candidate = index.pop(form, MISSING)
+        if candidate is MISSING:
+            mismatches.append(('extra', _key(item, key), []))
+            continue
+        differences = _attribute_differences(item, candidate)
+        if differences:
+            mismatches.append(('changed', _key(item, key), differences))
+    mismatches.extend(('missing', _key(item, key), []) for item in index.values())
+    return mismatches[:max_mismatches] if max_mismatches else mismatches
+
+
+def format_mismatch(mismatch, key):
+    """Returns human readable message of given ``diff_by_key`` mismatch."""
+    kind, value, differences = mismatch
+    if differences is None:
+        return f"item {value!r} is {kind}"
+    if kind != 'changed':
+        return f"{key} {value!r} is {kind}"
+    changes = ', '.join(f"{name}: {_display(value1)} != {_display(value2)}"
+                        for name, value1, value2 in differences)
+    return f"{key} {value!r} is changed: {changes}"
+
+
+def _attribute_differences(item1, item2):
+    """Returns the list of attribute differences between given items."""
+    if not (isinstance(item1, Mapping) and isinstance(item2, Mapping)):
+        return [] if canonical(item1) == canonical(item2) else [(None, item1, item2)]
+    differences = []
+    for name in sorted(set(item1).union(item2), key=str):
+        value1 = item1.get(name, MISSING)
+        value2 = item2.get(name, MISSING)
+        if value1 is MISSING or value2 is MISSING or canonical(value1) != canonical(value2):
+            differences.append((name, value1, value2))
+    return differences
+
+
+def _display(value):
+    """Returns display text of given attribute value."""
+    return '<missing>' if value is MISSING else repr(value)
+
+
+def _key(item, key):
+    """Returns the join key value of given item."""
+    return item.get(key) if isinstance(item, Mapping) else item
+
+
+def _unique_keys(items, key):
+    """Returns the canonical join key values of given items, or None when the key is absent
+    from or repeated across the items.
+    """
+    forms = []
+    for item in items:
+        if isinstance(item, Mapping) and key not in item:
+            return None
+        forms.append(canonical(_key(item, key)))
+    return forms if len(set(forms)) == len(forms) else None
+
+
+class StreamDiff():
+    """Counts the differences of items regardless of their order, spilling the unmatched
+    items into partition files on disk when there are more than ``max_items`` of them.
+
+    Partitions are assigned by canonical form hash, so every partition can be matched on
+    its own, and only one partition at a time is held in memory.
+    """
+
+    def __init__(self, max_items=MAX_ITEMS, partitions=PARTITIONS):
+        self._counts = {}
+        self._directory = None
+        self._files = []
+        self.max_items = max_items
+        self.partitions = partitions
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add(self, item, count):
+        """Adds the given count of given item, negative counts subtract the item."""
+        form = canonical(item)
+        entry = self._counts.get(form)
+        if entry is None:
+            self._counts[form] = [count, item]
+            if len(self._counts) > self.max_items:
+                self._spill()
+        else:
+            entry[0] += count
+            if not entry[0]:
+                del self._counts[form]
+
+    def close(self):
+        """Removes the spilled partition files."""
+        for stream in self._files:
+            stream.close()
+        self._files = []
+        if self._directory:
+            self._directory.cleanup()
+            self._directory = None
+
+    def differences(self):
+        """Yields the items with non-zero count and their count."""
+        if not self._directory:
+            yield from ((item, count) for count, item in self._counts.values())
+            return
+        self._spill()
+        for stream in self._files:
+            stream.seek(0)
+            counts = {}
+            for count, item in self._read(stream):
+                form = canonical(item)
+                entry = counts.setdefault(form, [0, item])
+                entry[0] += count
+            yield from ((item, count) for count, item in counts.values() if count)
+
+    def _spill(self):
+        """Appends the unmatched items into their partition files."""
+        if not self._directory:
+            # pylint: disable-next=consider-using-with
+            self._directory = TemporaryDirectory(prefix='dynamodb-diff-')
+            # pylint: disable-next=consider-using-with
+            self._files = [open(os_path.join(self._directory.name, f"{index}.pickle"), 'w+b')
+                           for index in range(self.partitions)]
+        for form, entry in self._counts.items():
+            dump(entry, self._files[hash(form) % self.partitions], HIGHEST_PROTOCOL)
+        self._counts = {}
+
+    @staticmethod
+    def _read(stream):
+        """Yields the entries of given partition file."""
+        while True:
+            try:
+                yield load(stream)
+            except EOFError:
+                return
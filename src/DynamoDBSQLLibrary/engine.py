@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+from threading import local, Lock
+from time import monotonic, perf_counter
+from dql import Engine as DQLEngine
+from dql.exceptions import EngineRuntimeError, ExplainSignal
+from dynamo3 import DynamoDBConnection
+from DynamoDBSQLLibrary.cache import ResultCache, STATEMENTS
+from DynamoDBSQLLibrary.metrics import METRICS
+
+DDL_ACTIONS = ('ALTER', 'CREATE', 'DROP')
+WRITE_ACTIONS = DDL_ACTIONS + ('DELETE', 'INSERT', 'LOAD', 'UPDATE')
+
+
+class CapacityMeter():
+    """Thread-safe totals of consumed read and write capacity units per table and index.
+
+    Table totals include the capacity consumed by their indexes, index totals are keyed
+    by table and index name joined by a ``:``.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._totals = {}
+
+    def add(self, capacity):
+        """Adds the given dynamo3 consumed capacity to the totals."""
+        with self._lock:
+            self._add(capacity.tablename, capacity.total)
+            for indexes in (capacity.local_index_capacity, capacity.global_index_capacity):
+                for index_name, units in (indexes or {}).items():
+                    self._add(f'{capacity.tablename}:{index_name}', units)
+
+    def reset(self):
+        """Removes all totals."""
+        with self._lock:
+            self._totals.clear()
+
+    def totals(self):
+        """Returns a copy of the totals keyed by table or index name."""
+        with self._lock:
+            return {name: dict(units) for name, units in self._totals.items()}
+
+    def _add(self, name, units):
+        """Adds the given read and write units to the totals of given name."""
+        totals = self._totals.setdefault(name, {'read': 0.0, 'write': 0.0})
+        totals['read'] += units.read
+        totals['write'] += units.write
+
+
+class ThreadLocalAttribute():
+    """Instance attribute descriptor that keeps a separate value for every thread,
+    threads that have not set the attribute get a value from the given factory.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._name = None
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        state = self._state(instance)
+        if not hasattr(state, self._name):
+            setattr(state, self._name, self._factory())
+        return getattr(state, self._name)
+
+    def __set__(self, instance, value):
+        setattr(self._state(instance), self._name, value)
+
+    def __set_name__(self, owner, name):
+        self._name = name
+
+    @staticmethod
+    def _state(instance):
+        """Returns the thread local state of the given instance."""
+        return instance.__dict__.setdefault('_thread_state', local())
+
+
+class Engine(DQLEngine):
+    """DQL execution engine that reuses parsed statements across DynamoDB sessions,
+    and table metadata within a DynamoDB session for ``metadata_ttl`` seconds.
+
+    The state of a running statement is kept per thread, so one DynamoDB session can
+    execute statements from several threads at the same time.
+    """
+
+    _analyzing = ThreadLocalAttribute(bool)
+    _call_list = ThreadLocalAttribute(list)
+    _explaining = ThreadLocalAttribute(bool)
+    _query_rate_limit = ThreadLocalAttribute(lambda: None)
+    consumed_capacities = ThreadLocalAttribute(list)
+
+    def __init__(self, connection=None, metadata_ttl=0):
+        super().__init__(connection)
+        self._expires = {}
+        self.capacity = CapacityMeter()
+        self.metadata_ttl = float(metadata_ttl)
+        self.results = ResultCache()
+
+    def describe(self, tablename, refresh=False, metrics=False, require=False):
+        """Returns the table metadata, from the cache if it is younger than ``metadata_ttl``."""
+        if self.metadata_ttl > 0:
+            if not metrics and monotonic() < self._expires.get(tablename, 0):
+                return self._require(tablename, self.cached_descriptions.get(tablename), require)
+            refresh = True
+        table = super().describe(tablename, refresh, metrics)
+        if self.metadata_ttl > 0:
+            self._expires[tablename] = monotonic() + self.metadata_ttl
+            if table is None:
+                self.cached_descriptions.pop(tablename, None)
+        return self._require(tablename, table, require)
+
+    def execute(self, commands, pretty_format=False, tree=None):
+        """Parses, or reuses the parsed statements of given commands, and runs them.
+
+        The statements are not parsed again when their parsed ``tree`` is given.
+        """
+        if tree is None:
+            started = perf_counter()
+            tree = STATEMENTS.parse(commands)
+            METRICS.add('parse', perf_counter() - started)
+        self.consumed_capacities = []
+        self._analyzing = False
+        self._query_rate_limit = None
+        for statement in tree:
+            try:
+                result = self._run(statement)
+            except ExplainSignal:
+                return self._format_explain()
+        if pretty_format:
+            return self._pretty_format(tree[-1], result)
+        return result
+
+    def invalidate(self, tablename=None):
+        """Removes the cached metadata of given table, or of all tables."""
+        if tablename is None:
+            self._expires.clear()
+            self.cached_descriptions.clear()
+        else:
+            self._expires.pop(tablename, None)
+            self.cached_descriptions.pop(tablename, None)
+
+    def _on_capacity_data(self, *args):
+        """Adds the consumed capacity of a call to the session totals."""
+        self.capacity.add(args[-1])
+        super()._on_capacity_data(*args)
+
+    def _run(self, tree):
+        """Runs a parsed statement, table metadata is invalidated around DDL statements,
+        and cached results of all sessions after write statements.
+        """
+        if tree.action not in WRITE_ACTIONS:
+            return super()._run(tree)
+        is_ddl = tree.action in DDL_ACTIONS
+        if is_ddl:
+            self.invalidate(tree.table)
+        try:
+            return super()._run(tree)
+        finally:
+            if is_ddl:
+                self.invalidate(tree.table)
+            ResultCache.invalidate_all(tree.table)
+
+    @staticmethod
+    def _require(tablename, table, require):
+        """Returns given table metadata, raises an error if it is required but missing."""
+        if table is None and require:
+            raise EngineRuntimeError(f"Table {tablename!r} not found")
+        return table
+
+
+# pylint: disable-next=too-many-instance-attributes
+class SegmentedConnection(DynamoDBConnection):
+    """DynamoDB connection that scans a single segment of a parallel scan."""
+
+    def __init__(self, connection, segment, total_segments, page_size=None):
+        super().__init__(connection.client, connection.dynamizer)
+        self.default_return_capacity = connection.default_return_capacity
+        self.page_size = page_size
+        self.rate_limiters = list(connection.rate_limiters)
+        self.request_retries = connection.request_retries
+        self.segment = segment
+        self.total_segments = total_segments
+        # pylint: disable-next=protected-access
+        self._hooks = {event: list(hooks) for event, hooks in connection._hooks.items()}
+        if 'exponential_sleep' in vars(connection):
+            # the retry sleep of throttled connections backs off their bucket
+            self.exponential_sleep = connection.exponential_sleep
+
+    def call(self, command, **kwargs):
+        """Makes a request to DynamoDB with the segment of this connection."""
+        if command == 'query':
+            raise ValueError("DynamoDBSQLLibraryError: Parallel scan commands can not "
+                             "be resolved to a query")
+        if command == 'scan':
+            kwargs['Segment'] = self.segment
+            kwargs['TotalSegments'] = self.total_segments
+            if self.page_size is not None and 'Limit' not in kwargs:
+                kwargs['Limit'] = self.page_size
+        return super().call(command, **kwargs)
@@ -22,11 +22,13 @@ Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like D
 """
 
 from DynamoDBSQLLibrary.keywords.assertion import Assertion
+from DynamoDBSQLLibrary.keywords.bulk import Bulk
 from DynamoDBSQLLibrary.keywords.query import Query
 from DynamoDBSQLLibrary.keywords.session import SessionManager
 
 __all__ = [
     'Assertion',
+    'Bulk',
     'Query',
     'SessionManager'
 ]
@@ -22,14 +22,18 @@ Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like D
 """
 
 from collections import namedtuple, OrderedDict
+from collections.abc import Mapping
 from decimal import Decimal
 from json import dumps, JSONEncoder, loads
 from operator import itemgetter
 from re import split
-from boto3.dynamodb.types import Binary
-from dql.exceptions import EngineRuntimeError
 from robot.api.deco import keyword
 from robot.libraries.BuiltIn import BuiltIn
+from DynamoDBSQLLibrary.columnar import column_duplicates, column_outside
+from DynamoDBSQLLibrary.columnar import column_statistics, is_numeric
+from DynamoDBSQLLibrary.compare import binary_types, diff_by_key, format_mismatch
+from DynamoDBSQLLibrary.compare import multiset_equal
+from DynamoDBSQLLibrary.metrics import METRICS
 
 
 class Assertion():
@@ -38,6 +42,76 @@ class Assertion():
     def __init__(self):
         self._builtin = BuiltIn()
 
+    @staticmethod
+    @keyword("Column Should Be In Range")
+    def column_should_be_in_range(columns, name, minimum=None, maximum=None):
+        # pylint: disable=line-too-long
+        """Fails if any present value of the given column is outside of the inclusive range.
+
+        Arguments:
+        - ``columns``: The columns returned by ``Query DynamoDB`` with ``columnar``.
+        - ``name``: The attribute name of the column to be validated.
+        - ``minimum``: The lowest allowed value. (Default no lower limit)
+        - ``maximum``: The highest allowed value. (Default no upper limit)
+
+        Examples:
+        | ${columns} = | Query DynamoDB | LABEL | SCAN my-table | columnar=${True} |
+        | Column Should Be In Range | ${columns} | price | minimum=0 | maximum=100 |
+        | Column Should Be In Range | ${columns} | name  | minimum=a | maximum=n   |
+        """
+        # pylint: disable=line-too-long
+        column = Assertion._get_column(columns, name)
+        convert = float if is_numeric(column) else str
+        outside, first = column_outside(column, None if minimum is None else convert(minimum),
+                                        None if maximum is None else convert(maximum))
+        if outside:
+            value = column[first]
+            value = value.item() if hasattr(value, 'item') else value
+            raise AssertionError(f"DynamoDBSQLLibraryError: {outside} values of column '{name}' "
+                                 f"are outside of range [{minimum}, {maximum}], first at row "
+                                 f"{first}: {value!r}")
+
+    @staticmethod
+    @keyword("Column Sum Should Be")
+    def column_sum_should_be(columns, name, expected, tolerance=0):
+        """Fails if the sum of the present values of the given numeric column differs from
+        the expected sum by more than ``tolerance``.
+
+        Arguments:
+        - ``columns``: The columns returned by ``Query DynamoDB`` with ``columnar``.
+        - ``name``: The attribute name of the column to be validated.
+        - ``expected``: The expected sum.
+        - ``tolerance``: The allowed absolute difference. (Default 0)
+
+        Examples:
+        | Column Sum Should Be | ${columns} | count | 1500    |                |
+        | Column Sum Should Be | ${columns} | price | 1234.56 | tolerance=0.01 |
+        """
+        column = Assertion._get_column(columns, name)
+        if not is_numeric(column):
+            raise ValueError(f"DynamoDBSQLLibraryError: Column '{name}' is not numeric")
+        total = column_statistics(column)['sum'] or 0
+        if abs(total - float(expected)) > float(tolerance):
+            raise AssertionError(f"DynamoDBSQLLibraryError: Sum of column '{name}' is {total}, "
+                                 f"expected {expected}")
+
+    @staticmethod
+    @keyword("Column Values Should Be Unique")
+    def column_values_should_be_unique(columns, name):
+        """Fails if any present value of the given column is duplicated.
+
+        Arguments:
+        - ``columns``: The columns returned by ``Query DynamoDB`` with ``columnar``.
+        - ``name``: The attribute name of the column to be validated.
+
+        Examples:
+        | Column Values Should Be Unique | ${columns} | id |
+        """
+        duplicates, first = column_duplicates(Assertion._get_column(columns, name))
+        if duplicates:
+            raise AssertionError(f"DynamoDBSQLLibraryError: Column '{name}' has {duplicates} "
+                                 f"duplicated values, first: {first!r}")
+
     @staticmethod
     @keyword("DynamoDB Dumps Should Be Equal")
     def dynamodb_dumps_should_be_equal(dump1, dump2):
@@ -71,10 +145,13 @@ class Assertion():
         | DynamoDB Table Should Exist | LABEL | my-table            | # PASS |
         | DynamoDB Table Should Exist | LABEL | non-existance-table | # FAIL |
         """
+        # pylint: disable=import-outside-toplevel
+        from dql.exceptions import EngineRuntimeError
         # pylint: disable-next=no-member
         session = self._cache.switch(label)
         try:
-            session.execute(f'DUMP SCHEMA {table_name}')
+            with METRICS.span(label, 'DUMP'):
+                session.execute(f'DUMP SCHEMA {table_name}')
         except EngineRuntimeError as exception:
             if str(exception) == f"Table '{table_name}' not found":
                 # pylint: disable-next=raise-missing-from
@@ -94,10 +171,13 @@ class Assertion():
         | DynamoDB Table Should Not Exist | LABEL | non-existance-table | # PASS |
         | DynamoDB Table Should Not Exist | LABEL | my-table            | # FAIL |
         """
+        # pylint: disable=import-outside-toplevel
+        from dql.exceptions import EngineRuntimeError
         # pylint: disable=no-member
         session = self._cache.switch(label)
         try:
-            session.execute(f'DUMP SCHEMA {table_name}')
+            with METRICS.span(label, 'DUMP'):
+                session.execute(f'DUMP SCHEMA {table_name}')
             raise AssertionError(f"DynamoDBSQLLibraryError: Table '{table_name}' exists in "
                                  "the requested DynamoDB session")
         except EngineRuntimeError as exception:
@@ -106,6 +186,29 @@ class Assertion():
             else:
                 raise  # pragma: no cover
 
+    @staticmethod
+    @keyword("Get Column Statistics")
+    def get_column_statistics(columns, name):
+        # pylint: disable=line-too-long
+        """Returns a dictionary of the ``count``, ``missing``, ``min`` and ``max`` of the
+        present values of the given column, and their ``sum`` and ``mean`` for numeric
+        columns.
+
+        The columns are returned by ``Query DynamoDB`` with ``columnar``, and the statistics
+        are computed by NumPy in native code when it is installed.
+
+        Arguments:
+        - ``columns``: The columns returned by ``Query DynamoDB`` with ``columnar``.
+        - ``name``: The attribute name of the column.
+
+        Examples:
+        | ${columns} = | Query DynamoDB        | LABEL      | SCAN my-table | columnar=${True} |
+        | ${stats} =   | Get Column Statistics | ${columns} | price         |                  |
+        | Should Be True | ${stats['min']} >= 0 and ${stats['missing']} == 0 |             |                  |
+        """
+        # pylint: disable=line-too-long
+        return column_statistics(Assertion._get_column(columns, name))
+
     @keyword("Json Loads")
     def json_loads(self, text):
         # pylint: disable=line-too-long
@@ -158,6 +261,12 @@ class Assertion():
     def lists_deep_compare(self, list1, list2, order_by='id'):
         """Returns deep compare results of the given lists.
 
+        Returns 0 if both lists contain the same items regardless of their order, items are
+        matched in linear time by their hashable canonical forms. Numbers are equal regardless of
+        their int, float or Decimal type, Binary values by their bytes, and maps, nested
+        lists and sets regardless of their order. Otherwise returns -1 or 1 when the first
+        list is less or greater than the second list.
+
         Arguments:
         - ``list1``: The first list to be compared to second list.
         - ``list2``: The second list to be compared to first list.
@@ -170,16 +279,24 @@ class Assertion():
         | @{list2} = | Create List | ${dict2} |
         | ${var} = | Lists Deep Compare | ${list1} | ${list2} |
         """
+        is_lists = isinstance(list1, (list, tuple)) and isinstance(list2, (list, tuple))
+        if is_lists and multiset_equal(list1, list2):
+            return 0
         return Assertion._cmp(list1, list2, key=itemgetter(order_by))
 
     @keyword("Lists Deep Compare Should Be Equal")
-    def lists_deep_compare_should_be_equal(self, list1, list2, order_by='id'):
+    def lists_deep_compare_should_be_equal(self, list1, list2, order_by='id', max_mismatches=10):
         """Fails if deep compare of the given lists are unequal.
 
+        The failure message reports up to ``max_mismatches`` extra, missing and changed
+        items of the first list, matched with the second list by ``order_by`` key.
+        See `Lists Deep Diff` for details.
+
         Arguments:
         - ``list1``: The first list to be compare to second list.
         - ``list2``: The second list to be compare to first list.
         - ``order_by``: The key to be use to sort the list. (Default 'id')
+        - ``max_mismatches``: The maximum number of mismatches to be reported. (Default 10)
 
         Examples:
         | ${dict1} = | Create Dictionary | id | 1 | key | value |
@@ -187,17 +304,71 @@ class Assertion():
         | @{list1} = | Create List | ${dict1} |
         | @{list2} = | Create List | ${dict2} |
         | Lists Deep Compare Should Be Equal | ${list1} | ${list2} | # PASS |
+        | Lists Deep Compare Should Be Equal | ${list1} | ${list2} | key | max_mismatches=3 |
         """
-        result = self.lists_deep_compare(list1, list2, order_by)
+        is_lists = isinstance(list1, (list, tuple)) and isinstance(list2, (list, tuple))
+        if is_lists and multiset_equal(list1, list2):
+            result = 0
+        else:
+            messages = []
+            if is_lists:
+                messages = self.lists_deep_diff(list1, list2, order_by, max_mismatches)
+            if messages:
+                report = '\n'.join(f"- {message}" for message in messages)
+                raise AssertionError("DynamoDBSQLLibraryError: Lists are different, "
+                                     f"first mismatches:\n{report}")
+            result = Assertion._cmp(list1, list2, key=itemgetter(order_by))
         # pylint: disable=no-member
         self._builtin.should_be_equal(result, 0)
 
+    @staticmethod
+    @keyword("Lists Deep Diff")
+    def lists_deep_diff(list1, list2, order_by='id', max_mismatches=10):
+        # pylint: disable=line-too-long
+        """Returns the list of mismatch messages between the given lists.
+
+        Items are hash joined by ``order_by`` key value in linear time. An item is extra
+        when its key value is only in the first list, missing when it is only in the
+        second list, and changed when its attributes differ, with each different attribute
+        reported. When the key is absent from or repeated across the items, whole items are
+        matched instead, and reported as extra or missing items. Stops after
+        ``max_mismatches`` mismatches, zero reports all mismatches.
+
+        Arguments:
+        - ``list1``: The first list to be compared to second list.
+        - ``list2``: The second list to be compared to first list.
+        - ``order_by``: The key to be used to match the items. (Default 'id')
+        - ``max_mismatches``: The maximum number of mismatches to be returned. (Default 10)
+
+        Examples:
+        | ${dict1} = | Create Dictionary | id | 1 | key | value |
+        | ${dict2} = | Create Dictionary | id | 1 | key | other |
+        | @{list1} = | Create List | ${dict1} |
+        | @{list2} = | Create List | ${dict2} |
+        | @{diff} = | Lists Deep Diff | ${list1} | ${list2} | # ["id '1' is changed: key: 'value' != 'other'"] |
+        """
+        # pylint: disable=line-too-long
+        mismatches = diff_by_key(list1, list2, order_by, int(max_mismatches))
+        return [format_mismatch(mismatch, order_by) for mismatch in mismatches]
+
+    @staticmethod
+    def _get_column(columns, name):
+        """Returns the column of given attribute name."""
+        try:
+            return columns[name]
+        except KeyError:
+            # pylint: disable-next=raise-missing-from
+            raise ValueError(f"DynamoDBSQLLibraryError: Non-existing column '{name}'")
+
     @staticmethod
     def _restore(dct):
         """Returns restored object."""
         response = dct
         if 'py/boto3.dynamodb.types.Binary' in dct:
-            response = Binary(bytes(dct['py/boto3.dynamodb.types.Binary'], encoding='utf-8'))
+            # pylint: disable-next=import-outside-toplevel
+            from boto3.dynamodb.types import Binary
+            response = Binary(bytes(dct['py/boto3.dynamodb.types.Binary'], encoding='utf-8',
+                                    errors='surrogateescape'))
         elif 'py/dict' in dct:
             response = dict(dct['py/dict'])
         elif 'py/tuple' in dct:
@@ -228,7 +399,7 @@ class Assertion():
 
     @staticmethod
     def _sorting(item, **kwargs):
-        if isinstance(item, dict):
+        if isinstance(item, Mapping):
             return sorted(((key, Assertion._sorting(values))
                           for key, values in item.items()), **kwargs)
         if isinstance(item, list):
@@ -237,9 +408,24 @@ class Assertion():
 
 
 class DecimalEncoder(JSONEncoder):
-    """JSON encoder with Decimal value support."""
+    """JSON encoder with Decimal, Binary and set value support.
+    Binary and set values are encoded as ``JSON Loads`` restorable objects.
+    """
 
     def default(self, o):
         if isinstance(o, Decimal):
             return int(o) if o % 1 == 0 else float(o)
+        if isinstance(o, binary_types()):
+            return {'py/boto3.dynamodb.types.Binary': o.value.decode('utf-8',
+                                                                     errors='surrogateescape')}
+        if isinstance(o, (set, frozenset)):
+            try:
+                values = sorted(o)
+            except TypeError:
+                values = list(o)
+            return {'py/set': values}
+        if hasattr(o, 'tolist'):
+            return o.tolist()
+        if isinstance(o, Mapping):
+            return dict(o)
         return super().default(o)  # pragma: no cover
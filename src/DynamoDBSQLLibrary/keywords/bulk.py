@@ -0,0 +1,400 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from csv import DictReader
+from functools import lru_cache
+from gzip import open as gzip_open
+from itertools import chain, count, islice
+from os import path as os_path
+from random import random
+from time import monotonic, sleep
+from robot.api import logger
+from robot.api.deco import keyword
+from DynamoDBSQLLibrary.cache import ResultCache
+from DynamoDBSQLLibrary.compare import canonical
+from DynamoDBSQLLibrary.keywords.assertion import DecimalEncoder
+from DynamoDBSQLLibrary.keywords.query import ParallelScan
+from DynamoDBSQLLibrary.rows import to_rows
+
+BACKOFF = 0.05
+MAX_BACKOFF = 5
+WRITE_BATCH_SIZE = 25
+
+
+@lru_cache(maxsize=None)
+def dynamizer():
+    """Returns the dynamo3 value encoder with boto3 Binary support, created on first use."""
+    # pylint: disable=import-outside-toplevel
+    from boto3.dynamodb.types import Binary
+    from dynamo3 import Dynamizer
+    response = Dynamizer()
+    response.register_encoder(Binary, lambda _, value: ('B', value.value))
+    return response
+
+
+class Bulk():
+    """Bulk data keywords for DynamoDB operations."""
+
+    def __init__(self):
+        self._logger = logger
+        self._snapshot_ids = count(1)
+        self._snapshots = {}
+
+    @keyword("Delete DynamoDB Snapshot")
+    def delete_dynamodb_snapshot(self, snapshot):
+        """Releases the items of the given snapshot handle, that can not be restored anymore.
+
+        The JSON Lines file of a snapshot taken with ``path`` is kept.
+
+        Arguments:
+        - ``snapshot``: The snapshot handle returned by `Snapshot DynamoDB Table`.
+
+        Examples:
+        | Delete DynamoDB Snapshot | ${snapshot} |
+        """
+        try:
+            del self._snapshots[int(snapshot)]
+        except (KeyError, ValueError):
+            # pylint: disable-next=raise-missing-from
+            raise ValueError(f"DynamoDBSQLLibraryError: Non-existing snapshot '{snapshot}'")
+
+    @keyword("Export DynamoDB Table To File")
+    def export_dynamodb_table_to_file(self, label, table_name, path, **kwargs):
+        # pylint: disable=line-too-long
+        """Writes all items of the requested DynamoDB table into the given JSON Lines file,
+        and returns the number of written items.
+
+        Scan pages are written as they arrive, so the memory use does not grow with the
+        table size. Files ending with ``.gz`` are gzip compressed. Values are encoded with
+        the library ``DecimalEncoder``, and can be read back by ``JSON Loads`` and
+        `Load DynamoDB Table From File`.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify the DynamoDB session.
+        - ``table_name``: The table to be exported.
+        - ``path``: The JSON Lines file path.
+        - ``segments``: Number of table segments scanned in parallel. (Default 1)
+        - ``workers``: Number of worker threads for a segmented export. (Default ``segments``)
+        - ``page_size``: Maximum number of items per segment scan request. (Optional)
+        - ``encoding``: The file encoding. (Default utf-8)
+
+        Examples:
+        | ${count} = | Export DynamoDB Table To File | LABEL | my-table | ${OUTPUT DIR}/my-table.jsonl    |             |
+        | ${count} = | Export DynamoDB Table To File | LABEL | my-table | ${OUTPUT DIR}/my-table.jsonl.gz | segments=8  |
+        """
+        # pylint: disable=line-too-long
+        encoder = DecimalEncoder(separators=(',', ':'))
+        encoding = kwargs.pop('encoding', 'utf-8')
+        opener = gzip_open if str(path).endswith('.gz') else open
+        started = monotonic()
+        total = 0
+        items = self._scan_table(label, table_name, **kwargs)
+        try:
+            with opener(path, 'wt', encoding=encoding) as stream:
+                for item in items:
+                    stream.write(encoder.encode(item))
+                    stream.write('\n')
+                    total += 1
+        finally:
+            if hasattr(items, 'close'):
+                items.close()
+        self._log_rate(f"Exported {total} items from '{table_name}'", total, started)
+        return total
+
+    @keyword("Load DynamoDB Table From File")
+    def load_dynamodb_table_from_file(self, label, table_name, path, **kwargs):
+        # pylint: disable=line-too-long
+        """Writes all items of the given JSON Lines or CSV file into the requested DynamoDB table,
+        and returns the number of written items.
+
+        The file is streamed, and its items are written in 25 items ``BatchWriteItem`` requests
+        by a pool of workers. Unprocessed items are retried with exponential backoff.
+        Files ending with ``.gz`` are decompressed on the fly.
+
+        Every JSON Lines line is an item, converted as in ``JSON Loads``. The first CSV row
+        contains the attribute names, every cell is converted as in ``JSON Loads`` when it
+        is valid JSON, otherwise it is kept as string. Empty cells are skipped.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify the DynamoDB session.
+        - ``table_name``: The table to write the items into.
+        - ``path``: The JSON Lines or CSV file path.
+        - ``format``: ``jsonl`` or ``csv``. (Default based on ``path`` extension)
+        - ``workers``: Number of concurrent ``BatchWriteItem`` requests. (Default 4)
+        - ``retries``: Maximum retries of unprocessed items per batch. (Default 8)
+        - ``encoding``: The file encoding. (Default utf-8)
+
+        Examples:
+        | ${count} = | Load DynamoDB Table From File | LABEL | my-table | ${CURDIR}/items.jsonl    |            |
+        | ${count} = | Load DynamoDB Table From File | LABEL | my-table | ${CURDIR}/items.csv.gz   | workers=16 |
+        | ${count} = | Load DynamoDB Table From File | LABEL | my-table | ${CURDIR}/items.txt      | format=csv |
+        """
+        # pylint: disable=line-too-long
+        # pylint: disable=no-member
+        connection = self._cache.switch(label).connection
+        started = monotonic()
+        batches = self._encode_puts(self._read_batches(path, **kwargs))
+        try:
+            total = self._write_batches(connection, table_name, batches,
+                                        int(kwargs.get('retries', 8)),
+                                        int(kwargs.get('workers', 4)))
+        finally:
+            ResultCache.invalidate_all(table_name)
+        self._log_rate(f"Loaded {total} items into '{table_name}'", total, started)
+        return total
+
+    @keyword("Restore DynamoDB Table")
+    def restore_dynamodb_table(self, label, snapshot, **kwargs):
+        # pylint: disable=line-too-long
+        """Restores the items of the requested DynamoDB table to the given snapshot, and returns
+        a dictionary of the ``put``, ``deleted`` and ``unchanged`` item counts.
+
+        The current items are scanned and matched with the snapshot items by primary key.
+        Only the changed and the missing items are written back, and the items that are not
+        in the snapshot are deleted, in 25 items ``BatchWriteItem`` requests by a pool of
+        workers, so the table is neither dropped nor recreated. Items are compared as in
+        ``Lists Deep Compare``.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify the DynamoDB session.
+        - ``snapshot``: The snapshot handle returned by `Snapshot DynamoDB Table`, or
+                        a JSON Lines or CSV file as in `Load DynamoDB Table From File`.
+        - ``table_name``: The table to be restored. (Default the table of the snapshot
+                          handle, required for files)
+        - ``segments``: Number of table segments scanned in parallel. (Default 1)
+        - ``workers``: Number of concurrent ``BatchWriteItem`` requests. (Default 4)
+        - ``retries``: Maximum retries of unprocessed items per batch. (Default 8)
+        - ``format``: ``jsonl`` or ``csv`` file format. (Default based on file extension)
+        - ``encoding``: The file encoding. (Default utf-8)
+
+        Examples:
+        | ${snapshot} = | Snapshot DynamoDB Table | LABEL | my-table                 |                     |
+        | &{counts} =   | Restore DynamoDB Table  | LABEL | ${snapshot}              |                     |
+        | &{counts} =   | Restore DynamoDB Table  | LABEL | ${snapshot}              | table_name=my-copy  |
+        | &{counts} =   | Restore DynamoDB Table  | LABEL | ${CURDIR}/my-table.jsonl | table_name=my-table |
+        """
+        # pylint: disable=line-too-long
+        table_name, items = self._get_snapshot(snapshot, **kwargs)
+        # pylint: disable=no-member
+        session = self._cache.switch(label)
+        keys = session.describe(table_name, require=True).primary_key_attributes
+        expected = {self._key(item, keys): item for item in items}
+        started = monotonic()
+        counts = {'deleted': 0, 'put': 0, 'unchanged': 0}
+        current = self._scan_table(label, table_name, segments=kwargs.get('segments', 1))
+        writes = self._diff(expected, current, keys, counts)
+        try:
+            self._write_batches(session.connection, table_name,
+                                iter(lambda: list(islice(writes, WRITE_BATCH_SIZE)), []),
+                                int(kwargs.get('retries', 8)), int(kwargs.get('workers', 4)))
+        finally:
+            if hasattr(current, 'close'):
+                current.close()
+            ResultCache.invalidate_all(table_name)
+        self._log_rate(f"Restored '{table_name}' with {counts['put']} put, {counts['deleted']} "
+                       f"deleted and {counts['unchanged']} unchanged items",
+                       sum(counts.values()), started)
+        return counts
+
+    @keyword("Snapshot DynamoDB Table")
+    def snapshot_dynamodb_table(self, label, table_name, path=None, **kwargs):
+        # pylint: disable=line-too-long
+        """Captures all items of the requested DynamoDB table, and returns a snapshot handle
+        to restore them with `Restore DynamoDB Table` until `Delete DynamoDB Snapshot`.
+
+        The items are kept in memory as compact read-only items, as with the ``compact``
+        argument of ``Query DynamoDB``. With ``path``, the items are written into the given
+        JSON Lines file as in `Export DynamoDB Table To File` instead, and read back on
+        restore, so large snapshots do not stay in memory.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify the DynamoDB session.
+        - ``table_name``: The table to be captured.
+        - ``path``: The JSON Lines file path, ending with ``.gz`` to compress it. (Optional)
+        - ``segments``: Number of table segments scanned in parallel. (Default 1)
+        - ``workers``: Number of worker threads for a segmented scan. (Default ``segments``)
+        - ``page_size``: Maximum number of items per segment scan request. (Optional)
+        - ``encoding``: The file encoding. (Default utf-8)
+
+        Examples:
+        | ${snapshot} = | Snapshot DynamoDB Table | LABEL | my-table |                                     |
+        | ${snapshot} = | Snapshot DynamoDB Table | LABEL | my-table | path=${OUTPUT DIR}/my-table.jsonl.gz |
+        """
+        # pylint: disable=line-too-long
+        if path is None:
+            started = monotonic()
+            kwargs.pop('encoding', None)
+            items = self._scan_table(label, table_name, **kwargs)
+            try:
+                source = to_rows(items)
+            finally:
+                if hasattr(items, 'close'):
+                    items.close()
+            self._log_rate(f"Captured {len(source)} items of '{table_name}'", len(source), started)
+        else:
+            self.export_dynamodb_table_to_file(label, table_name, path, **kwargs)
+            source = str(path)
+        handle = next(self._snapshot_ids)
+        self._snapshots[handle] = (table_name, source)
+        return handle
+
+    @staticmethod
+    def _diff(expected, items, keys, counts):
+        """Yields the write requests that restore the given items to the expected items keyed
+        by primary key, and adds them up into the given counts.
+        """
+        # pylint: disable=import-outside-toplevel
+        from dynamo3.batch import encode_delete, encode_put
+        encoder = dynamizer()
+        seen = set()
+        for item in items:
+            key = Bulk._key(item, keys)
+            seen.add(key)
+            snapshot = expected.get(key)
+            if snapshot is None:
+                counts['deleted'] += 1
+                yield encode_delete(encoder, {name: item[name] for name in keys})
+            elif canonical(snapshot) == canonical(item):
+                counts['unchanged'] += 1
+            else:
+                counts['put'] += 1
+                yield encode_put(encoder, dict(snapshot))
+        for key, snapshot in expected.items():
+            if key not in seen:
+                counts['put'] += 1
+                yield encode_put(encoder, dict(snapshot))
+
+    @staticmethod
+    def _encode_puts(batches):
+        """Yields the put requests of the given batches of items."""
+        # pylint: disable=import-outside-toplevel
+        from dynamo3.batch import encode_put
+        encoder = dynamizer()
+        for items in batches:
+            yield [encode_put(encoder, item) for item in items]
+
+    def _get_snapshot(self, snapshot, **kwargs):
+        """Returns the table name and the items of the given snapshot handle or file."""
+        try:
+            table_name, source = self._snapshots[int(snapshot)]
+        except (KeyError, ValueError):
+            if not os_path.isfile(str(snapshot)):
+                # pylint: disable-next=raise-missing-from
+                raise ValueError(f"DynamoDBSQLLibraryError: Non-existing snapshot '{snapshot}'")
+            table_name, source = None, str(snapshot)
+        table_name = kwargs.get('table_name') or table_name
+        if table_name is None:
+            raise ValueError(f"DynamoDBSQLLibraryError: Restoring snapshot file '{snapshot}' "
+                             "requires table_name")
+        if isinstance(source, str):
+            source = chain.from_iterable(self._read_batches(source, **kwargs))
+        return table_name, source
+
+    @staticmethod
+    def _key(item, keys):
+        """Returns the hashable primary key of the given item."""
+        return tuple(canonical(item[name]) for name in keys)
+
+    def _log_rate(self, message, total, started):
+        """Logs the given message with the elapsed time and items per second since started."""
+        elapsed = monotonic() - started
+        rate = total / elapsed if elapsed else float(total)
+        self._logger.info(f"{message} in {elapsed:.2f}s ({rate:.0f} items/s)")
+
+    def _read_batches(self, path, **kwargs):
+        """Yields the items of the given file in batch write sized lists."""
+        path = str(path)
+        name = path[:-3] if path.endswith('.gz') else path
+        file_format = str(kwargs.get('format') or name.rsplit('.', 1)[-1]).lower()
+        if file_format not in ('csv', 'jsonl'):
+            raise ValueError(f"DynamoDBSQLLibraryError: Unsupported file format '{file_format}'")
+        opener = gzip_open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding=kwargs.get('encoding', 'utf-8'), newline='') as stream:
+            if file_format == 'csv':
+                items = (self._read_row(row) for row in DictReader(stream))
+            else:
+                # pylint: disable-next=no-member
+                items = (self.json_loads(line) for line in stream if line.strip())
+            yield from iter(lambda: list(islice(items, WRITE_BATCH_SIZE)), [])
+
+    def _read_row(self, row):
+        """Returns the item of the given CSV row."""
+        item = {}
+        for name, value in row.items():
+            if value:
+                # pylint: disable=no-member
+                try:
+                    item[name] = self.json_loads(value)
+                except ValueError:
+                    item[name] = value
+        return item
+
+    def _scan_table(self, label, table_name, **kwargs):
+        """Returns lazily fetched items of the requested table, scanned in segments if requested."""
+        # pylint: disable=no-member
+        session = self._cache.switch(label)
+        commands = f'SCAN * FROM {table_name}'
+        segments = int(kwargs.pop('segments', 1))
+        if segments > 1:
+            return ParallelScan(session, commands, segments, **kwargs)
+        return session.execute(commands)
+
+    @staticmethod
+    def _write_batches(connection, table_name, batches, retries, workers):
+        """Writes the given batches of requests concurrently, and returns the number of them."""
+        total = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            try:
+                for requests in batches:
+                    pending.append(executor.submit(Bulk._write_batch, connection, table_name,
+                                                   requests, retries))
+                    if len(pending) >= 2 * workers:
+                        total += pending.popleft().result()
+                while pending:
+                    total += pending.popleft().result()
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+        return total
+
+    @staticmethod
+    def _write_batch(connection, table_name, requests, retries):
+        """Writes the given requests, retries unprocessed requests with exponential backoff."""
+        request = {table_name: requests}
+        attempt = 0
+        while request:
+            response = connection.call('batch_write_item', RequestItems=request,
+                                       ReturnConsumedCapacity='INDEXES')
+            request = response.get('UnprocessedItems')
+            if request:
+                attempt += 1
+                if attempt > retries:
+                    unprocessed = sum(len(writes) for writes in request.values())
+                    raise RuntimeError(f"DynamoDBSQLLibraryError: {unprocessed} items are not "
+                                       f"written into '{table_name}' after {retries} retries")
+                sleep(min(BACKOFF * 2 ** attempt, MAX_BACKOFF) * random())
+        return len(requests)
@@ -21,16 +21,110 @@
 Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
 """
 
-from dynamo3.result import ResultSet
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from gzip import open as gzip_open
+from html import escape
+from itertools import count, islice
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from time import perf_counter
+from weakref import finalize
 from robot.api import logger
 from robot.api.deco import keyword
+from robot.utils import is_truthy, timestr_to_secs
+from DynamoDBSQLLibrary.columnar import to_columns
+from DynamoDBSQLLibrary.compare import diff_streams, MAX_ITEMS
+from DynamoDBSQLLibrary.cache import READ_ACTIONS, RESULT_CACHE_SIZE, STATEMENTS
+from DynamoDBSQLLibrary.log import RESPONSE_LOG
+from DynamoDBSQLLibrary.metrics import METRICS
+from DynamoDBSQLLibrary.rows import to_rows
 
+ASYNC_WORKERS = 8
+BATCH_SIZE = 100
+DESCRIBE_KEYS = ('ItemCount', 'KeySchema', 'TableSizeBytes', 'TableStatus')
+DESCRIBE_WORKERS = 8
+LIST_TABLES_PAGE_SIZE = 100
 
+
+# pylint: disable-next=too-many-public-methods
 class Query():
     """Query keywords for DynamoDB scan and query operations."""
 
     def __init__(self):
+        self._cursor_ids = count(1)
+        self._cursors = {}
+        self._executor = None
         self._logger = logger
+        self._queries = {}
+        self._query_ids = count(1)
+
+    @keyword("Close All DynamoDB Cursors")
+    def close_all_dynamodb_cursors(self):
+        """Closes all opened DynamoDB cursors."""
+        for cursor in list(self._cursors):
+            self.close_dynamodb_cursor(cursor)
+
+    @keyword("Close DynamoDB Cursor")
+    def close_dynamodb_cursor(self, cursor):
+        """Closes an opened DynamoDB cursor and releases its remaining results.
+
+        Arguments:
+        - ``cursor``: The cursor identifier returned by ``Open DynamoDB Cursor``.
+
+        Examples:
+        | Close DynamoDB Cursor | ${cursor} |
+        """
+        response = self._get_cursor(cursor)
+        del self._cursors[int(cursor)]
+        if hasattr(response, 'close'):
+            response.close()
+
+    @keyword("Describe DynamoDB Tables")
+    def describe_dynamodb_tables(self, label, *table_names, **kwargs):
+        # pylint: disable=line-too-long
+        """Returns a dictionary of the requested tables description keyed by table name.
+
+        The tables are described concurrently by a pool of worker threads. Every
+        description contains ``ItemCount``, ``KeySchema``, ``TableSizeBytes`` and
+        ``TableStatus`` of the table, as returned by ``DescribeTable``.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify the DynamoDB session.
+        - ``table_names``: The tables to be described. (Default all tables)
+        - ``workers``: Maximum number of concurrent worker threads. (Default 8)
+
+        Examples:
+        | &{var} = | Describe DynamoDB Tables | LABEL |          |          |           |
+        | &{var} = | Describe DynamoDB Tables | LABEL | my-table | my-other |           |
+        | &{var} = | Describe DynamoDB Tables | LABEL | @{names} |          | workers=4 |
+        """
+        # pylint: disable=line-too-long
+        # pylint: disable=no-member
+        connection = self._cache.switch(label).connection
+        names = list(table_names) or self.list_dynamodb_tables(label)
+        workers = int(kwargs.get('workers', DESCRIBE_WORKERS))
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(names)))) as executor:
+            tables = executor.map(lambda name: connection.call('describe_table',
+                                                               TableName=name)['Table'], names)
+            response = {name: {key: table.get(key) for key in DESCRIBE_KEYS}
+                        for name, table in zip(names, tables)}
+        self._log_response("Describe tables response", response)
+        return response
+
+    @keyword("Disable DynamoDB Result Cache")
+    def disable_dynamodb_result_cache(self, label):
+        """Disables the query result cache of requested DynamoDB session, and removes its
+        cached results.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify the DynamoDB session.
+
+        Examples:
+        | Disable DynamoDB Result Cache | LABEL |
+        """
+        # pylint: disable=no-member
+        self._cache.switch(label).results.resize(0)
 
     @keyword("DynamoDB Host")
     def dynamodb_host(self, label):
@@ -58,13 +152,151 @@ class Query():
         # pylint: disable=no-member
         return self._cache.switch(label).connection.region
 
+    @keyword("Enable DynamoDB Result Cache")
+    def enable_dynamodb_result_cache(self, label, max_bytes=RESULT_CACHE_SIZE):
+        # pylint: disable=line-too-long
+        """Enables the query result cache of requested DynamoDB session.
+
+        ``Query DynamoDB``, ``Query DynamoDB On Sessions`` and ``Start DynamoDB Query``
+        return a copy of the cached results when the same ``SCAN`` and ``SELECT`` commands
+        are repeated, regardless of white space outside of quoted strings, instead of
+        querying DynamoDB again. The least recently used results are removed when their
+        estimated size exceeds ``max_bytes``, and results larger than that are not cached.
+
+        ``INSERT``, ``UPDATE``, ``DELETE``, ``LOAD``, ``ALTER``, ``CREATE`` and ``DROP``
+        commands, and ``Load DynamoDB Table From File``, on any DynamoDB session remove
+        the cached results of the table. Changes made outside of this library are not
+        noticed, so enable the cache for tables that only change through it.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify the DynamoDB session.
+        - ``max_bytes``: Maximum estimated size of the cached results. (Default 64 MiB)
+
+        Examples:
+        | Enable DynamoDB Result Cache | LABEL |                   |
+        | Enable DynamoDB Result Cache | LABEL | max_bytes=1048576 |
+        """
+        # pylint: disable=line-too-long
+        # pylint: disable=no-member
+        self._cache.switch(label).results.resize(max_bytes)
+
+    @keyword("Fetch Next DynamoDB Batch")
+    def fetch_next_dynamodb_batch(self, cursor, size=100):
+        """Returns the next batch of items from an opened DynamoDB cursor.
+        Pages are only requested from DynamoDB when the batch needs them,
+        an empty list is returned once the cursor is exhausted.
+
+        Arguments:
+        - ``cursor``: The cursor identifier returned by ``Open DynamoDB Cursor``.
+        - ``size``: Maximum number of items to return. (Default 100)
+
+        Examples:
+        | @{var} = | Fetch Next DynamoDB Batch | ${cursor} |          |
+        | @{var} = | Fetch Next DynamoDB Batch | ${cursor} | size=500 |
+        """
+        response = list(islice(self._get_cursor(cursor), int(size)))
+        # pylint: disable=no-member
+        self._logger.debug(f"Cursor {cursor} fetched {len(response)} items")
+        return response
+
+    @keyword("Flush DynamoDB Table Metadata")
+    def flush_dynamodb_table_metadata(self, label, table_name=None):
+        """Removes the cached table metadata of the requested DynamoDB session.
+        The next table existence check or query describes the table again.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify the DynamoDB session.
+        - ``table_name``: The table to be flushed. (Default all tables)
+
+        Examples:
+        | Flush DynamoDB Table Metadata | LABEL |          |
+        | Flush DynamoDB Table Metadata | LABEL | my-table |
+        """
+        # pylint: disable=no-member
+        self._cache.switch(label).invalidate(table_name)
+
+    @keyword("Get DynamoDB Consumed Capacity")
+    def get_dynamodb_consumed_capacity(self, label, name=None):
+        """Returns the read and write capacity units consumed on requested DynamoDB session
+        since it was created or reset.
+
+        Every request of the session returns its consumed capacity including its indexes,
+        and it is added up per table and per index. Table totals include the capacity
+        consumed by their indexes, so a query that scans the table instead of using an
+        index shows up as table capacity without index capacity.
+
+        Returns a dictionary keyed by table name, and by table and index name joined by
+        a ``:``, of dictionaries with ``read`` and ``write`` capacity units. Returns only
+        the dictionary of the requested table or index when ``name`` is given. A lazy session
+        that is not used yet has no consumed capacity and is not created.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify the DynamoDB session.
+        - ``name``: The table name, or table and index name joined by a ``:``. (Optional)
+
+        Examples:
+        | &{all} =       | Get DynamoDB Consumed Capacity | LABEL |                  |
+        | &{units} =     | Get DynamoDB Consumed Capacity | LABEL | my-table         |
+        | Should Be True | ${units.read} <= 10            |       |                  |
+        | &{units} =     | Get DynamoDB Consumed Capacity | LABEL | my-table:by-name |
+        | Should Be True | ${units.read} > 0              |       |                  |
+        """
+        # pylint: disable=no-member
+        session = self._cache.switch(label, create=False)
+        totals = {} if session is None else session.capacity.totals()
+        self._logger.info(f'DynamoDB consumed capacity of {label}: {totals}')
+        if name is None:
+            return totals
+        return totals.get(name, {'read': 0.0, 'write': 0.0})
+
+    @keyword("Get DynamoDB Result Cache Statistics")
+    def get_dynamodb_result_cache_statistics(self, label):
+        """Returns a dictionary of query result cache statistics of requested DynamoDB session.
+
+        The dictionary contains ``hits``, ``misses``, ``evictions`` and ``invalidations``
+        counters, the current number of cached results as ``size``, their estimated size
+        as ``bytes``, and the ``max_bytes`` of the cache.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify the DynamoDB session.
+
+        Examples:
+        | ${stats} =                  | Get DynamoDB Result Cache Statistics | LABEL |
+        | Should Be Equal As Integers | ${stats['hits']}                     | 1     |
+        """
+        # pylint: disable=no-member
+        stats = self._cache.switch(label).results.statistics()
+        self._logger.info(f'DynamoDB result cache of {label}: {stats}')
+        return stats
+
+    @keyword("Get DynamoDB Statement Cache Statistics")
+    def get_dynamodb_statement_cache_statistics(self):
+        """Returns a dictionary of parsed DQL statements cache statistics.
+        The cache is shared by all DynamoDB sessions, and is keyed by the command text.
+
+        The dictionary contains ``hits`` and ``misses`` counters, the current ``size``
+        and the ``max_size`` of the cache.
+
+        Examples:
+        | ${stats} =                  | Get DynamoDB Statement Cache Statistics |   |
+        | Should Be Equal As Integers | ${stats['misses']}                      | 1 |
+        """
+        stats = STATEMENTS.statistics()
+        # pylint: disable=no-member
+        self._logger.info(f'DynamoDB statement cache: {stats}')
+        return stats
+
     @keyword("List DynamoDB Tables")
     def list_dynamodb_tables(self, label, **kwargs):
         """Returns list of all tables on requested DynamoDB session.
 
+        Follows ``LastEvaluatedTableName`` pagination until all tables, or ``Limit``
+        tables, are listed.
+
         Arguments:
         - ``label``: A case and space insensitive string to identify the DynamoDB session.
-        - ``Limit``: Maximum number of tables to return. (Default 100)
+        - ``Limit``: Maximum number of tables to return. (Default all tables)
+        - ``ExclusiveStartTableName``: The table name to start listing after. (Optional)
 
         Examples:
         | @{var} = | List DynamoDB Tables | LABEL |                           |         |
@@ -72,34 +304,612 @@ class Query():
         | @{var} = | List DynamoDB Tables | LABEL | ExclusiveStartTableName=a |         |
         | @{var} = | List DynamoDB Tables | LABEL | ExclusiveStartTableName=a | Limit=1 |
         """
+        with METRICS.span(label, 'LIST TABLES'):
+            # pylint: disable=no-member
+            session = self._cache.switch(label)
+            response = self._list_tables(session.connection, int(kwargs.pop('Limit', 0)) or None,
+                                         **kwargs)
+        self._log_response("List tables response", response)
+        return response
+
+    @keyword("Open DynamoDB Cursor")
+    def open_dynamodb_cursor(self, label, commands, segments=1):
+        """Executes the SQL-like DSL commands on requested DynamoDB session and
+        returns a cursor identifier to fetch its results in batches.
+
+        Unlike ``Query DynamoDB``, the results are not loaded into memory at once,
+        use ``Fetch Next DynamoDB Batch`` to retrieve them and ``Close DynamoDB Cursor``
+        to release the cursor.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify the DynamoDB session.
+        - ``commands``: SQL-like DSL ``SCAN`` or ``SELECT`` commands.
+        See [https://goo.gl/RRKSeK|available queries].
+        - ``segments``: Number of parallel scan segments, the results of ``SCAN`` commands
+                        are streamed from all segments when greater than 1.
+                        See ``Parallel Scan DynamoDB`` for more details. (Default 1)
+
+        Examples:
+        | ${cursor} = | Open DynamoDB Cursor | LABEL | SCAN my-table |            |
+        | ${cursor} = | Open DynamoDB Cursor | LABEL | SCAN my-table | segments=4 |
+        """
+        response = self._open_result_set(label, commands, segments)
+        cursor = next(self._cursor_ids)
+        self._cursors[cursor] = response
         # pylint: disable=no-member
-        session = self._cache.switch(label)
-        response = list(session.connection.call('list_tables',
-                                                Limit=int(kwargs.pop('Limit', 100)),
-                                                **kwargs)['TableNames'])
+        self._logger.debug(f"Opening DynamoDB cursor {cursor}: '{commands}'")
+        return cursor
+
+    @keyword("Parallel Scan DynamoDB")
+    def parallel_scan_dynamodb(self, label, commands, segments=4, **kwargs):
+        # pylint: disable=line-too-long
+        """Executes the SQL-like DSL ``SCAN`` commands as a parallel scan on requested
+        DynamoDB session, and returns the merged results of all segments.
+
+        The table is divided into ``segments`` and each segment is scanned by its own
+        worker thread. ``LIMIT`` and ``ORDER BY`` clauses apply to each segment
+        individually, and the results are returned in no particular order.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify the DynamoDB session.
+        - ``commands``: SQL-like DSL ``SCAN`` commands.
+        See [https://goo.gl/RRKSeK|available queries].
+        - ``segments``: Number of segments to divide the table into. (Default 4)
+        - ``workers``: Maximum number of concurrent worker threads. (Default ``segments``)
+        - ``page_size``: Maximum number of items evaluated by each scan request.
+                         (Default 1 MB of data)
+
+        Examples:
+        | @{var} = | Parallel Scan DynamoDB | LABEL | SCAN my-table              |            |               |
+        | @{var} = | Parallel Scan DynamoDB | LABEL | SCAN my-table WHERE bar > 1 | segments=8 | workers=4     |
+        | @{var} = | Parallel Scan DynamoDB | LABEL | SCAN id, bar FROM my-table  | segments=8 | page_size=500 |
+        """
         # pylint: disable=no-member
-        self._logger.debug(f"List tables response:\n{response}")
+        session = self._cache.switch(label)
+        response = list(ParallelScan(session, commands, int(segments), **kwargs))
+        self._log_response(f"'{commands}' response", response)
         return response
 
     @keyword("Query DynamoDB")
-    def query_dynamodb(self, label, commands):
+    def query_dynamodb(self, label, commands, columnar=False, compact=False):
+        # pylint: disable=line-too-long
         """Executes the SQL-like DSL commands on requested DynamoDB session.
         The return value will vary based on the type of query.
 
+        Results of ``SCAN`` and ``SELECT`` commands are returned as a list of items, or with
+        ``columnar`` as a dictionary of attribute name to column of values in item order.
+        Numeric columns are NumPy int64 arrays when every item has an integral value,
+        otherwise float64 arrays with NaN for missing values. String columns are NumPy
+        string arrays, or object arrays when a value is missing or longer than 32 characters,
+        and other columns are lists, with None for missing values. Without NumPy installed,
+        numeric columns are ``array`` arrays and string columns are tuples.
+        See `Get Column Statistics` for the column assertions.
+
+        With ``compact``, the items are read-only mappings backed by a tuple of values,
+        and items with the same attributes share one copy of the attribute names. They
+        support ``${item}[id]`` access and the list comparison keywords, and take about
+        half of the memory of dictionaries besides the values.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify the DynamoDB session.
+        - ``commands``: SQL-like DSL commands.
+        See [https://goo.gl/RRKSeK|available queries].
+        - ``columnar``: Return the results as columns. (Default False)
+        - ``compact``: Return the results as compact read-only items. (Default False)
+
+        Examples:
+        | ${var} = | Query DynamoDB | LABEL | DUMP SCHEMA my-table |                  |
+        | @{var} = | Query DynamoDB | LABEL | SCAN my-table LIMIT ${limit} |          |
+        | ${var} = | Query DynamoDB | LABEL | SCAN my-table                | columnar=${True} |
+        | @{var} = | Query DynamoDB | LABEL | SCAN my-table                | compact=${True}  |
+        """
+        # pylint: disable=line-too-long
+        with METRICS.span(label, self._statement(commands)):
+            # pylint: disable=no-member
+            session = self._cache.switch(label)
+            response = self._execute(session, commands, is_truthy(columnar), is_truthy(compact))
+        self._log_response(f"'{commands}' response", response)
+        return response
+
+    @keyword("Query DynamoDB On Sessions")
+    def query_dynamodb_on_sessions(self, labels, commands, **kwargs):
+        # pylint: disable=line-too-long
+        """Executes the SQL-like DSL commands on requested DynamoDB sessions concurrently,
+        and returns a dictionary of the responses keyed by session label.
+
+        All requested sessions are queried even if some of them fail or do not exist,
+        the errors are reported after every session is done. A session with several labels
+        is queried once, and its response is returned for each of its labels.
+
+        Arguments:
+        - ``labels``: List of case and space insensitive strings to identify the DynamoDB
+                      sessions, or a comma separated string of them.
+                      All registered DynamoDB sessions are queried if it is empty.
+        - ``commands``: SQL-like DSL commands.
+        See [https://goo.gl/RRKSeK|available queries].
+        - ``workers``: Maximum number of concurrent worker threads.
+                       (Default number of sessions)
+        - ``fail_on_error``: If you want this keyword does not fail the test if some of the
+                             sessions fail, you can pass this argument as False, the error
+                             is returned as the response of those sessions. (Default ``True``)
+
+        Examples:
+        | &{var} = | Query DynamoDB On Sessions | ${labels}         | SCAN mine |                        |
+        | &{var} = | Query DynamoDB On Sessions | oregon, singapore | SCAN mine |                        |
+        | &{var} = | Query DynamoDB On Sessions | ${EMPTY}          | SCAN mine | fail_on_error=${False} |
+        """
+        # pylint: disable=line-too-long
+        labels = self._get_labels(labels)
+        sessions, errors = self._switch_sessions(labels)
+        # labels of the same session share its response
+        unique = {}
+        for label, session in sessions.items():
+            unique.setdefault(id(session), session)
+        workers = int(kwargs.get('workers') or len(unique) or 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {key: executor.submit(self._execute, session, commands)
+                       for key, session in unique.items()}
+        response = {}
+        for label in labels:
+            try:
+                response[label] = errors.get(label) or futures[id(sessions[label])].result()
+            # pylint: disable-next=broad-exception-caught
+            except Exception as exception:
+                errors[label] = response[label] = exception
+        self._log_response(f"'{commands}' response", response)
+        if errors and is_truthy(kwargs.get('fail_on_error', True)):
+            details = '\n'.join(f'{label}: {error}' for label, error in errors.items())
+            raise RuntimeError(f"DynamoDBSQLLibraryError: '{commands}' failed on "
+                               f"DynamoDB sessions:\n{details}")
+        return response
+
+    @keyword("Query Result Should Match File")
+    def query_result_should_match_file(self, label, commands, path, **kwargs):
+        # pylint: disable=line-too-long
+        """Fails if the results of the SQL-like DSL commands on requested DynamoDB session
+        and the items of the given JSON Lines file are different, regardless of their order.
+
+        The results are fetched page by page and the file is streamed, both are matched
+        in lockstep and only their unmatched items are kept in memory. The unmatched items
+        are spilled into temporary files when there are more than ``max_items`` of them,
+        so results larger than the memory can be matched. Every line of the file is an
+        item, converted as in ``JSON Loads``, and files ending with ``.gz`` are
+        decompressed on the fly. Items are compared as in ``Lists Deep Compare``.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify the DynamoDB session.
+        - ``commands``: SQL-like DSL ``SCAN`` or ``SELECT`` commands.
+        See [https://goo.gl/RRKSeK|available queries].
+        - ``path``: The expected JSON Lines file path.
+        - ``segments``: Number of parallel scan segments. (Default 1)
+        - ``max_items``: Maximum number of unmatched items kept in memory. (Default 100000)
+        - ``max_mismatches``: The maximum number of mismatches to be reported. (Default 10)
+        - ``encoding``: The file encoding. (Default utf-8)
+
+        Examples:
+        | Query Result Should Match File | LABEL | SCAN my-table | ${CURDIR}/my-table.jsonl    |                    |
+        | Query Result Should Match File | LABEL | SCAN my-table | ${CURDIR}/my-table.jsonl.gz | segments=8         |
+        | Query Result Should Match File | LABEL | SCAN my-table | ${CURDIR}/my-table.jsonl    | max_mismatches=100 |
+        """
+        # pylint: disable=line-too-long
+        response = self._open_result_set(label, commands, kwargs.get('segments', 1))
+        opener = gzip_open if str(path).endswith('.gz') else open
+        try:
+            with opener(path, 'rt', encoding=kwargs.get('encoding', 'utf-8')) as stream:
+                # pylint: disable-next=no-member
+                expected = (self.json_loads(line) for line in stream if line.strip())
+                mismatches = diff_streams(response, expected,
+                                          int(kwargs.get('max_mismatches', 10)),
+                                          int(kwargs.get('max_items', MAX_ITEMS)))
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+        if mismatches:
+            report = '\n'.join(f"- {count} {kind}: {item!r}" for kind, item, count in mismatches)
+            raise AssertionError(f"DynamoDBSQLLibraryError: '{commands}' results are different "
+                                 f"from '{path}', first mismatches:\n{report}")
+
+    @keyword("Reset DynamoDB Consumed Capacity")
+    def reset_dynamodb_consumed_capacity(self, labels=None):
+        """Resets the consumed capacity totals of requested DynamoDB sessions.
+
+        Lazy sessions that are not used yet are skipped without creating them.
+
+        Arguments:
+        - ``labels``: List of case and space insensitive strings to identify the DynamoDB
+                      sessions, or a comma separated string of them.
+                      All registered DynamoDB sessions are reset if it is empty.
+
+        Examples:
+        | Reset DynamoDB Consumed Capacity |                   |
+        | Reset DynamoDB Consumed Capacity | LABEL             |
+        | Reset DynamoDB Consumed Capacity | oregon, singapore |
+        """
+        for label in self._get_labels(labels):
+            # pylint: disable=no-member
+            session = self._cache.switch(label, create=False)
+            if session is not None:
+                session.capacity.reset()
+
+    @keyword("Set DynamoDB Response Log Policy")
+    def set_dynamodb_response_log_policy(self, max_items=None, max_bytes=None, sidecar=None):
+        """Sets the debug logging policy of DynamoDB responses.
+
+        Responses are only formatted when the ``DEBUG`` or ``TRACE`` log level is enabled.
+        Inline logs are truncated to ``max_items`` items and ``max_bytes`` bytes, and the full
+        truncated responses are written as JSON files into the ``dynamodb-responses`` folder
+        of the output directory, linked from the log.
+
+        Arguments:
+        - ``max_items``: Maximum number of items logged inline. (Default 100)
+        - ``max_bytes``: Maximum number of bytes logged inline. (Default 65536)
+        - ``sidecar``: Write the full truncated responses into files. (Default True)
+
+        Examples:
+        | Set DynamoDB Response Log Policy | max_items=10 |                 |                  |
+        | Set DynamoDB Response Log Policy | max_items=10 | max_bytes=4096  | sidecar=${False} |
+        """
+        if max_items is not None:
+            RESPONSE_LOG.max_items = int(max_items)
+        if max_bytes is not None:
+            RESPONSE_LOG.max_bytes = int(max_bytes)
+        if sidecar is not None:
+            RESPONSE_LOG.sidecar = is_truthy(sidecar)
+
+    @keyword("Start DynamoDB Query")
+    def start_dynamodb_query(self, label, commands):
+        """Starts the SQL-like DSL commands on requested DynamoDB session in the background,
+        and returns a query handle to collect the response with ``Wait For DynamoDB Query``.
+
+        Up to 8 started queries run at the same time, in any order, also on the same
+        DynamoDB session. The response is the same as the ``Query DynamoDB`` response.
+
         Arguments:
         - ``label``: A case and space insensitive string to identify the DynamoDB session.
         - ``commands``: SQL-like DSL commands.
         See [https://goo.gl/RRKSeK|available queries].
 
         Examples:
-        | ${var} = | Query DynamoDB | LABEL | DUMP SCHEMA my-table |
-        | @{var} = | Query DynamoDB | LABEL | SCAN my-table LIMIT ${limit} |
+        | ${handle} = | Start DynamoDB Query    | LABEL     | SCAN * FROM my-table |
+        | @{var} =    | Wait For DynamoDB Query | ${handle} |                      |
         """
         # pylint: disable=no-member
         session = self._cache.switch(label)
-        response = session.execute(commands)
-        if isinstance(response, ResultSet):
-            response = list(response)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=ASYNC_WORKERS,
+                                                thread_name_prefix='DynamoDBQuery')
+        handle = next(self._query_ids)
+        self._queries[handle] = (commands, self._executor.submit(self._execute_span, label,
+                                                                 session, commands))
+        self._logger.debug(f"Starting DynamoDB query {handle}: '{commands}'")
+        return handle
+
+    @keyword("Wait For All DynamoDB Queries")
+    def wait_for_all_dynamodb_queries(self, timeout=None):
+        """Waits for all started DynamoDB queries, and returns their responses in the
+        order the queries were started.
+
+        Every query is waited for even if some of them fail, the errors are reported
+        after all of them are done. Queries still running after ``timeout`` fail the
+        keyword and can be waited for again.
+
+        Arguments:
+        - ``timeout``: Maximum time to wait in Robot Framework time format,
+                       e.g. ``90``, ``1 minute`` or ``2 min 30 s``. (Default no timeout)
+
+        Examples:
+        | @{responses} = | Wait For All DynamoDB Queries |           |
+        | @{responses} = | Wait For All DynamoDB Queries | timeout=5 min |
+        """
+        queries = dict(self._queries)
+        unfinished = wait([future for _, future in queries.values()],
+                          timeout=self._timeout(timeout)).not_done
+        if unfinished:
+            handles = ', '.join(str(handle) for handle, (_, future) in queries.items()
+                                if future in unfinished)
+            raise RuntimeError(f"DynamoDBSQLLibraryError: DynamoDB queries {handles} did not "
+                               f"finish in {timeout}")
+        errors = {}
+        response = []
+        for handle in sorted(queries):
+            try:
+                response.append(self.wait_for_dynamodb_query(handle))
+            # pylint: disable-next=broad-exception-caught
+            except Exception as exception:
+                errors[handle] = exception
+        if errors:
+            details = '\n'.join(f"{handle} '{queries[handle][0]}': {error}"
+                                for handle, error in errors.items())
+            raise RuntimeError(f"DynamoDBSQLLibraryError: DynamoDB queries failed:\n{details}")
+        return response
+
+    @keyword("Wait For DynamoDB Query")
+    def wait_for_dynamodb_query(self, handle, timeout=None):
+        """Waits for a started DynamoDB query, and returns its response.
+
+        A failed query fails this keyword with the query error. A query still running
+        after ``timeout`` fails this keyword and can be waited for again.
+
+        Arguments:
+        - ``handle``: The query handle returned by ``Start DynamoDB Query``.
+        - ``timeout``: Maximum time to wait in Robot Framework time format,
+                       e.g. ``90``, ``1 minute`` or ``2 min 30 s``. (Default no timeout)
+
+        Examples:
+        | @{var} = | Wait For DynamoDB Query | ${handle} |                |
+        | @{var} = | Wait For DynamoDB Query | ${handle} | timeout=30 s   |
+        """
+        commands, future = self._get_query(handle)
+        try:
+            response = future.result(timeout=self._timeout(timeout))
+        except FutureTimeoutError:
+            # pylint: disable-next=raise-missing-from
+            raise RuntimeError(f"DynamoDBSQLLibraryError: DynamoDB query {handle} "
+                               f"'{commands}' did not finish in {timeout}")
+        finally:
+            if future.done():
+                del self._queries[int(handle)]
+        self._log_response(f"'{commands}' response", response)
+        return response
+
+    def _execute(self, session, commands, columnar=False, compact=False):
+        """Returns the response of the given commands with materialized result set."""
+        response = self._fetch(session, commands)
+        if self._is_result_set(response):
+            if columnar:
+                response = to_columns(response)
+            else:
+                response = to_rows(response) if compact else list(response)
+        return response
+
+    def _execute_span(self, label, session, commands):
+        """Returns the response of the given commands, measured into the latency histograms."""
+        with METRICS.span(label, self._statement(commands)):
+            return self._execute(session, commands)
+
+    def _fetch(self, session, commands):
+        """Returns the response of the given commands, from the result cache of the session
+        when it is enabled and the commands only read.
+        """
+        if not session.results.enabled:
+            return session.execute(commands)
+        started = perf_counter()
+        tree = STATEMENTS.parse(commands)
+        METRICS.add('parse', perf_counter() - started)
+        tables = self._read_tables(tree)
+        if tables is None:
+            return session.execute(commands, tree=tree)
+
+        def execute():
+            response = session.execute(commands, tree=tree)
+            return list(response) if self._is_result_set(response) else response
+
+        response = session.results.fetch(commands, tables, execute)
+        return iter(response) if isinstance(response, list) else response
+
+    def _get_cursor(self, cursor):
+        """Returns opened cursor result set."""
+        try:
+            return self._cursors[int(cursor)]
+        except (KeyError, ValueError):
+            # pylint: disable-next=raise-missing-from
+            raise ValueError(f"DynamoDBSQLLibraryError: Non-existing cursor '{cursor}'")
+
+    def _get_labels(self, labels):
+        """Returns the requested labels, or all registered labels if none is requested."""
+        if isinstance(labels, str):
+            labels = [label.strip() for label in labels.split(',') if label.strip()]
+        if labels:
+            return list(labels)
+        # pylint: disable=no-member,protected-access
+        return [alias for alias, index in self._cache._aliases.items()
+                if self._cache._connections[index - 1] is not None]
+
+    def _get_query(self, handle):
+        """Returns the commands and the future of a started query."""
+        try:
+            return self._queries[int(handle)]
+        except (KeyError, ValueError):
+            # pylint: disable-next=raise-missing-from
+            raise ValueError(f"DynamoDBSQLLibraryError: Non-existing query handle '{handle}'")
+
+    @staticmethod
+    def _is_result_set(response):
+        """Returns True if the given response is a lazily fetched result set."""
+        return isinstance(response, Iterator)
+
+    @staticmethod
+    def _list_tables(connection, limit, **kwargs):
+        """Returns the table names of all pages, or of the pages holding the limit tables."""
+        response = []
+        while limit is None or len(response) < limit:
+            page_size = LIST_TABLES_PAGE_SIZE if limit is None else limit - len(response)
+            page = connection.call('list_tables', **kwargs,
+                                   Limit=min(page_size, LIST_TABLES_PAGE_SIZE))
+            names = list(page['TableNames'])
+            response.extend(names)
+            kwargs['ExclusiveStartTableName'] = page.get('LastEvaluatedTableName')
+            if not names or not kwargs['ExclusiveStartTableName']:
+                break
+        return response
+
+    def _log_response(self, title, response):
+        """Logs the given response on debug level, bounded by the response log policy."""
+        if not RESPONSE_LOG.is_enabled():
+            return
+        text, truncated = RESPONSE_LOG.format(response)
+        # pylint: disable=no-member
+        self._logger.debug(f"{title}:\n{text}")
+        path = RESPONSE_LOG.write(response) if truncated else None
+        if path is not None:
+            path = escape(path)
+            self._logger.debug(f'Full {title}: <a href="{path}">{path}</a>', html=True)
+
+    def _open_result_set(self, label, commands, segments):
+        """Returns lazily fetched results of the commands on requested DynamoDB session."""
         # pylint: disable=no-member
-        self._logger.debug(f"'{commands}' response:\n{response}")
+        session = self._cache.switch(label)
+        if int(segments) > 1:
+            response = ParallelScan(session, commands, int(segments))
+        else:
+            response = session.execute(commands)
+        if not self._is_result_set(response):
+            raise ValueError(f"DynamoDBSQLLibraryError: '{commands}' does not return "
+                             "a result set")
         return response
+
+    @staticmethod
+    def _read_tables(tree):
+        """Returns the tables read by the given parsed statements, or None if they do not
+        only read, or save their results into a file.
+        """
+        if all(statement.action in READ_ACTIONS and not statement.save_file
+               for statement in tree):
+            return {statement.table for statement in tree}
+        return None
+
+    def _shutdown_queries(self):
+        """Cancels the queries that have not started yet, and waits for the running ones."""
+        for _, future in self._queries.values():
+            future.cancel()
+        self._queries.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    @staticmethod
+    def _statement(commands):
+        """Returns the upper case statement type of the given commands."""
+        return str(commands).split(None, 1)[0].upper() if str(commands).strip() else ''
+
+    def _switch_sessions(self, labels):
+        """Returns the DynamoDB sessions of the given labels, and the errors of the labels
+        that can not be switched to.
+        """
+        sessions = {}
+        errors = {}
+        for label in labels:
+            try:
+                # pylint: disable-next=no-member
+                sessions[label] = self._cache.switch(label)
+            # pylint: disable-next=broad-exception-caught
+            except Exception as exception:
+                errors[label] = exception
+        return sessions, errors
+
+    @staticmethod
+    def _timeout(timeout):
+        """Returns the given Robot Framework time in seconds, or None for no timeout."""
+        if timeout is None or str(timeout).strip().upper() in ('', 'NONE'):
+            return None
+        return timestr_to_secs(timeout)
+
+
+class ParallelScan(Iterator):
+    """Iterator over the items of a parallel scan fetched by a pool of worker threads.
+
+    The workers do not refer to the iterator, so the workers stop when the iterator is
+    closed or dropped.
+    """
+
+    def __init__(self, session, commands, segments, **kwargs):
+        workers = ScanWorkers(session, commands, segments, **kwargs)
+        self._iterator = workers.iterate()
+        finalize(self, workers.stop.set)
+
+    def __next__(self):
+        return next(self._iterator)
+
+    def close(self):
+        """Stops the worker threads and releases the remaining results."""
+        self._iterator.close()
+
+
+# pylint: disable-next=too-few-public-methods
+class ScanWorkers():
+    """Pool of daemon worker threads that scan the table segments of a parallel scan,
+    so scans that are never closed do not block the interpreter exit.
+    """
+
+    def __init__(self, session, commands, segments, **kwargs):
+        self._batches = Queue(maxsize=2 * segments)
+        self._commands = commands
+        self._kwargs = kwargs
+        self._segments = segments
+        self._session = session
+        self.stop = Event()
+
+    def iterate(self):
+        """Yields the items of all segments as they are fetched by the workers."""
+        workers = int(self._kwargs.get('workers') or self._segments)
+        segments = Queue()
+        for segment in range(self._segments):
+            segments.put(segment)
+        threads = [Thread(target=self._work, args=(segments,), daemon=True)
+                   for _ in range(min(workers, self._segments))]
+        try:
+            for thread in threads:
+                thread.start()
+            remaining = self._segments
+            while remaining:
+                try:
+                    batch = self._batches.get(timeout=0.1)
+                except Empty:
+                    continue
+                if batch is None:
+                    remaining -= 1
+                elif isinstance(batch, Exception):
+                    raise batch
+                else:
+                    yield from batch
+        finally:
+            self.stop.set()
+            for thread in threads:
+                if thread.is_alive():
+                    thread.join()
+
+    def _put(self, value):
+        """Queues the given value unless the iteration is stopped."""
+        while not self.stop.is_set():
+            try:
+                self._batches.put(value, timeout=0.1)
+                return
+            except Full:
+                continue
+
+    def _scan(self, segment):
+        """Scans the given segment and queues its items in batches."""
+        # pylint: disable=import-outside-toplevel
+        from DynamoDBSQLLibrary.engine import Engine, SegmentedConnection
+        response = None
+        try:
+            page_size = self._kwargs.get('page_size')
+            page_size = None if page_size is None else int(page_size)
+            connection = SegmentedConnection(self._session.connection, segment,
+                                             self._segments, page_size)
+            engine = Engine(connection)
+            engine.cached_descriptions = self._session.cached_descriptions
+            response = engine.execute(self._commands)
+            if not isinstance(response, Iterator):
+                raise ValueError(f"DynamoDBSQLLibraryError: '{self._commands}' does not "
+                                 "return a result set")
+            for batch in iter(lambda: list(islice(response, BATCH_SIZE)), []):
+                if self.stop.is_set():
+                    break
+                self._put(batch)
+        # pylint: disable-next=broad-exception-caught
+        except Exception as exception:
+            self._put(exception)
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+            self._put(None)
+
+    def _work(self, segments):
+        """Scans the queued segments until none is left or the iteration is stopped."""
+        while not self.stop.is_set():
+            try:
+                segment = segments.get_nowait()
+            except Empty:
+                return
+            self._scan(segment)
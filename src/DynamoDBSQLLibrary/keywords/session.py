@@ -21,20 +21,138 @@
 Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
 """
 
-from boto3.session import Session
-from dql import Engine
-from dynamo3 import DynamoDBConnection
+from functools import partial
+from threading import Lock, RLock
 from robot.api import logger
 from robot.api.deco import keyword
-from robot.utils import ConnectionCache
+from robot.utils import ConnectionCache, is_truthy
+from DynamoDBSQLLibrary.metrics import METRICS
+
+SESSION_KEYS = ('profile', 'access_key', 'secret_key', 'session_token', 'region')
+
+
+class SessionPool():
+    """Process-wide pool of boto3 sessions and DynamoDB clients."""
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = Lock()
+        self._sessions = {}
+        self._stats = {'client_hits': 0, 'client_misses': 0,
+                       'session_hits': 0, 'session_misses': 0}
+
+    def clear(self):
+        """Removes all pooled sessions and clients, and resets the statistics."""
+        with self._lock:
+            self._clients.clear()
+            self._sessions.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def get_client(self, key, factory):
+        """Returns pooled client for given key, creates one using factory if needed."""
+        return self._get('client', self._clients, key, factory)
+
+    def get_session(self, key, factory):
+        """Returns pooled session for given key, creates one using factory if needed."""
+        return self._get('session', self._sessions, key, factory)
+
+    def statistics(self):
+        """Returns pool size and reuse statistics."""
+        with self._lock:
+            return dict(self._stats, clients=len(self._clients), sessions=len(self._sessions))
+
+    def _get(self, kind, store, key, factory):
+        """Returns pooled object for given key, creates one using factory if needed."""
+        with self._lock:
+            if key in store:
+                self._stats[f'{kind}_hits'] += 1
+            else:
+                self._stats[f'{kind}_misses'] += 1
+                store[key] = factory()
+            return store[key]
+
+
+POOL = SessionPool()
+
+
+# pylint: disable-next=too-few-public-methods
+class LazySession():
+    """Placeholder of DynamoDB session that is created on first use."""
+
+    def __init__(self, factory):
+        self._factory = factory
+
+    def create(self):
+        """Returns newly created DynamoDB session."""
+        return self._factory()
+
+
+class SessionCache(ConnectionCache):
+    """Thread-safe connection cache that creates lazy DynamoDB sessions on first switch."""
+
+    def __init__(self, no_current_msg='No open connection.'):
+        super().__init__(no_current_msg)
+        self._lock = RLock()
+
+    def empty_cache(self):
+        """Removes all DynamoDB sessions."""
+        with self._lock:
+            super().empty_cache()
+
+    def register(self, connection, alias=None):
+        """Registers the given DynamoDB session, and returns its index."""
+        with self._lock:
+            return super().register(connection, alias)
+
+    def remove(self, identifier):
+        """Removes the requested DynamoDB session, without creating it if it is still lazy."""
+        with self._lock:
+            super().switch(identifier)
+            index = self.current_index
+            self.current = self._no_current
+            self._connections[index - 1] = None
+            self._aliases[f'x-{identifier}-x'] = self._aliases.pop(identifier)
+
+    def switch(self, identifier, create=True):
+        """Switches to the requested DynamoDB session, creates it if it is still lazy.
+
+        Returns None and keeps the current session if the requested session is still lazy
+        and ``create`` is false.
+        """
+        with self._lock:
+            current = self.current
+            session = super().switch(identifier)
+            if isinstance(session, LazySession) and not create:
+                self.current = current
+                return None
+            if isinstance(session, LazySession):
+                index = self.current_index
+                session = session.create()
+                self._connections[index - 1] = self.current = session
+            return session
 
 
 class SessionManager():
     """Session manager keywords for DynamoDB operations."""
 
     def __init__(self):
-        self._cache = ConnectionCache('No sessions.')
+        self._cache = SessionCache('No sessions.')
+        self._lazy = False
         self._logger = logger
+        self._metadata_ttl = 0
+
+    @keyword("Clear DynamoDB Session Pool")
+    def clear_dynamodb_session_pool(self):
+        """Removes all pooled boto3 sessions and clients, and resets the reuse statistics.
+
+        Existing DynamoDB sessions keep working, only new sessions create fresh clients.
+        Use this when the credentials or AWS configuration files have changed.
+
+        Examples:
+        | Clear DynamoDB Session Pool |
+        """
+        POOL.clear()
 
     @keyword("Create DynamoDB Session")
     def create_dynamodb_session(self, *args, **kwargs):
@@ -56,6 +174,24 @@ class SessionManager():
         - ``is_secure``: Enforce https connection. (Default True)
         - ``label``: A case and space insensitive string to identify the DynamoDB session.
                      (Default ``region``)
+        - ``lazy``: Defer the client creation until the session is used for the first time.
+                    Requires ``region`` or ``label``. (Default library ``lazy`` argument)
+        - ``metadata_ttl``: Reuse described table metadata for this many seconds,
+                            ``0`` describes the table on every schema lookup.
+                            (Default library ``metadata_ttl`` argument)
+        - ``read_capacity``: Limit the read requests to this many consumed read capacity
+                             units per second, ``0`` does not limit. (Default 0)
+        - ``write_capacity``: Limit the write requests to this many consumed write capacity
+                              units per second, ``0`` does not limit. (Default 0)
+
+        Read and write limits are separate token buckets, charged with the consumed
+        capacity returned by every request of the session, including bulk and parallel
+        operations. Requests wait while their bucket is in debt, and the bucket rate backs
+        off on unprocessed batch items and recovers on successful requests.
+
+        Sessions created with identical profile, credentials, region, host, port and
+        ``is_secure`` share one boto3 session and client per process. A ``session`` object
+        is never pooled. See `Get DynamoDB Session Pool Statistics`.
 
         Examples:
         | Create DynamoDB Session |           |                  |                   |             | # Use default config  |
@@ -63,31 +199,23 @@ class SessionManager():
         | Create DynamoDB Session | us-west-1 | profile=profile1 |                   |             | # Use profile1        |
         | Create DynamoDB Session | us-west-1 | access_key=KEY   | secret_key=SECRET |             | # Label is us-west-1  |
         | Create DynamoDB Session | us-west-1 | access_key=KEY   | secret_key=SECRET | label=LABEL | # Label is LABEL      |
+        | Create DynamoDB Session | us-west-1 | lazy=${True}     |                   |             | # Create on first use |
+        | Create DynamoDB Session | us-west-1 | metadata_ttl=60  |                   |             | # Cache table schemas |
+        | Create DynamoDB Session | us-west-1 | read_capacity=50 | write_capacity=10 |             | # Throttle requests   |
         """
         # pylint: disable=line-too-long
         kargs = dict(enumerate(args))
         region = kargs.get(0, kwargs.pop('region', None))
         label = kwargs.pop('label', region)
-        session = Engine()
-        # pylint: disable=protected-access
-        session._session = kwargs.pop('session', None)
-        # pylint: disable=protected-access
-        if session._session is None:
-            # pylint: disable=protected-access
-            session._session = self._get_session(region=region, **kwargs)
-        # pylint: disable=protected-access
-        client = self._get_client(session._session, region=region, **kwargs)
-        kwargs.pop('access_key', None)
-        kwargs.pop('host', None)
-        kwargs.pop('is_secure', None)
-        kwargs.pop('port', None)
-        kwargs.pop('profile', None)
-        kwargs.pop('secret_key', None)
-        kwargs.pop('session_token', None)
-        session.connection = DynamoDBConnection(client, **kwargs)
+        lazy = is_truthy(kwargs.pop('lazy', self._lazy))
+        if lazy and label is not None:
+            self._logger.debug(f'Registering lazy DynamoDB session: {label}')
+            factory = partial(self._create_measured_session, label, region, **kwargs)
+            self._cache.register(LazySession(factory), alias=label)
+            return label
+        session = self._create_measured_session(label, region, **kwargs)
         if label is None:
             label = session.connection.region
-        # pylint: disable=protected-access
         self._logger.debug(f'Creating DynamoDB session: {label}')
         self._cache.register(session, alias=label)
         return label
@@ -112,7 +240,7 @@ class SessionManager():
         | Delete DynamoDB Session | LABEL | info_on_fail=${True} |
         """
         try:
-            self._cache.switch(label)
+            self._cache.remove(label)
         # pylint: disable-next=broad-exception-caught
         except Exception as ex:
             error_msg = str(ex)
@@ -121,13 +249,56 @@ class SessionManager():
                 return
             # pylint: disable-next=broad-exception-raised,raise-missing-from
             raise Exception(error_msg)
-        index = self._cache.current_index
-        # pylint: disable=protected-access
-        self._cache.current = self._cache._no_current
+
+    @keyword("Get DynamoDB Session Pool Statistics")
+    def get_dynamodb_session_pool_statistics(self):
+        """Returns a dictionary of pooled boto3 sessions and clients reuse statistics.
+
+        The dictionary contains ``sessions`` and ``clients`` pool sizes, and
+        ``session_hits``, ``session_misses``, ``client_hits`` and ``client_misses`` counters.
+
+        Examples:
+        | ${stats} =                  | Get DynamoDB Session Pool Statistics |   |
+        | Should Be Equal As Integers | ${stats['client_hits']}              | 2 |
+        """
+        stats = POOL.statistics()
+        self._logger.info(f'DynamoDB session pool: {stats}')
+        return stats
+
+    def _create_measured_session(self, label, region, **kwargs):
+        """Returns DynamoDB session object, measured into the label latency histograms."""
+        with METRICS.span(label, 'CREATE SESSION'):
+            return self._create_session(region, **kwargs)
+
+    def _create_session(self, region, **kwargs):
+        """Returns DynamoDB session object."""
+        # pylint: disable=import-outside-toplevel
+        from dynamo3 import DynamoDBConnection
+        from DynamoDBSQLLibrary.engine import Engine
+        from DynamoDBSQLLibrary.throttle import Throttle
+        session = Engine(metadata_ttl=kwargs.pop('metadata_ttl', self._metadata_ttl))
+        throttle = Throttle(kwargs.pop('read_capacity', 0), kwargs.pop('write_capacity', 0))
         # pylint: disable=protected-access
-        self._cache._connections[index - 1] = None
+        session._session = kwargs.pop('session', None)
         # pylint: disable=protected-access
-        self._cache._aliases[f'x-{label}-x'] = self._cache._aliases.pop(label)
+        if session._session is None:
+            # pylint: disable=protected-access
+            session._session, client = self._get_pooled_client(region=region, **kwargs)
+        else:
+            # pylint: disable=protected-access
+            client = self._get_client(session._session, region=region, **kwargs)
+        kwargs.pop('access_key', None)
+        kwargs.pop('host', None)
+        kwargs.pop('is_secure', None)
+        kwargs.pop('port', None)
+        kwargs.pop('profile', None)
+        kwargs.pop('secret_key', None)
+        kwargs.pop('session_token', None)
+        session.connection = DynamoDBConnection(client, **kwargs)
+        if throttle.read or throttle.write:
+            throttle.attach(session.connection)
+        METRICS.attach(session.connection)
+        return session
 
     def _get_client(self, session, **kwargs):
         """Returns boto3 client session object."""
@@ -145,9 +316,22 @@ class SessionManager():
             client_kwargs['use_ssl'] = is_secure
         return session.client('dynamodb', **client_kwargs)
 
+    def _get_pooled_client(self, **kwargs):
+        """Returns pooled boto3 session and client objects."""
+        session_key = tuple(kwargs.get(name) for name in SESSION_KEYS)
+        is_secure = kwargs.get('is_secure', True)
+        url = self._get_url(kwargs.get('host'), kwargs.get('port'), is_secure)
+        client_key = session_key + (url, is_secure)
+        session = POOL.get_session(session_key, lambda: self._get_session(**kwargs))
+        client = POOL.get_client(client_key, lambda: self._get_client(session, **kwargs))
+        self._logger.debug(f'DynamoDB session pool: {POOL.statistics()}')
+        return session, client
+
     @staticmethod
     def _get_session(**kwargs):
         """Returns boto3 session object."""
+        # pylint: disable=import-outside-toplevel
+        from boto3.session import Session
         access_key = kwargs.pop('access_key', None)
         profile = kwargs.pop('profile', None)
         region = kwargs.pop('region', None)
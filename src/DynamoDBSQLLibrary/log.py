@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+from itertools import count
+from json import dumps
+from os import makedirs
+from os.path import dirname, join, relpath, sep
+from threading import Lock
+from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError
+from DynamoDBSQLLibrary.keywords.assertion import DecimalEncoder
+
+DEBUG_LEVELS = ('DEBUG', 'TRACE')
+MAX_BYTES = 65536
+MAX_ITEMS = 100
+SIDECAR_DIR = 'dynamodb-responses'
+
+
+class ResponseLog():
+    """Debug logging policy of DynamoDB responses.
+
+    Nothing is formatted unless the debug level is enabled, inline logs are truncated to
+    ``max_items`` items and ``max_bytes`` bytes, and truncated responses are written in
+    full to a sidecar file next to the Robot Framework output.
+    """
+
+    def __init__(self, max_items=MAX_ITEMS, max_bytes=MAX_BYTES, sidecar=True):
+        self._ids = count(1)
+        self._lock = Lock()
+        self.max_bytes = int(max_bytes)
+        self.max_items = int(max_items)
+        self.sidecar = sidecar
+
+    @staticmethod
+    def is_enabled():
+        """Returns True if the debug messages are logged, or Robot Framework is not running."""
+        try:
+            level = BuiltIn().get_variable_value('${LOG LEVEL}', 'DEBUG')
+        except RobotNotRunningError:
+            return True
+        return str(level).split(':', 1)[0].upper() in DEBUG_LEVELS
+
+    def format(self, response):
+        """Returns the bounded text of given response, and True if it is truncated."""
+        text, truncated = self._format(response)
+        data = text.encode('utf-8')
+        if len(data) > self.max_bytes:
+            text = data[:self.max_bytes].decode('utf-8', errors='ignore')
+            return f'{text}... ({len(data)} bytes)', True
+        return text, truncated
+
+    def write(self, response):
+        """Writes the full response into a sidecar file, and returns its path relative to the
+        log file, or None if the sidecar files are disabled or Robot Framework is not running.
+        """
+        if not self.sidecar:
+            return None
+        try:
+            output_dir = BuiltIn().get_variable_value('${OUTPUT DIR}')
+            log_file = BuiltIn().get_variable_value('${LOG FILE}', 'NONE')
+        except RobotNotRunningError:
+            return None
+        try:
+            text = dumps(response, cls=DecimalEncoder)
+        except TypeError:
+            text = dumps(str(response))
+        directory = join(output_dir, SIDECAR_DIR)
+        with self._lock:
+            path = join(directory, f'response-{next(self._ids)}.json')
+        makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(text)
+        link = relpath(path, dirname(log_file) if log_file != 'NONE' else output_dir)
+        return link.replace(sep, '/')
+
+    def _format(self, response):
+        """Returns the text of given response bounded to maximum items."""
+        if self._is_large(response):
+            items = response[:self.max_items]
+            text = repr(items.tolist() if hasattr(items, 'tolist') else list(items))[:-1]
+            return f'{text}, ... {len(response) - self.max_items} more items]', True
+        if isinstance(response, dict) and any(map(self._is_large, response.values())):
+            texts = [f'{key!r}: {self._format(value)[0]}' for key, value in response.items()]
+            return f"{{{', '.join(texts)}}}", True
+        return str(response), False
+
+    def _is_large(self, response):
+        """Returns True if given response is a list or a column with more than maximum items."""
+        is_column = hasattr(response, 'tolist') and hasattr(response, '__len__')
+        is_list = isinstance(response, (list, tuple)) or is_column
+        return is_list and len(response) > self.max_items
+
+
+RESPONSE_LOG = ResponseLog()
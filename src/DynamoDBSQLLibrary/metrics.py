@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+from contextlib import contextmanager
+from json import dump
+from os import makedirs
+from os.path import dirname, isabs, join
+from threading import local, Lock
+from time import perf_counter
+from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError
+
+METRICS_FILE = 'dynamodb-metrics.json'
+PERCENTILES = (50, 90, 99, 99.9)
+PHASES = ('parse', 'network', 'materialize', 'total')
+SIGNIFICANT_BITS = 6
+
+
+class LatencyHistogram():
+    """HDR-style latency histogram of microseconds with log-linear buckets.
+
+    Values below ``2 ** SIGNIFICANT_BITS`` microseconds are counted exactly, larger
+    values share a bucket with the values of the same ``SIGNIFICANT_BITS`` high bits,
+    so the relative error stays below 1/32 for any value.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self.count = 0
+        self.max = 0
+        self.min = 0
+        self.total = 0
+
+    def percentile(self, percent):
+        """Returns the highest value equivalent to the given percentile in microseconds."""
+        rank = self.count * percent / 100.0
+        seen = 0
+        for lowest in sorted(self._counts):
+            seen += self._counts[lowest]
+            if seen >= rank:
+                return min(self.max, self._highest(lowest))
+        return self.max
+
+    def record(self, seconds):
+        """Records the given latency in seconds."""
+        value = max(0, int(seconds * 1000000))
+        shift = max(0, value.bit_length() - SIGNIFICANT_BITS)
+        lowest = value >> shift << shift
+        self._counts[lowest] = self._counts.get(lowest, 0) + 1
+        self.min = value if not self.count else min(self.min, value)
+        self.max = max(self.max, value)
+        self.count += 1
+        self.total += value
+
+    def to_dict(self):
+        """Returns the summary and buckets of the histogram in microseconds."""
+        summary = {'count': self.count, 'min': self.min, 'max': self.max,
+                   'mean': self.total / self.count if self.count else 0}
+        for percent in PERCENTILES:
+            summary[f'p{percent:g}'] = self.percentile(percent)
+        summary['buckets'] = {str(lowest): self._counts[lowest] for lowest in sorted(self._counts)}
+        return summary
+
+    @staticmethod
+    def _highest(lowest):
+        """Returns the highest value of the bucket with given lowest value."""
+        shift = max(0, lowest.bit_length() - SIGNIFICANT_BITS)
+        return lowest + (1 << shift) - 1
+
+
+class Metrics():
+    """Thread-safe latency histograms per label, statement type and phase.
+
+    A span measures one keyword call on the current thread. The DQL parse time and the
+    time spent in DynamoDB calls of the span thread are recorded as the ``parse`` and
+    ``network`` phases, the rest of the span as the ``materialize`` phase.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._local = local()
+        self._lock = Lock()
+        self.enabled = True
+
+    def add(self, phase, seconds):
+        """Adds the given seconds to the phase of the span of the current thread, if any."""
+        phases = getattr(self._local, 'span', None)
+        if phases is not None:
+            phases[phase] += seconds
+
+    def attach(self, connection):
+        """Subscribes the network timing hooks to the given DynamoDB connection."""
+        connection.subscribe('precall', self._on_precall)
+        connection.subscribe('postcall', self._on_postcall)
+
+    def report(self):
+        """Returns the list of histogram summaries sorted by label, statement and phase."""
+        with self._lock:
+            items = sorted(self._histograms.items(),
+                           key=lambda item: (item[0][0], item[0][1], PHASES.index(item[0][2])))
+            return [{'label': label, 'statement': statement, 'phase': phase,
+                     **histogram.to_dict()} for (label, statement, phase), histogram in items]
+
+    def reset(self):
+        """Removes all histograms."""
+        with self._lock:
+            self._histograms.clear()
+
+    @contextmanager
+    def span(self, label, statement):
+        """Measures the phases of the wrapped block into the label and statement histograms."""
+        if not self.enabled:
+            yield
+            return
+        parent = getattr(self._local, 'span', None)
+        phases = self._local.span = {'parse': 0.0, 'network': 0.0}
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            phases['total'] = perf_counter() - started
+            phases['materialize'] = max(0.0, phases['total'] - phases['parse'] - phases['network'])
+            self._local.span = parent
+            with self._lock:
+                for phase in PHASES:
+                    key = (str(label), statement, phase)
+                    self._histograms.setdefault(key, LatencyHistogram()).record(phases[phase])
+
+    def write(self, path=METRICS_FILE):
+        """Writes the histograms as JSON into the given path, relative to the Robot Framework
+        output directory, and returns the written path, or None if nothing is recorded.
+        """
+        report = self.report()
+        if not report:
+            return None
+        if not isabs(path):
+            try:
+                path = join(BuiltIn().get_variable_value('${OUTPUT DIR}'), path)
+            except RobotNotRunningError:
+                pass
+        if dirname(path):
+            makedirs(dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as stream:
+            dump({'unit': 'microseconds', 'histograms': report}, stream, indent=2)
+        return path
+
+    # pylint: disable-next=unused-argument
+    def _on_postcall(self, *args):
+        """Adds the elapsed time of a DynamoDB call to the network phase."""
+        started = getattr(self._local, 'call_started', None)
+        if started is not None:
+            self._local.call_started = None
+            self.add('network', perf_counter() - started)
+
+    # pylint: disable-next=unused-argument
+    def _on_precall(self, *args):
+        """Marks the start time of a DynamoDB call."""
+        self._local.call_started = perf_counter()
+
+
+METRICS = Metrics()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+from collections.abc import Mapping
+
+
+class Row(Mapping):
+    """Read-only DynamoDB item backed by a tuple of values, the attribute names are kept
+    in a schema shared by every row of a result set with the same attributes.
+    """
+
+    __slots__ = ('_schema', '_values')
+
+    def __init__(self, schema, values):
+        self._schema = schema
+        self._values = values
+
+    def __contains__(self, name):
+        return name in self._schema
+
+    def __eq__(self, other):
+        if isinstance(other, Row) and other._schema is self._schema:
+            return self._values == other._values
+        return super().__eq__(other)
+
+    def __getitem__(self, name):
+        return self._values[self._schema[name]]
+
+    def __iter__(self):
+        return iter(self._schema)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __reduce__(self):
+        return (Row, (self._schema, self._values))
+
+    def __repr__(self):
+        return repr(dict(zip(self._schema, self._values)))
+
+
+def to_rows(items):
+    """Returns the given items as a list of rows sharing the schemas of equal attribute
+    names in equal order.
+    """
+    schemas = {}
+    rows = []
+    for item in items:
+        names = tuple(item)
+        schema = schemas.get(names)
+        if schema is None:
+            schema = schemas[names] = {name: index for index, name in enumerate(names)}
+        rows.append(Row(schema, tuple(item.values())))
+    return rows
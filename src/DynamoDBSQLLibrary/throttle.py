@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+from threading import local, Lock
+from time import monotonic, sleep
+from dynamo3.constants import READ_COMMANDS
+
+BACKOFF_RATIO = 0.5
+CAPACITY_COMMANDS = frozenset(('batch_get_item', 'batch_write_item', 'delete_item', 'get_item',
+                               'put_item', 'query', 'scan', 'transact_get_items',
+                               'transact_write_items', 'update_item'))
+MIN_RATE_RATIO = 0.1
+RECOVERY_RATIO = 0.05
+WRITE_COMMANDS = frozenset(('batch_write_item', 'delete_item', 'put_item',
+                            'transact_write_items', 'update_item'))
+
+
+class TokenBucket():
+    """Thread-safe token bucket of capacity units refilled at ``rate`` units per second.
+
+    Requests wait while the bucket is in debt, consumed capacity is charged after the
+    fact, so a request that consumes more than the bucket holds delays the next ones.
+    The rate backs off on throttled requests and recovers on successful ones.
+    """
+
+    def __init__(self, rate):
+        self._lock = Lock()
+        self._tokens = float(rate)
+        self._updated = monotonic()
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+
+    def backoff(self):
+        """Decreases the refill rate multiplicatively, down to a tenth of the maximum rate."""
+        with self._lock:
+            self.rate = max(self.max_rate * MIN_RATE_RATIO, self.rate * BACKOFF_RATIO)
+
+    def charge(self, units):
+        """Removes the given consumed capacity units from the bucket."""
+        with self._lock:
+            self._refill()
+            self._tokens -= units
+
+    def recover(self):
+        """Increases the refill rate additively, up to the maximum rate."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_RATIO)
+
+    def wait(self):
+        """Blocks until the bucket is not in debt, and returns the waited seconds."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 0:
+                    return waited
+                delay = -self._tokens / self.rate
+            sleep(delay)
+            waited += delay
+
+    def _refill(self):
+        """Adds the capacity units accrued since the last refill, up to one second worth."""
+        now = monotonic()
+        self._tokens = min(self.max_rate, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class Throttle():
+    """Client-side rate limiter of a DynamoDB connection with separate read and write
+    token buckets in capacity units per second, zero disables the limit.
+
+    Hooks into the connection requests, so every call through the connection, including
+    the ones of segmented and bulk operations, respects the limits. Calls retried on
+    throughput errors back off their bucket like throttled batch calls.
+    """
+
+    def __init__(self, read_capacity=0, write_capacity=0):
+        self._local = local()
+        self.read = TokenBucket(read_capacity) if float(read_capacity) > 0 else None
+        self.write = TokenBucket(write_capacity) if float(write_capacity) > 0 else None
+
+    def attach(self, connection):
+        """Subscribes the throttle hooks to the given DynamoDB connection."""
+        connection.subscribe('precall', self.on_precall)
+        connection.subscribe('postcall', self.on_postcall)
+        connection.subscribe('capacity', self.on_capacity)
+        retry_sleep = connection.exponential_sleep
+        connection.exponential_sleep = lambda attempt: self.on_retry(retry_sleep, attempt)
+
+    def on_capacity(self, *args):
+        """Charges the consumed capacity of a call to the read and write buckets.
+
+        Called with connection, command, request arguments, response and capacity.
+        """
+        capacity = args[-1]
+        for bucket, units in ((self.read, capacity.total.read),
+                              (self.write, capacity.total.write)):
+            if bucket is not None and units:
+                bucket.charge(units)
+
+    def on_postcall(self, connection, command, kwargs, response):
+        # pylint: disable=unused-argument
+        """Backs off the bucket of a throttled batch call, recovers it otherwise."""
+        bucket = self._get_bucket(command)
+        if bucket is not None:
+            if response.get('UnprocessedItems') or response.get('UnprocessedKeys'):
+                bucket.backoff()
+            else:
+                bucket.recover()
+
+    def on_precall(self, connection, command, kwargs):
+        # pylint: disable=unused-argument
+        """Requests the consumed capacity of a call and waits for its bucket."""
+        self._local.command = command
+        bucket = self._get_bucket(command)
+        if bucket is not None:
+            returned = kwargs.get('ReturnConsumedCapacity', 'NONE')
+            if command in CAPACITY_COMMANDS and returned == 'NONE':
+                kwargs['ReturnConsumedCapacity'] = 'TOTAL'
+            bucket.wait()
+
+    def on_retry(self, retry_sleep, attempt):
+        """Backs off the bucket of a call retried on a throughput error, sleeps with the
+        given connection sleep, and waits for the bucket before the retry.
+        """
+        bucket = self._get_bucket(getattr(self._local, 'command', None))
+        if bucket is not None:
+            bucket.backoff()
+        retry_sleep(attempt)
+        if bucket is not None:
+            bucket.wait()
+
+    def _get_bucket(self, command):
+        """Returns the bucket of given command, or None if it is not limited."""
+        if command in READ_COMMANDS:
+            return self.read
+        if command in WRITE_COMMANDS:
+            return self.write
+        return None
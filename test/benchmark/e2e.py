@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from json import dump, dumps, load
+from os import makedirs, path as os_path
+from platform import python_version
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import sys
+sys.path.append(os_path.join(os_path.dirname(os_path.abspath(__file__)), '..', '..', 'src'))
+from DynamoDBSQLLibrary import DynamoDBSQLLibrary  # noqa: E402
+from DynamoDBSQLLibrary.metrics import METRICS  # noqa: E402
+from DynamoDBSQLLibrary.version import get_version  # noqa: E402
+
+CONCURRENCY = (1, 4)
+INSERT_ROWS = 25
+LABEL = 'benchmark'
+RESULTS = os_path.join(os_path.dirname(os_path.abspath(__file__)), 'results')
+SELECTS = 100
+SESSIONS = 20
+SIZES = (100, 1000)
+TABLE = 'benchmark'
+
+
+class Benchmark():
+    """End-to-end benchmark of the library keywords against a local DynamoDB stand-in."""
+
+    def __init__(self, host, port, region='us-east-1'):
+        self.arguments = {'host': host, 'port': port, 'is_secure': False,
+                          'access_key': 'key', 'secret_key': 'secret'}
+        self.library = DynamoDBSQLLibrary()
+        # latencies are recorded without writing the metrics file
+        METRICS.enabled = True
+        self.region = region
+        self.results = []
+
+    def run(self, sizes, concurrency):
+        """Runs every case for each of ``sizes`` and ``concurrency`` levels."""
+        self.session()
+        self.library.create_dynamodb_session(self.region, label=LABEL, **self.arguments)
+        try:
+            for size in sizes:
+                self.query(size)
+                for workers in concurrency:
+                    self.bulk(size, workers)
+        finally:
+            self.execute(f'DROP TABLE IF EXISTS {TABLE}')
+            self.library.delete_all_dynamodb_sessions()
+        return self.results
+
+    def bulk(self, size, workers):
+        """Measures file load, parallel scan and segmented export with ``workers`` threads."""
+        self.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        self.execute(f'CREATE TABLE {TABLE} (id STRING HASH KEY)')
+        with TemporaryDirectory() as directory:
+            source = os_path.join(directory, 'items.jsonl')
+            with open(source, 'w', encoding='utf-8') as stream:
+                stream.writelines(dumps(item) + '\n' for item in items(size))
+            self.measure('load', size, workers, self.library.load_dynamodb_table_from_file,
+                         LABEL, TABLE, source, workers=workers)
+            self.measure('parallel scan', size, workers, self.library.parallel_scan_dynamodb,
+                         LABEL, f'SCAN * FROM {TABLE}', segments=workers)
+            self.measure('export', size, workers, self.library.export_dynamodb_table_to_file,
+                         LABEL, TABLE, os_path.join(directory, 'export.jsonl'), segments=workers)
+
+    def execute(self, commands):
+        """Returns the response of the given commands on the benchmark session."""
+        return self.library.query_dynamodb(LABEL, commands)
+
+    def measure(self, case, size, concurrency, function, *args, **kwargs):
+        """Records and returns the throughput and ``Query DynamoDB`` latencies of one call."""
+        METRICS.reset()
+        started = perf_counter()
+        function(*args, **kwargs)
+        seconds = perf_counter() - started
+        result = {'case': case, 'items': size, 'concurrency': concurrency,
+                  'seconds': round(seconds, 6), 'items_per_second': round(size / seconds, 1)}
+        latencies = [histogram for histogram in METRICS.report()
+                     if histogram['label'] == LABEL and histogram['phase'] == 'total']
+        if latencies:
+            result.update(p50_us=latencies[0]['p50'], p99_us=latencies[0]['p99'])
+        print(f"{case:>14} {size:>8} items x{concurrency:<3} {seconds:10.4f}s "
+              f"{result['items_per_second']:>10.0f} items/s")
+        self.results.append(result)
+        return result
+
+    def query(self, size):
+        """Measures ``Query DynamoDB`` INSERT, SCAN and SELECT throughput."""
+        self.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        self.execute(f'CREATE TABLE {TABLE} (id STRING HASH KEY)')
+        self.measure('insert', size, 1, self.statements, list(inserts(size)))
+        self.measure('scan', size, 1, self.execute, f'SCAN * FROM {TABLE}')
+        count = min(size, SELECTS)
+        result = self.measure('select', count, 1, self.statements,
+                              [f"SELECT * FROM {TABLE} WHERE id = '{index:08d}'"
+                               for index in range(0, size, max(1, size // count))][:count])
+        result.update(items=size, operations=count)
+
+    def session(self):
+        """Measures cold and warm ``Create DynamoDB Session`` startup."""
+        timings = []
+        for index in range(SESSIONS):
+            started = perf_counter()
+            self.library.create_dynamodb_session(self.region, label=f'session{index}',
+                                                 **self.arguments)
+            timings.append(perf_counter() - started)
+            self.library.delete_dynamodb_session(f'session{index}')
+        for case, seconds in (('session cold', timings[0]),
+                              ('session warm', median(timings[1:]))):
+            self.results.append({'case': case, 'items': 1, 'concurrency': 1,
+                                 'seconds': round(seconds, 6),
+                                 'items_per_second': round(1 / seconds, 1)})
+            print(f"{case:>14} {1:>8} items x{1:<3} {seconds:10.4f}s")
+
+    def statements(self, commands):
+        """Executes the given commands one after another."""
+        for command in commands:
+            self.execute(command)
+
+
+def compare(results, previous):
+    """Returns lines comparing the throughput of ``results`` with a ``previous`` report."""
+    expected = {(result['case'], result['items'], result['concurrency']): result
+                for result in previous['results']}
+    lines = [f"{'case':>14} {'items':>8} {'x':>3} {previous['version']:>12} "
+             f"{get_version():>12} {'change':>8}"]
+    for result in results:
+        reference = expected.get((result['case'], result['items'], result['concurrency']))
+        if reference is None:
+            continue
+        change = result['items_per_second'] / reference['items_per_second'] - 1
+        lines.append(f"{result['case']:>14} {result['items']:>8} {result['concurrency']:>3} "
+                     f"{reference['items_per_second']:>12.1f} {result['items_per_second']:>12.1f} "
+                     f"{change:>+8.1%}")
+    return lines
+
+
+def inserts(size):
+    """Yields multi-row INSERT commands for ``size`` benchmark items."""
+    rows = []
+    for item in items(size):
+        rows.append(f"('{item['id']}', {item['count']}, '{item['name']}')")
+        if len(rows) == INSERT_ROWS:
+            yield f"INSERT INTO {TABLE} (id, count, name) VALUES {', '.join(rows)}"
+            rows = []
+    if rows:
+        yield f"INSERT INTO {TABLE} (id, count, name) VALUES {', '.join(rows)}"
+
+
+def items(size):
+    """Yields ``size`` deterministic benchmark items."""
+    for index in range(size):
+        yield {'id': f'{index:08d}', 'count': index % 1000, 'name': f'name{index % 97}'}
+
+
+def main(argv):
+    """Runs the end-to-end benchmark against a local DynamoDB stand-in."""
+    parser = ArgumentParser(description=main.__doc__)
+    parser.add_argument('--host', default='127.0.0.1', help='DynamoDB Local or moto host')
+    parser.add_argument('--port', type=int, default=8000, help='DynamoDB Local or moto port')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                        help='comma separated numbers of items')
+    parser.add_argument('--concurrency', default=','.join(map(str, CONCURRENCY)),
+                        help='comma separated worker and segment counts of the bulk cases')
+    parser.add_argument('--output', default=os_path.join(RESULTS, f'e2e-{get_version()}.json'),
+                        help='report file (Default results/e2e-<version>.json)')
+    parser.add_argument('--compare', help='previous report to compare the throughput with')
+    args = parser.parse_args(argv)
+
+    benchmark = Benchmark(args.host, args.port)
+    results = benchmark.run([int(size) for size in args.sizes.split(',')],
+                            [int(workers) for workers in args.concurrency.split(',')])
+
+    makedirs(os_path.dirname(os_path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as writer:
+        dump({'version': get_version(), 'python': python_version(),
+              'endpoint': f'{args.host}:{args.port}',
+              'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'results': results}, writer, indent=2)
+        writer.write('\n')
+    print(f"Report: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as reader:
+            print('\n'.join(compare(results, load(reader))))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+from argparse import ArgumentParser
+from decimal import Decimal
+from gc import collect
+from json import dump, dumps, load
+from operator import itemgetter
+from os import path as os_path
+from platform import python_version
+from random import Random
+from time import perf_counter
+from tracemalloc import get_traced_memory, start, stop
+import sys
+from boto3.dynamodb.types import Binary
+sys.path.append(os_path.join(os_path.dirname(os_path.abspath(__file__)), '..', '..', 'src'))
+from DynamoDBSQLLibrary.keywords.assertion import Assertion, DecimalEncoder  # noqa: E402
+
+BASELINE = os_path.join(os_path.dirname(os_path.abspath(__file__)), 'baseline.json')
+SIZES = (1000, 100000)
+TOLERANCE = 0.25
+
+
+def generate(size, seed=0):
+    """Returns ``size`` synthetic DynamoDB items with nested maps, sets, Decimals and Binary."""
+    rng = Random(seed)
+    return [{
+        'id': f'{index:08d}',
+        'active': rng.random() < 0.5,
+        'blob': Binary(rng.getrandbits(128).to_bytes(16, 'big')),
+        'count': Decimal(rng.randrange(10 ** 6)),
+        'price': Decimal(rng.randrange(10 ** 6)).scaleb(-2),
+        'profile': {
+            'address': {'city': f'city{rng.randrange(100)}',
+                        'zip': f'{rng.randrange(10 ** 5):05d}'},
+            'history': [Decimal(rng.randrange(1000)) for _ in range(4)],
+            'name': f'name{rng.randrange(10 ** 4)}',
+        },
+        'scores': {Decimal(rng.randrange(1000)) for _ in range(3)},
+        'tags': {f'tag{rng.randrange(50)}' for _ in range(3)},
+    } for index in range(size)]
+
+
+def cases(size):
+    """Returns benchmark cases as ``(name, function)`` pairs for ``size`` items."""
+    assertion = Assertion()
+    items = generate(size)
+    other = generate(size)
+    Random(1).shuffle(other)
+    text = dumps(items, cls=DecimalEncoder, sort_keys=True)
+    # pylint: disable=protected-access
+    return (
+        ('compare', lambda: assertion.lists_deep_compare(items, other)),
+        ('cmp', lambda: Assertion._cmp(items, other, key=itemgetter('id'))),
+        ('dump', lambda: dumps(items, cls=DecimalEncoder, sort_keys=True)),
+        ('load', lambda: assertion.json_loads(text)),
+        ('sorting', lambda: [Assertion._sorting(item) for item in items]),
+    )
+
+
+def measure(function, repeat):
+    """Returns the best of ``repeat`` timings and the peak traced memory of ``function``."""
+    timings = []
+    for _ in range(repeat):
+        collect()
+        started = perf_counter()
+        function()
+        timings.append(perf_counter() - started)
+    collect()
+    start()
+    try:
+        function()
+        peak = get_traced_memory()[1]
+    finally:
+        stop()
+    return min(timings), peak
+
+
+def regressions(results, baseline, tolerance=TOLERANCE):
+    """Returns messages for results slower or larger than ``baseline`` beyond ``tolerance``."""
+    expected = {(result['case'], result['items']): result for result in baseline['results']}
+    messages = []
+    for result in results:
+        reference = expected.get((result['case'], result['items']))
+        if reference is None:
+            continue
+        if result['items_per_second'] < reference['items_per_second'] * (1 - tolerance):
+            messages.append(f"{result['case']} x {result['items']}: "
+                            f"{result['items_per_second']:.0f} items/s is slower than baseline "
+                            f"{reference['items_per_second']:.0f}")
+        if result['peak_bytes'] > reference['peak_bytes'] * (1 + tolerance):
+            messages.append(f"{result['case']} x {result['items']}: {result['peak_bytes']} "
+                            f"peak bytes is larger than baseline {reference['peak_bytes']}")
+    return messages
+
+
+def run(sizes, repeat, selected=None):
+    """Returns the benchmark results of the ``selected`` cases for each of ``sizes``."""
+    results = []
+    for size in sizes:
+        for name, function in cases(size):
+            if selected and name not in selected:
+                continue
+            seconds, peak = measure(function, repeat)
+            result = {'case': name, 'items': size, 'seconds': round(seconds, 6),
+                      'items_per_second': round(size / seconds, 1), 'peak_bytes': peak}
+            print(f"{name:>8} {size:>8} items {seconds:10.4f}s "
+                  f"{result['items_per_second']:>12.0f} items/s {peak / 2 ** 20:10.1f} MiB")
+            results.append(result)
+    return results
+
+
+def main(argv):
+    """Runs the offline micro-benchmarks of the assertion and JSON helpers."""
+    parser = ArgumentParser(description=main.__doc__)
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                        help='comma separated dataset sizes, e.g. 1000,100000,1000000')
+    parser.add_argument('--cases', default='', help='comma separated case names to run')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline results file')
+    parser.add_argument('--save', action='store_true', help='store results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='allowed relative regression against the baseline')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    selected = {name for name in args.cases.split(',') if name}
+    results = run(sizes, args.repeat, selected)
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as writer:
+            dump({'python': python_version(), 'results': results}, writer, indent=2)
+            writer.write('\n')
+        return 0
+    if not os_path.exists(args.baseline):
+        return 0
+    with open(args.baseline, encoding='utf-8') as reader:
+        messages = regressions(results, load(reader), args.tolerance)
+    for message in messages:
+        print(f"REGRESSION {message}")
+    return 1 if messages else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
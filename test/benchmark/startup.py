@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+from argparse import ArgumentParser
+from json import loads
+from os import environ, pathsep, path as os_path
+from subprocess import PIPE, run as run_process
+import sys
+
+HEAVY_MODULES = ('boto3', 'botocore', 'dql', 'dynamo3', 'numpy', 'pyparsing')
+MAX_MILLISECONDS = 250
+SCRIPT = '''
+import json, sys
+from time import perf_counter
+import robot.api, robot.api.deco, robot.libraries.BuiltIn, robot.utils
+started = perf_counter()
+import DynamoDBSQLLibrary
+seconds = perf_counter() - started
+print(json.dumps({'seconds': seconds, 'modules': sorted({name.split('.')[0]
+                                                         for name in sys.modules})}))
+'''
+SRC = os_path.join(os_path.dirname(os_path.abspath(__file__)), '..', '..', 'src')
+
+
+def measure():
+    """Returns the library import time in a new interpreter that has already imported the
+    Robot Framework modules, and the heavy dependencies imported with the library.
+    """
+    env = dict(environ, PYTHONPATH=pathsep.join(filter(None, (SRC, environ.get('PYTHONPATH')))))
+    process = run_process([sys.executable, '-c', SCRIPT], env=env, check=True,
+                          stdout=PIPE, universal_newlines=True)
+    result = loads(process.stdout)
+    return result['seconds'], sorted(set(HEAVY_MODULES) & set(result['modules']))
+
+
+def run(repeat):
+    """Returns the best of ``repeat`` library import times, and the heavy dependencies."""
+    timings = []
+    heavy = set()
+    for _ in range(repeat):
+        seconds, modules = measure()
+        timings.append(seconds)
+        heavy.update(modules)
+    return min(timings), sorted(heavy)
+
+
+def main(argv):
+    """Measures the import time of the library without its heavy dependencies."""
+    parser = ArgumentParser(description=main.__doc__)
+    parser.add_argument('--repeat', type=int, default=5, help='imports in new interpreters')
+    parser.add_argument('--max-ms', type=float, default=MAX_MILLISECONDS,
+                        help='maximum best import time in milliseconds')
+    args = parser.parse_args(argv)
+
+    seconds, heavy = run(args.repeat)
+    print(f"  import {seconds * 1000:10.1f} ms best of {args.repeat}")
+    print(f"   heavy {', '.join(heavy) or '-'}")
+    messages = []
+    if heavy:
+        messages.append(f"importing the library imports {', '.join(heavy)}")
+    if seconds * 1000 > args.max_ms:
+        messages.append(f"import time {seconds * 1000:.1f} ms is slower than {args.max_ms} ms")
+    for message in messages:
+        print(f"REGRESSION {message}")
+    return 1 if messages else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -28,10 +28,14 @@ from collections import namedtuple, OrderedDict
 from decimal import Decimal
 from dql import Engine
 from dql.exceptions import EngineRuntimeError
+from dynamo3 import Binary as DynamoBinary
 from dynamo3.exception import DynamoDBError
+from json import dumps
 from sys import path
 path.append('src')
+from DynamoDBSQLLibrary.columnar import to_columns  # noqa: E402
 from DynamoDBSQLLibrary.keywords import Assertion  # noqa: E402
+from DynamoDBSQLLibrary.keywords.assertion import DecimalEncoder  # noqa: E402
 
 
 class AssertionTests(unittest.TestCase):
@@ -46,6 +50,49 @@ class AssertionTests(unittest.TestCase):
         self.label = 'MY-LABEL'
         self.table_name = 'MY-TABLE-NAME'
 
+    def test_column_should_be_in_range(self):
+        """Column range check should fail on the first present value out of the range."""
+        columns = to_columns([{'n': Decimal(5), 's': 'b'}, {'n': Decimal('7.5')}])
+        self.assertion.column_should_be_in_range(columns, 'n', '5', '7.5')
+        self.assertion.column_should_be_in_range(columns, 's', minimum='a')
+        with self.assertRaises(AssertionError) as context:
+            self.assertion.column_should_be_in_range(columns, 'n', maximum=6)
+        self.assertEqual("DynamoDBSQLLibraryError: 1 values of column 'n' are outside of "
+                         "range [None, 6], first at row 1: 7.5", str(context.exception))
+        with self.assertRaises(ValueError) as context:
+            self.assertion.column_should_be_in_range(columns, 'x', 1)
+        self.assertEqual("DynamoDBSQLLibraryError: Non-existing column 'x'",
+                         str(context.exception))
+
+    def test_column_sum_should_be(self):
+        """Column sum check should compare the sum within the tolerance."""
+        columns = to_columns([{'n': Decimal('1.25'), 's': 'a'}, {'n': Decimal(2)}])
+        self.assertion.column_sum_should_be(columns, 'n', '3.25')
+        self.assertion.column_sum_should_be(columns, 'n', 3.3, tolerance='0.1')
+        with self.assertRaises(AssertionError) as context:
+            self.assertion.column_sum_should_be(columns, 'n', 3)
+        self.assertEqual("DynamoDBSQLLibraryError: Sum of column 'n' is 3.25, expected 3",
+                         str(context.exception))
+        with self.assertRaises(ValueError) as context:
+            self.assertion.column_sum_should_be(columns, 's', 0)
+        self.assertEqual("DynamoDBSQLLibraryError: Column 's' is not numeric",
+                         str(context.exception))
+
+    def test_column_values_should_be_unique(self):
+        """Column uniqueness check should report the duplicated values."""
+        columns = to_columns([{'id': 'a', 'n': Decimal(1)}, {'id': 'b', 'n': Decimal(1)}])
+        self.assertion.column_values_should_be_unique(columns, 'id')
+        with self.assertRaises(AssertionError) as context:
+            self.assertion.column_values_should_be_unique(columns, 'n')
+        self.assertEqual("DynamoDBSQLLibraryError: Column 'n' has 1 duplicated values, "
+                         "first: 1", str(context.exception))
+
+    def test_get_column_statistics(self):
+        """Column statistics should be returned for the requested column."""
+        columns = to_columns([{'n': Decimal(1)}, {'n': Decimal(3)}])
+        self.assertEqual(self.assertion.get_column_statistics(columns, 'n'),
+                         {'count': 2, 'missing': 0, 'min': 1, 'max': 3, 'sum': 4, 'mean': 2.0})
+
     def test_schema_dumps_should_be_equal(self):
         """Schema dumps should be equal."""
         try:
@@ -137,7 +184,7 @@ class AssertionTests(unittest.TestCase):
 
     def test_list_and_json_should_be_equal(self):
         """List and JSON string should compare equally."""
-        actual = [{'key': Decimal(5.5)}, {'key': Decimal(5.4)}]
+        actual = [{'key': Decimal('5.5')}, {'key': Decimal('5.4')}]
         expected = '[{"key": 5.4}, {"key": 5.5}]'
         try:
             self.assertion.list_and_json_string_should_be_equal(actual, expected, 'key')
@@ -149,10 +196,11 @@ class AssertionTests(unittest.TestCase):
         """List and JSON string should compare unequally."""
         actual = [{'key': Decimal(5.5)}, {'key': Decimal(5.4)}]
         expected = '[{"key": 5.4}, {"key": 5.5}]'
-        self.assertion._builtin.should_be_equal = mock.Mock(side_effect=AssertionError())
         with self.assertRaises(AssertionError) as context:
             self.assertion.list_and_json_string_should_be_equal(actual, expected, 'key')
-        self.assertEqual(str(context.exception), '')
+        self.assertEqual(str(context.exception), "DynamoDBSQLLibraryError: Lists are different, "
+                         "first mismatches:\n- key Decimal('5.4000000000000003552713678800500929355"
+                         "621337890625') is extra\n- key Decimal('5.4') is missing")
 
     def test_lists_deep_compare_should_be_equal_to(self):
         """First list should be equal to second list."""
@@ -203,6 +251,25 @@ class AssertionTests(unittest.TestCase):
             self.assertion.lists_deep_compare_should_be_equal(actual, expected, 'key')
         self.assertEqual(str(context.exception), '')
 
+    def test_lists_deep_comparison_should_report_mismatches(self):
+        """Lists deep comparison should report the first mismatches by key."""
+        actual = [{'key': 1, 'value': 'a'}, {'key': 2}, {'key': 3}]
+        expected = [{'key': 1, 'value': 'b'}, {'key': 4}, {'key': 5}]
+        with self.assertRaises(AssertionError) as context:
+            self.assertion.lists_deep_compare_should_be_equal(actual, expected, 'key', '2')
+        self.assertEqual(str(context.exception),
+                         "DynamoDBSQLLibraryError: Lists are different, first mismatches:\n"
+                         "- key 1 is changed: value: 'a' != 'b'\n- key 2 is extra")
+        self.assertion._builtin.should_be_equal.assert_not_called()
+
+    def test_lists_deep_diff(self):
+        """Lists deep diff should return all mismatch messages on zero max mismatches."""
+        actual = [{'id': '1', 'key': 'value'}, {'id': '2'}]
+        expected = [{'id': '1', 'key': 'other'}, {'id': '3'}]
+        self.assertEqual(self.assertion.lists_deep_diff(actual, expected, max_mismatches='0'),
+                         ["id '1' is changed: key: 'value' != 'other'", "id '2' is extra",
+                          "id '3' is missing"])
+
     def test_object_restore_binary(self):
         """Should restore boto3 Binary object successfully."""
         actual = {'py/boto3.dynamodb.types.Binary': 'value'}
@@ -239,3 +306,44 @@ class AssertionTests(unittest.TestCase):
         actual = {"py/collections.OrderedDict": [('key2', 2), ('key1', 1)]}
         expected = OrderedDict([('key2', 2), ('key1', 1)])
         self.assertEqual(self.assertion._restore(actual), expected)
+
+    def test_decimal_encoder_should_encode_restorable_objects(self):
+        """Should encode Decimal, Binary and set values restorable by JSON Loads."""
+        actual = {'id': Decimal('1'), 'price': Decimal('1.5'), 'tags': {'b', 'a'},
+                  'data': DynamoBinary(b'\xffvalue'), 'raw': Binary(b'raw')}
+        text = dumps(actual, cls=DecimalEncoder, sort_keys=True)
+        self.assertEqual(text, '{"data": {"py/boto3.dynamodb.types.Binary": "\\udcffvalue"}, '
+                         '"id": 1, "price": 1.5, "raw": {"py/boto3.dynamodb.types.Binary": '
+                         '"raw"}, "tags": {"py/set": ["a", "b"]}}')
+        self.assertEqual(self.assertion.json_loads(text),
+                         {'id': 1, 'price': Decimal('1.5'), 'tags': {'a', 'b'},
+                          'data': Binary(b'\xffvalue'), 'raw': Binary(b'raw')})
+        self.assertEqual(dumps(to_columns([{'id': 'a', 'n': Decimal(1)}]), cls=DecimalEncoder),
+                         '{"id": ["a"], "n": [1]}')
+
+    def test_lists_deep_compare_should_match_numbers_by_value(self):
+        """Lists deep compare should match int, float and Decimal numbers by value."""
+        actual = [{'id': Decimal('1'), 'price': Decimal('5.40')}, {'id': Decimal('2.0')}]
+        expected = [{'id': 2}, {'price': 5.4, 'id': 1.0}]
+        self.assertEqual(self.assertion.lists_deep_compare(actual, expected), 0)
+
+    def test_lists_deep_compare_should_match_binary_and_sets(self):
+        """Lists deep compare should match Binary by bytes and sets regardless of order."""
+        actual = [{'id': 'a', 'data': DynamoBinary(b'abc'), 'tags': {Decimal(2), Decimal(1)}}]
+        expected = self.assertion.json_loads(
+            '[{"tags":{"py/set":[1,2]},"id":"a","data":{"py/boto3.dynamodb.types.Binary":"abc"}}]')
+        self.assertEqual(self.assertion.lists_deep_compare(actual, expected), 0)
+
+    def test_lists_deep_compare_should_count_duplicates(self):
+        """Lists deep compare should compare the number of duplicated items."""
+        actual = [{'id': 'a'}, {'id': 'a'}, {'id': 'b'}]
+        expected = [{'id': 'a'}, {'id': 'b'}, {'id': 'b'}]
+        self.assertNotEqual(self.assertion.lists_deep_compare(actual, expected), 0)
+
+    @mock.patch('DynamoDBSQLLibrary.keywords.assertion.Assertion._cmp')
+    def test_lists_deep_compare_should_not_sort_equal_lists(self, mock_cmp):
+        """Lists deep compare should not fall back to sorting comparison for equal lists."""
+        actual = [{'id': 'a', 'nested': {'list': [1, 2]}}, {'id': 'b'}]
+        expected = [{'id': 'b'}, {'nested': {'list': [2, 1]}, 'id': 'a'}]
+        self.assertEqual(self.assertion.lists_deep_compare(actual, expected), 0)
+        mock_cmp.assert_not_called()
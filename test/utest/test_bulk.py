@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+import gzip
+import mock
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from dynamo3 import Binary
+from sys import path
+path.append('src')
+from DynamoDBSQLLibrary.keywords import Assertion, Bulk  # noqa: E402
+
+
+class BulkTests(unittest.TestCase):
+    """Bulk keyword test class."""
+
+    def setUp(self):
+        """Instantiate the bulk class."""
+        self.bulk = Bulk()
+        self.bulk._cache = mock.Mock()
+        self.bulk._logger = mock.Mock()
+        self.bulk.json_loads = Assertion().json_loads
+        self.connection = self.bulk._cache.switch.return_value.connection
+        self.connection.call.return_value = {}
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.label = 'MY-LABEL'
+        self.table = 'MY-TABLE'
+
+    def _write(self, name, text):
+        """Writes the given text into a temporary file, and returns its path."""
+        file_path = os.path.join(self.directory.name, name)
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(file_path, 'wt', encoding='utf-8') as stream:
+            stream.write(text)
+        return file_path
+
+    def _written(self):
+        """Returns all written put requests."""
+        return [request['PutRequest']['Item'] for call in self.connection.call.call_args_list
+                for request in call[1]['RequestItems'][self.table]]
+
+    def _read(self, file_path):
+        """Returns the lines of the given file."""
+        opener = gzip.open if file_path.endswith('.gz') else open
+        with opener(file_path, 'rt', encoding='utf-8') as stream:
+            return stream.read().splitlines()
+
+    def test_export_should_write_json_lines(self):
+        """Export should write scanned items as JSON Lines."""
+        session = self.bulk._cache.switch.return_value
+        session.execute.return_value = iter([
+            {'id': 'a', 'price': Decimal('1.5'), 'tags': {'y', 'x'}},
+            {'id': 'b', 'count': Decimal('2'), 'data': Binary(b'abc')}])
+        file_path = os.path.join(self.directory.name, 'items.jsonl')
+        count = self.bulk.export_dynamodb_table_to_file(self.label, self.table, file_path)
+        self.assertEqual(count, 2)
+        session.execute.assert_called_with(f'SCAN * FROM {self.table}')
+        self.assertEqual(self._read(file_path), [
+            '{"id":"a","price":1.5,"tags":{"py/set":["x","y"]}}',
+            '{"id":"b","count":2,"data":{"py/boto3.dynamodb.types.Binary":"abc"}}'])
+        self.assertTrue(self.bulk._logger.info.call_args[0][0]
+                        .startswith(f"Exported 2 items from '{self.table}' in "))
+
+    @mock.patch('DynamoDBSQLLibrary.keywords.bulk.ParallelScan')
+    def test_export_should_scan_segments_into_gzip_file(self, mock_scan):
+        """Export should scan segments in parallel into gzip file, and close the scan."""
+        items = mock.MagicMock()
+        items.__iter__.return_value = iter([{'id': 'a'}, {'id': 'b'}])
+        mock_scan.return_value = items
+        session = self.bulk._cache.switch.return_value
+        file_path = os.path.join(self.directory.name, 'items.jsonl.gz')
+        count = self.bulk.export_dynamodb_table_to_file(self.label, self.table, file_path,
+                                                        segments='4', page_size=10)
+        self.assertEqual(count, 2)
+        mock_scan.assert_called_with(session, f'SCAN * FROM {self.table}', 4, page_size=10)
+        items.close.assert_called_with()
+        self.assertEqual(self._read(file_path), ['{"id":"a"}', '{"id":"b"}'])
+
+    def test_load_should_read_exported_file(self):
+        """Load should write the items of an exported file."""
+        session = self.bulk._cache.switch.return_value
+        session.execute.return_value = iter([{'id': 'a', 'tags': {Decimal('1')},
+                                              'data': Binary(b'abc')}])
+        file_path = os.path.join(self.directory.name, 'items.jsonl')
+        self.bulk.export_dynamodb_table_to_file(self.label, self.table, file_path)
+        self.bulk.load_dynamodb_table_from_file(self.label, self.table, file_path)
+        self.assertEqual(self._written(), [{'id': {'S': 'a'}, 'tags': {'NS': ['1']},
+                                            'data': {'B': b'abc'}}])
+
+    def test_load_should_write_json_lines_in_batches(self):
+        """Load should write JSON Lines items in batch write sized requests."""
+        lines = ''.join(f'{{"id":"{index}","price":1.5}}\n' for index in range(60))
+        file_path = self._write('items.jsonl', lines + '\n')
+        count = self.bulk.load_dynamodb_table_from_file(self.label, self.table, file_path)
+        self.assertEqual(count, 60)
+        self.bulk._cache.switch.assert_called_with(self.label)
+        sizes = sorted(len(call[1]['RequestItems'][self.table])
+                       for call in self.connection.call.call_args_list)
+        self.assertEqual(sizes, [10, 25, 25])
+        self.assertIn({'id': {'S': '0'}, 'price': {'N': '1.5'}}, self._written())
+        self.assertTrue(self.bulk._logger.info.call_args[0][0]
+                        .startswith(f"Loaded 60 items into '{self.table}' in "))
+
+    def test_load_should_invalidate_cached_results(self):
+        """Load should remove the cached results of the table from all sessions."""
+        file_path = self._write('items.jsonl', '{"id":"1"}\n')
+        with mock.patch('DynamoDBSQLLibrary.keywords.bulk.ResultCache') as mock_cache:
+            self.bulk.load_dynamodb_table_from_file(self.label, self.table, file_path)
+        mock_cache.invalidate_all.assert_called_once_with(self.table)
+
+    def test_load_should_convert_json_objects(self):
+        """Load should restore JSON objects as JSON Loads does."""
+        file_path = self._write('items.jsonl', '{"id":"1","data":'
+                                '{"py/boto3.dynamodb.types.Binary":"abc"},'
+                                '"tags":{"py/set":["a"]}}\n')
+        self.bulk.load_dynamodb_table_from_file(self.label, self.table, file_path)
+        self.assertEqual(self._written(), [{'id': {'S': '1'}, 'data': {'B': b'abc'},
+                                            'tags': {'SS': ['a']}}])
+
+    def test_load_should_convert_gzip_csv_cells(self):
+        """Load should convert JSON cells of gzip CSV file, and skip empty cells."""
+        file_path = self._write('items.csv.gz', 'id,price,name,tags\n'
+                                '1,2.5,abc,"{""py/set"":[1]}"\n2,,"""3""",\n')
+        count = self.bulk.load_dynamodb_table_from_file(self.label, self.table, file_path)
+        self.assertEqual(count, 2)
+        self.assertEqual(self._written(), [
+            {'id': {'N': '1'}, 'price': {'N': '2.5'}, 'name': {'S': 'abc'}, 'tags': {'NS': ['1']}},
+            {'id': {'N': '2'}, 'name': {'S': '3'}}])
+
+    @mock.patch('DynamoDBSQLLibrary.keywords.bulk.sleep')
+    def test_load_should_retry_unprocessed_items(self, mock_sleep):
+        """Load should retry unprocessed items with backoff."""
+        unprocessed = {self.table: [{'PutRequest': {'Item': {'id': {'S': '1'}}}}]}
+        self.connection.call.side_effect = [{'UnprocessedItems': unprocessed},
+                                            {'UnprocessedItems': {}}]
+        file_path = self._write('items.jsonl', '{"id":"1"}\n{"id":"2"}\n')
+        count = self.bulk.load_dynamodb_table_from_file(self.label, self.table, file_path)
+        self.assertEqual(count, 2)
+        self.assertEqual(mock_sleep.call_count, 1)
+        self.connection.call.assert_called_with('batch_write_item', RequestItems=unprocessed,
+                                                ReturnConsumedCapacity='INDEXES')
+
+    @mock.patch('DynamoDBSQLLibrary.keywords.bulk.sleep')
+    def test_load_should_fail_on_exhausted_retries(self, mock_sleep):
+        """Load should fail when unprocessed items remain after all retries."""
+        unprocessed = {self.table: [{'PutRequest': {'Item': {'id': {'S': '1'}}}}]}
+        self.connection.call.return_value = {'UnprocessedItems': unprocessed}
+        file_path = self._write('items.jsonl', '{"id":"1"}\n')
+        with self.assertRaises(RuntimeError) as context:
+            self.bulk.load_dynamodb_table_from_file(self.label, self.table, file_path,
+                                                    retries=2)
+        self.assertEqual(str(context.exception), "DynamoDBSQLLibraryError: 1 items are not "
+                         f"written into '{self.table}' after 2 retries")
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_load_should_reject_unsupported_format(self):
+        """Load should fail on unsupported file format."""
+        file_path = self._write('items.json', '[]')
+        with self.assertRaises(ValueError) as context:
+            self.bulk.load_dynamodb_table_from_file(self.label, self.table, file_path)
+        self.assertEqual(str(context.exception),
+                         "DynamoDBSQLLibraryError: Unsupported file format 'json'")
+        self.connection.call.assert_not_called()
+
+    def _requests(self):
+        """Returns all written requests as (type, attributes) pairs sorted by key."""
+        requests = []
+        for call in self.connection.call.call_args_list:
+            for request in call[1]['RequestItems'][self.table]:
+                (kind, body), = request.items()
+                requests.append((kind, body.get('Item', body.get('Key'))))
+        return sorted(requests, key=lambda request: request[1]['id']['S'])
+
+    def _snapshot_session(self, *scans):
+        """Returns the mocked session scanning the given items in turn."""
+        session = self.bulk._cache.switch.return_value
+        session.execute.side_effect = [iter(items) for items in scans]
+        session.describe.return_value.primary_key_attributes = ('id',)
+        return session
+
+    def test_restore_should_write_differences_only(self):
+        """Restore should put changed and missing items, and delete extra items."""
+        session = self._snapshot_session(
+            [{'id': 'a', 'bar': Decimal('1')}, {'id': 'b', 'bar': Decimal('2')},
+             {'id': 'c', 'tags': {'x', 'y'}}],
+            [{'id': 'a', 'bar': Decimal('1')}, {'id': 'b', 'bar': Decimal('3')},
+             {'id': 'c', 'tags': {'y', 'x'}}, {'id': 'd'}])
+        snapshot = self.bulk.snapshot_dynamodb_table(self.label, self.table)
+        self.assertEqual(snapshot, 1)
+        # Snapshot items stay intact after the table has changed.
+        self.assertEqual(self.bulk._snapshots[1][1][1], {'id': 'b', 'bar': Decimal('2')})
+        with mock.patch('DynamoDBSQLLibrary.keywords.bulk.ResultCache') as mock_cache:
+            counts = self.bulk.restore_dynamodb_table(self.label, snapshot)
+        mock_cache.invalidate_all.assert_called_once_with(self.table)
+        session.describe.assert_called_once_with(self.table, require=True)
+        self.assertEqual(counts, {'deleted': 1, 'put': 1, 'unchanged': 2})
+        self.assertEqual(self._requests(), [
+            ('PutRequest', {'id': {'S': 'b'}, 'bar': {'N': '2'}}),
+            ('DeleteRequest', {'id': {'S': 'd'}})])
+
+    def test_restore_should_put_items_missing_from_table(self):
+        """Restore should put the snapshot items that are not in the table."""
+        self._snapshot_session([{'id': 'a'}, {'id': 'b'}], [])
+        snapshot = self.bulk.snapshot_dynamodb_table(self.label, self.table)
+        counts = self.bulk.restore_dynamodb_table(self.label, snapshot, table_name='OTHER')
+        self.assertEqual(counts, {'deleted': 0, 'put': 2, 'unchanged': 0})
+        self.assertEqual(self.connection.call.call_args[1]['RequestItems'],
+                         {'OTHER': [{'PutRequest': {'Item': {'id': {'S': 'a'}}}},
+                                    {'PutRequest': {'Item': {'id': {'S': 'b'}}}}]})
+
+    def test_restore_should_read_file_snapshots(self):
+        """Restore should read back the snapshots written into files."""
+        self._snapshot_session([{'id': 'a', 'bar': Decimal('1.5')}], [{'id': 'b'}])
+        file_path = os.path.join(self.directory.name, 'snapshot.jsonl.gz')
+        snapshot = self.bulk.snapshot_dynamodb_table(self.label, self.table, path=file_path)
+        self.assertEqual(self._read(file_path), ['{"id":"a","bar":1.5}'])
+        counts = self.bulk.restore_dynamodb_table(self.label, snapshot)
+        self.assertEqual(counts, {'deleted': 1, 'put': 1, 'unchanged': 0})
+        self.assertEqual(self._requests(), [
+            ('PutRequest', {'id': {'S': 'a'}, 'bar': {'N': '1.5'}}),
+            ('DeleteRequest', {'id': {'S': 'b'}})])
+
+    def test_restore_should_accept_file_path(self):
+        """Restore should accept a file path with a table name."""
+        self._snapshot_session([{'id': 'a', 'bar': Decimal('1')}])
+        file_path = self._write('items.csv', 'id,bar\n"""a""",1\n"""b""",2\n')
+        counts = self.bulk.restore_dynamodb_table(self.label, file_path, table_name=self.table)
+        self.assertEqual(counts, {'deleted': 0, 'put': 1, 'unchanged': 1})
+        self.assertEqual(self._written(), [{'id': {'S': 'b'}, 'bar': {'N': '2'}}])
+        with self.assertRaises(ValueError) as context:
+            self.bulk.restore_dynamodb_table(self.label, file_path)
+        self.assertEqual(str(context.exception), "DynamoDBSQLLibraryError: Restoring snapshot "
+                         f"file '{file_path}' requires table_name")
+
+    def test_delete_snapshot_should_release_snapshot(self):
+        """Delete snapshot should release the snapshot items, and fail on unknown handles."""
+        self._snapshot_session([{'id': 'a'}])
+        snapshot = self.bulk.snapshot_dynamodb_table(self.label, self.table)
+        self.bulk.delete_dynamodb_snapshot(str(snapshot))
+        self.assertEqual(self.bulk._snapshots, {})
+        for handle in (snapshot, 'foo'):
+            with self.assertRaises(ValueError) as context:
+                self.bulk.delete_dynamodb_snapshot(handle)
+            self.assertEqual(str(context.exception),
+                             f"DynamoDBSQLLibraryError: Non-existing snapshot '{handle}'")
+        with self.assertRaises(ValueError):
+            self.bulk.restore_dynamodb_table(self.label, snapshot)
+
+    def test_restore_should_fail_on_non_existing_snapshot(self):
+        """Restore should fail on unknown snapshot handles."""
+        with self.assertRaises(ValueError) as context:
+            self.bulk.restore_dynamodb_table(self.label, 7)
+        self.assertEqual(str(context.exception),
+                         "DynamoDBSQLLibraryError: Non-existing snapshot '7'")
+        self.connection.call.assert_not_called()
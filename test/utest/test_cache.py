@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+import mock
+import unittest
+from sys import path
+path.append('src')
+from DynamoDBSQLLibrary.cache import ResultCache, StatementCache  # noqa: E402
+
+
+class StatementCacheTests(unittest.TestCase):
+    """Parsed DQL statement cache test class."""
+
+    def setUp(self):
+        """Instantiate the statement cache class."""
+        self.cache = StatementCache(2)
+
+    def test_parse_should_reuse_parsed_statements(self):
+        """Parse should return the same parsed statements for the same commands."""
+        tree = self.cache.parse('SCAN * FROM foo')
+        self.assertIs(self.cache.parse('SCAN * FROM foo'), tree)
+        self.assertEqual(tree[0].action, 'SCAN')
+        self.assertEqual(self.cache.statistics(),
+                         {'hits': 1, 'max_size': 2, 'misses': 1, 'size': 1})
+
+    def test_parse_should_evict_least_recently_used(self):
+        """Parse should evict least recently used statements when cache is full."""
+        first = self.cache.parse('SCAN * FROM foo')
+        self.cache.parse('SCAN * FROM bar')
+        self.cache.parse('SCAN * FROM foo')
+        self.cache.parse('SCAN * FROM baz')
+        self.assertIs(self.cache.parse('SCAN * FROM foo'), first)
+        self.cache.parse('SCAN * FROM bar')
+        self.assertEqual(self.cache.statistics(),
+                         {'hits': 2, 'max_size': 2, 'misses': 4, 'size': 2})
+
+    def test_parse_should_not_cache_throttled_statements(self):
+        """Parse should not cache statements that are mutated on execution."""
+        commands = "SCAN * FROM foo THROTTLE (1, 1)"
+        self.assertIsNot(self.cache.parse(commands), self.cache.parse(commands))
+        analyze = "ANALYZE SCAN * FROM foo THROTTLE (1, 1)"
+        self.assertIsNot(self.cache.parse(analyze), self.cache.parse(analyze))
+        explain = "EXPLAIN SCAN * FROM foo THROTTLE (1, 1)"
+        self.assertIsNot(self.cache.parse(explain), self.cache.parse(explain))
+        self.assertEqual(self.cache.statistics()['size'], 0)
+
+    def test_resize_should_evict_and_disable(self):
+        """Resize should evict exceeding statements, and zero size should disable the cache."""
+        self.cache.parse('SCAN * FROM foo')
+        self.cache.parse('SCAN * FROM bar')
+        self.cache.resize(1)
+        self.assertEqual(self.cache.statistics()['size'], 1)
+        self.cache.resize(0)
+        self.assertEqual(self.cache.statistics()['size'], 0)
+        self.cache.parse('SCAN * FROM foo')
+        self.assertEqual(self.cache.statistics()['size'], 0)
+
+    def test_clear_should_reset_cache(self):
+        """Clear should remove parsed statements and reset the statistics."""
+        self.cache.parse('SCAN * FROM foo')
+        self.cache.parse('SCAN * FROM foo')
+        self.cache.clear()
+        self.assertEqual(self.cache.statistics(),
+                         {'hits': 0, 'max_size': 2, 'misses': 0, 'size': 0})
+
+
+class ResultCacheTests(unittest.TestCase):
+    """Query result cache test class."""
+
+    def setUp(self):
+        """Instantiate the result cache class."""
+        self.cache = ResultCache(4096)
+        self.factory = mock.Mock(side_effect=lambda: [{'id': 'a', 'tags': {'x'}}])
+
+    def test_fetch_should_return_copies_of_cached_results(self):
+        """Fetch should query once, and return copies that do not change the cached results."""
+        response = self.cache.fetch("SCAN * FROM foo", {'foo'}, self.factory)
+        response[0]['tags'].add('y')
+        response = self.cache.fetch("  SCAN *\n FROM   foo ", {'foo'}, self.factory)
+        self.assertEqual(response, [{'id': 'a', 'tags': {'x'}}])
+        response.clear()
+        self.assertEqual(self.cache.fetch("SCAN * FROM foo", {'foo'}, self.factory),
+                         [{'id': 'a', 'tags': {'x'}}])
+        self.assertEqual(self.factory.call_count, 1)
+        stats = self.cache.statistics()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (2, 1, 1))
+        self.assertGreater(stats['bytes'], 0)
+
+    def test_fetch_should_keep_white_space_of_quoted_strings(self):
+        """Fetch should not share results of commands that differ inside quoted strings."""
+        self.cache.fetch("SCAN * FROM foo WHERE id = 'a  b'", {'foo'}, self.factory)
+        self.cache.fetch("SCAN * FROM foo WHERE id = 'a b'", {'foo'}, self.factory)
+        self.cache.fetch('SCAN * FROM foo  WHERE id = "a b"', {'foo'}, self.factory)
+        self.cache.fetch('SCAN * FROM foo WHERE id = "a b"', {'foo'}, self.factory)
+        self.assertEqual(self.factory.call_count, 3)
+
+    def test_fetch_should_evict_least_recently_used(self):
+        """Fetch should evict least recently used results, and not cache too large results."""
+        size = ResultCache._sizeof(self.factory())
+        self.cache.resize(2 * size)
+        self.cache.fetch("SCAN * FROM foo", {'foo'}, self.factory)
+        self.cache.fetch("SCAN * FROM bar", {'bar'}, self.factory)
+        self.cache.fetch("SCAN * FROM foo", {'foo'}, self.factory)
+        self.cache.fetch("SCAN * FROM baz", {'baz'}, self.factory)
+        self.cache.fetch("SCAN * FROM foo", {'foo'}, self.factory)
+        self.assertEqual(self.factory.call_count, 4)
+        self.cache.resize(size - 1)
+        self.cache.fetch("SCAN * FROM foo", {'foo'}, self.factory)
+        self.assertEqual(self.cache.statistics(),
+                         {'bytes': 0, 'evictions': 3, 'hits': 2, 'invalidations': 0,
+                          'max_bytes': size - 1, 'misses': 4, 'size': 0})
+
+    def test_invalidate_should_remove_results_of_table(self):
+        """Invalidate should remove the results reading the table from all caches."""
+        other = ResultCache(4096)
+        self.cache.fetch("SCAN * FROM foo; SCAN * FROM bar", {'foo', 'bar'}, self.factory)
+        self.cache.fetch("SCAN * FROM baz", {'baz'}, self.factory)
+        other.fetch("SCAN * FROM bar", {'bar'}, self.factory)
+        ResultCache.invalidate_all('bar')
+        self.assertEqual(self.cache.statistics()['size'], 1)
+        self.assertEqual(other.statistics()['invalidations'], 1)
+        self.cache.invalidate()
+        self.assertEqual(self.cache.statistics()['size'], 0)
+
+    def test_fetch_should_not_cache_results_written_meanwhile(self):
+        """Fetch should not cache results of tables that were written while reading them."""
+
+        def factory():
+            ResultCache.invalidate_all(written)
+            return ['RESULT']
+
+        for written in ('foo', 'bar'):
+            self.cache.fetch("SCAN * FROM foo", {'foo'}, factory)
+        self.assertEqual(self.cache.fetch("SCAN * FROM foo", {'foo'}, self.factory), ['RESULT'])
+
+    def test_resize_should_disable_cache(self):
+        """Zero size should remove all results and disable the cache."""
+        self.cache.fetch("SCAN * FROM foo", {'foo'}, self.factory)
+        self.assertTrue(self.cache.enabled)
+        self.cache.resize(0)
+        self.assertFalse(self.cache.enabled)
+        self.assertEqual(self.cache.statistics()['size'], 0)
+        self.assertFalse(ResultCache().enabled)
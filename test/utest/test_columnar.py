@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+import mock
+import numpy
+import unittest
+from array import array
+from decimal import Decimal
+from sys import path
+path.append('src')
+from DynamoDBSQLLibrary.columnar import column_duplicates, column_outside  # noqa: E402
+from DynamoDBSQLLibrary.columnar import column_statistics, is_numeric  # noqa: E402
+from DynamoDBSQLLibrary.columnar import present_values, to_columns  # noqa: E402
+
+
+class ColumnarTests(unittest.TestCase):
+    """Columnar results test class."""
+
+    def setUp(self):
+        """Simulate DynamoDB items with missing and mixed attributes."""
+        self.items = [{'id': 'a', 'count': Decimal(3), 'price': Decimal('1.5'), 'tags': {'x'}},
+                      {'id': 'b', 'count': Decimal(1), 'price': Decimal('2')},
+                      {'id': 'c', 'count': Decimal(3), 'name': 'first', 'tags': {'y'}}]
+
+    def test_to_columns_should_use_numpy_arrays(self):
+        """Numbers and strings should be NumPy columns, with missing values in item order."""
+        columns = to_columns(iter(self.items))
+        self.assertEqual(list(columns), ['id', 'count', 'price', 'tags', 'name'])
+        self.assertEqual(columns['id'].dtype.kind, 'U')
+        self.assertEqual(columns['id'].tolist(), ['a', 'b', 'c'])
+        self.assertEqual(columns['count'].dtype, numpy.int64)
+        self.assertEqual(columns['count'].tolist(), [3, 1, 3])
+        self.assertEqual(columns['price'].dtype, numpy.float64)
+        self.assertEqual(columns['price'][:2].tolist(), [1.5, 2.0])
+        self.assertTrue(numpy.isnan(columns['price'][2]))
+        self.assertEqual(columns['tags'], [{'x'}, None, {'y'}])
+        self.assertEqual(columns['name'].tolist(), [None, None, 'first'])
+        self.assertTrue(is_numeric(columns['count']))
+        self.assertFalse(is_numeric(columns['id']))
+        self.assertEqual(to_columns([]), {})
+
+    def test_to_columns_should_keep_large_and_special_numbers(self):
+        """Numbers out of int64 range or non-integral should be float64 columns."""
+        columns = to_columns([{'a': Decimal(2 ** 64), 'b': float('inf'), 'c': True, 'd': 1},
+                              {'a': Decimal(1), 'b': 1, 'c': False, 'd': 2.5}])
+        self.assertEqual(columns['a'].dtype, numpy.float64)
+        self.assertEqual(columns['b'].tolist(), [float('inf'), 1.0])
+        self.assertEqual(columns['c'], [True, False])
+        self.assertEqual(columns['d'].tolist(), [1.0, 2.5])
+
+    def test_to_columns_should_keep_long_strings_as_objects(self):
+        """Long strings should be object columns instead of fixed width string columns."""
+        items = [{'id': str(index)} for index in range(1000)] + [{'id': 'x' * 2000}]
+        column = to_columns(items)['id']
+        self.assertEqual(column.dtype, object)
+        self.assertLess(column.nbytes, 10000)
+        self.assertEqual(column_duplicates(column), (0, None))
+        self.assertEqual(column[-1], 'x' * 2000)
+
+    @mock.patch('DynamoDBSQLLibrary.columnar._numpy', lambda: None)
+    def test_to_columns_should_use_arrays_without_numpy(self):
+        """Numbers should be array columns and strings tuples without NumPy."""
+        columns = to_columns(self.items)
+        self.assertEqual(columns['id'], ('a', 'b', 'c'))
+        self.assertEqual(columns['count'], array('q', [3, 1, 3]))
+        self.assertEqual(columns['price'].typecode, 'd')
+        self.assertEqual(columns['name'], (None, None, 'first'))
+        self.assertTrue(is_numeric(columns['price']))
+        self.assertFalse(is_numeric(columns['name']))
+        self.assertEqual(present_values(columns['price']), [1.5, 2.0])
+
+    def test_statistics_should_ignore_missing_values(self):
+        """Statistics should be computed over the present values only."""
+        columns = to_columns(self.items)
+        self.assertEqual(column_statistics(columns['price']),
+                         {'count': 2, 'missing': 1, 'min': 1.5, 'max': 2.0, 'sum': 3.5,
+                          'mean': 1.75})
+        self.assertEqual(column_statistics(columns['name']),
+                         {'count': 1, 'missing': 2, 'min': 'first', 'max': 'first'})
+        self.assertEqual(column_statistics(columns['id']),
+                         {'count': 3, 'missing': 0, 'min': 'a', 'max': 'c'})
+        self.assertEqual(column_statistics(numpy.array([numpy.nan])),
+                         {'count': 0, 'missing': 1, 'min': None, 'max': None, 'sum': None})
+
+    @mock.patch('DynamoDBSQLLibrary.columnar._numpy', lambda: None)
+    def test_statistics_should_be_computed_without_numpy(self):
+        """Statistics should be computed over array and tuple columns without NumPy."""
+        columns = to_columns(self.items)
+        self.assertEqual(column_statistics(columns['count']),
+                         {'count': 3, 'missing': 0, 'min': 1, 'max': 3, 'sum': 7,
+                          'mean': 7 / 3})
+        self.assertEqual(column_statistics(columns['name']),
+                         {'count': 1, 'missing': 2, 'min': 'first', 'max': 'first'})
+
+    def test_outside_should_return_count_and_first_row(self):
+        """Outside should count the present values outside of the inclusive range."""
+        columns = to_columns(self.items)
+        self.assertEqual(column_outside(columns['count'], 2, 3), (1, 1))
+        self.assertEqual(column_outside(columns['count'], maximum=2), (2, 0))
+        self.assertEqual(column_outside(columns['price'], minimum=1.5), (0, None))
+        self.assertEqual(column_outside(columns['id'], 'b'), (1, 0))
+        self.assertEqual(column_outside(columns['name'], 'g'), (1, 2))
+        with mock.patch('DynamoDBSQLLibrary.columnar._numpy', lambda: None):
+            self.assertEqual(column_outside(to_columns(self.items)['price'], 1.6), (1, 0))
+
+    def test_duplicates_should_return_count_and_first_value(self):
+        """Duplicates should count the repeated present values."""
+        columns = to_columns(self.items + [{'count': Decimal(1)}])
+        self.assertEqual(column_duplicates(columns['count']), (2, 1))
+        self.assertEqual(column_duplicates(columns['id']), (0, None))
+        self.assertEqual(column_duplicates(['b', None, 'b', 'a', 'a', None]), (2, 'a'))
+        with mock.patch('DynamoDBSQLLibrary.columnar._numpy', lambda: None):
+            self.assertEqual(column_duplicates(to_columns(self.items)['count']), (1, 3))
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+import os
+import unittest
+from boto3.dynamodb.types import Binary
+from collections import OrderedDict
+from decimal import Decimal
+from dynamo3 import Binary as DynamoBinary
+from sys import path
+from time import monotonic
+path.append('src')
+from DynamoDBSQLLibrary.compare import canonical, diff_by_key, diff_streams  # noqa: E402
+from DynamoDBSQLLibrary.compare import format_mismatch, MISSING, multiset_equal  # noqa: E402
+from DynamoDBSQLLibrary.compare import StreamDiff  # noqa: E402
+
+
+class CompareTests(unittest.TestCase):
+    """Canonical comparison test class."""
+
+    def assertSameCanonical(self, value1, value2):
+        """Asserts both values have the same canonical form."""
+        self.assertEqual(canonical(value1), canonical(value2))
+
+    def assertNotSameCanonical(self, value1, value2):
+        """Asserts both values have different canonical forms."""
+        self.assertNotEqual(canonical(value1), canonical(value2))
+
+    def test_canonical_should_match_numbers_by_value(self):
+        """Canonical form should be the same for numerically equal int, float and Decimal."""
+        self.assertSameCanonical(1, Decimal('1.000'))
+        self.assertSameCanonical(1.0, Decimal('1'))
+        self.assertSameCanonical(5.4, Decimal('5.40'))
+        self.assertSameCanonical(10 ** 30, Decimal('1E+30'))
+        self.assertSameCanonical(Decimal('0.1'), Decimal('1E-1'))
+        self.assertNotSameCanonical(5.4, Decimal(5.4))
+        self.assertNotSameCanonical(1, '1')
+        self.assertNotSameCanonical(1, True)
+
+    def test_canonical_should_match_binary_by_bytes(self):
+        """Canonical form should be the same for boto3 Binary, dynamo3 Binary and bytes."""
+        self.assertSameCanonical(Binary(b'abc'), DynamoBinary(b'abc'))
+        self.assertSameCanonical(Binary(b'abc'), b'abc')
+        self.assertNotSameCanonical(Binary(b'abc'), 'abc')
+
+    def test_canonical_should_ignore_map_and_collection_order(self):
+        """Canonical form should ignore map keys, nested lists and sets order, but not tuples order."""
+        self.assertSameCanonical({'a': 1, 'b': {'c': [1, 2]}},
+                                 OrderedDict([('b', {'c': [2, 1]}), ('a', 1)]))
+        self.assertSameCanonical({1, 2, 3}, frozenset({3, 2, 1}))
+        self.assertNotSameCanonical({1, 2}, [1, 2])
+        self.assertNotSameCanonical((1, 2), (2, 1))
+        self.assertNotSameCanonical({'a': 1}, {'a': 1, 'b': None})
+        self.assertSameCanonical({1: 'a', 'b': 2.0}, {'b': 2, 1: 'a'})
+        self.assertNotSameCanonical({1: 'a'}, {'1': 'a'})
+        self.assertNotSameCanonical(['ab', 'c'], ['a', 'bc'])
+
+    def test_multiset_equal(self):
+        """Multiset equal should compare the items and their counts regardless of order."""
+        self.assertTrue(multiset_equal([{'id': 1}, {'id': 2}], [{'id': 2.0}, {'id': 1}]))
+        self.assertTrue(multiset_equal([], []))
+        self.assertFalse(multiset_equal([{'id': 1}, {'id': 1}], [{'id': 1}]))
+        self.assertFalse(multiset_equal([{'id': 1}, {'id': 1}], [{'id': 1}, {'id': 2}]))
+
+    def test_canonical_should_ignore_mixed_list_order(self):
+        """Canonical form should ignore order of lists with mixed or unorderable items."""
+        self.assertSameCanonical([1, 'a', None], [None, 'a', 1])
+        self.assertSameCanonical([{'a': 1}, {'b': 2}], [{'b': 2}, {'a': 1}])
+        self.assertSameCanonical([1, Decimal('2')], [2.0, 1])
+        self.assertNotSameCanonical([1, 1, 2], [1, 2, 2])
+
+    def test_diff_by_key_should_report_mismatches(self):
+        """Diff by key should report extra, missing and changed items."""
+        items1 = [{'id': 1, 'a': 1}, {'id': 2, 'a': 2}, {'id': 3, 'a': 3}]
+        items2 = [{'id': 4}, {'id': 3, 'a': 3.0}, {'id': Decimal(2), 'a': 5, 'b': 1}]
+        self.assertEqual(diff_by_key(items1, items2, 'id'),
+                         [('extra', 1, []), ('changed', 2, [('a', 2, 5), ('b', MISSING, 1)]),
+                          ('missing', 4, [])])
+
+    def test_diff_by_key_should_match_items_without_unique_keys(self):
+        """Diff by key should match whole items when keys are repeated or absent."""
+        items1 = [{'id': 1, 'a': 1}, {'id': 1, 'a': 2}, {'id': 1, 'a': 3}]
+        items2 = [{'id': 1, 'a': 2}, {'id': 1, 'a': 1}]
+        self.assertEqual(diff_by_key(items1, items2, 'id'), [('extra', items1[2], None)])
+        self.assertEqual(diff_by_key([{'a': 1}, {'a': 2}], [{'a': 2}, {'a': 1}, {'a': 1}], 'id'),
+                         [('missing', {'a': 1}, None)])
+        self.assertEqual(diff_by_key(['a', 'b'], ['b', 'c'], 'id'),
+                         [('extra', 'a', []), ('missing', 'c', [])])
+
+    def test_diff_by_key_should_not_join_absent_keys_quadratically(self):
+        """Diff by key should match items without join key in linear time."""
+        items1 = [{'key': index, 'a': index} for index in range(20000)]
+        items2 = [{'key': index, 'a': index + 1} for index in range(20000)]
+        started = monotonic()
+        mismatches = diff_by_key(items1, items2, 'id', 0)
+        self.assertLess(monotonic() - started, 5)
+        self.assertEqual(len(mismatches), 40000)
+        self.assertEqual(format_mismatch(mismatches[0], 'id'), "item {'key': 0, 'a': 0} is extra")
+
+    def test_diff_by_key_should_stop_after_max_mismatches(self):
+        """Diff by key should stop after max mismatches, or report all on zero."""
+        items1 = [{'id': index} for index in range(100)]
+        self.assertEqual(len(diff_by_key(items1, [], 'id', 3)), 3)
+        self.assertEqual(len(diff_by_key([], items1, 'id', 3)), 3)
+        self.assertEqual(len(diff_by_key(items1, [], 'id', 0)), 100)
+
+    def test_format_mismatch(self):
+        """Format mismatch should return human readable message."""
+        self.assertEqual(format_mismatch(('missing', '1', []), 'id'), "id '1' is missing")
+        self.assertEqual(format_mismatch(('changed', 2, [('a', 2, 5), ('b', MISSING, 1)]), 'id'),
+                         "id 2 is changed: a: 2 != 5, b: <missing> != 1")
+
+    def test_diff_streams_should_match_in_memory(self):
+        """Diff streams should match unordered items of different length iterables."""
+        items = [{'id': index % 7} for index in range(50)]
+        self.assertEqual(diff_streams(iter(items), reversed(items)), [])
+        self.assertEqual(diff_streams(items, items[1:] + [{'id': 9}]),
+                         [('extra', {'id': 0}, 1), ('missing', {'id': 9}, 1)])
+
+    def test_diff_streams_should_spill_unmatched_items(self):
+        """Diff streams should spill unmatched items and stop after max mismatches."""
+        items = [{'id': index} for index in range(500)]
+        self.assertEqual(diff_streams(items, reversed(items), max_items=10), [])
+        mismatches = diff_streams(items, items[:-100] + [{'id': 'x'}], 0, 10)
+        expected = [str(('extra', item, 1)) for item in items[-100:]]
+        expected.append(str(('missing', {'id': 'x'}, 1)))
+        self.assertEqual(sorted(str(mismatch) for mismatch in mismatches), sorted(expected))
+        self.assertEqual(len(diff_streams(items, [], 3, 10)), 3)
+
+    def test_stream_diff_should_remove_spilled_files(self):
+        """Stream diff should remove its spilled partition files on close."""
+        with StreamDiff(max_items=1, partitions=2) as diff:
+            diff.add('a', 1)
+            diff.add('b', 1)
+            diff.add('a', -1)
+            directory = diff._directory.name
+            self.assertEqual(list(diff.differences()), [('b', 1)])
+        self.assertIsNone(diff._directory)
+        self.assertFalse(os.path.exists(directory))
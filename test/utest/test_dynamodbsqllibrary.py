@@ -21,11 +21,15 @@
 Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
 """
 
+import mock
+import os
+import subprocess
 import unittest
-from sys import path
+from sys import executable, path
 path.append('src')
 from DynamoDBSQLLibrary import DynamoDBSQLLibrary  # noqa: E402
-from DynamoDBSQLLibrary.keywords import Assertion, Query, SessionManager  # noqa: E402
+from DynamoDBSQLLibrary.cache import STATEMENT_CACHE_SIZE, STATEMENTS  # noqa: E402
+from DynamoDBSQLLibrary.keywords import Assertion, Bulk, Query, SessionManager  # noqa: E402
 
 
 class DynamoDBSQLLibraryTests(unittest.TestCase):
@@ -35,5 +39,82 @@ class DynamoDBSQLLibraryTests(unittest.TestCase):
         """DynamoDB SQL library instance should inherit keyword instances."""
         library = DynamoDBSQLLibrary()
         self.assertIsInstance(library, Assertion)
+        self.assertIsInstance(library, Bulk)
         self.assertIsInstance(library, Query)
         self.assertIsInstance(library, SessionManager)
+
+    def test_import_should_defer_heavy_dependencies(self):
+        """Importing the library should not import boto3, dql, dynamo3 and NumPy."""
+        script = ("import sys, DynamoDBSQLLibrary; "
+                  "print(' '.join({name.split('.')[0] for name in sys.modules}))")
+        output = subprocess.check_output([executable, '-c', script], universal_newlines=True,
+                                         env=dict(os.environ, PYTHONPATH='src'))
+        heavy = {'boto3', 'botocore', 'dql', 'dynamo3', 'numpy', 'pyparsing'}
+        self.assertEqual(heavy & set(output.split()), set())
+
+    def test_should_accept_lazy_argument(self):
+        """DynamoDB SQL library instance should accept lazy sessions argument."""
+        self.assertFalse(DynamoDBSQLLibrary()._lazy)
+        self.assertTrue(DynamoDBSQLLibrary(lazy='True')._lazy)
+
+    def test_should_accept_statement_cache_size_argument(self):
+        """DynamoDB SQL library instance should resize the parsed statement cache."""
+        DynamoDBSQLLibrary(statement_cache_size='10')
+        self.assertEqual(STATEMENTS.statistics()['max_size'], 10)
+        DynamoDBSQLLibrary()
+        self.assertEqual(STATEMENTS.statistics()['max_size'], STATEMENT_CACHE_SIZE)
+
+    @mock.patch('DynamoDBSQLLibrary.METRICS')
+    def test_should_write_metrics_on_close(self, mock_metrics):
+        """DynamoDB SQL library instance should write the metrics file when closed."""
+        library = DynamoDBSQLLibrary(metrics_file='metrics.json')
+        self.assertIs(library.ROBOT_LIBRARY_LISTENER, library)
+        self.assertTrue(mock_metrics.enabled)
+        library._close()
+        mock_metrics.write.assert_called_once_with('metrics.json')
+
+    def test_should_stop_background_queries_on_close(self):
+        """DynamoDB SQL library instance should stop the background queries when closed."""
+        library = DynamoDBSQLLibrary(metrics_file=None)
+        library._cache = mock.Mock()
+        library._execute = mock.Mock(return_value='RESPONSE')
+        library.start_dynamodb_query('MY-LABEL', 'MY-COMMAND')
+        executor = library._executor
+        library._close()
+        self.assertIsNone(library._executor)
+        self.assertEqual(library._queries, {})
+        with self.assertRaises(RuntimeError):
+            executor.submit(print)
+
+    def test_should_close_cursors_on_close(self):
+        """DynamoDB SQL library instance should close the opened cursors when closed."""
+        library = DynamoDBSQLLibrary()
+        cursor = mock.Mock()
+        library._cursors[1] = cursor
+        library._close()
+        cursor.close.assert_called_once_with()
+        self.assertEqual(library._cursors, {})
+
+    def test_should_release_snapshots_on_close(self):
+        """DynamoDB SQL library instance should release the in-memory snapshots when closed."""
+        library = DynamoDBSQLLibrary()
+        library._snapshots[1] = ('foo', [{'id': 'a'}])
+        library._close()
+        self.assertEqual(library._snapshots, {})
+
+    @mock.patch('DynamoDBSQLLibrary.METRICS')
+    def test_should_disable_metrics(self, mock_metrics):
+        """DynamoDB SQL library instance should not record metrics without metrics file."""
+        library = DynamoDBSQLLibrary(metrics_file='NONE')
+        self.assertFalse(mock_metrics.enabled)
+        library._close()
+        mock_metrics.write.assert_not_called()
+
+    @mock.patch('DynamoDBSQLLibrary.METRICS')
+    def test_should_disable_metrics_by_default(self, mock_metrics):
+        """DynamoDB SQL library instance should not write a metrics file unless requested."""
+        library = DynamoDBSQLLibrary()
+        self.assertIsNone(library._metrics_file)
+        self.assertFalse(mock_metrics.enabled)
+        library._close()
+        mock_metrics.write.assert_not_called()
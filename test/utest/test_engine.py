@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+import contextlib
+import mock
+import unittest
+from botocore.exceptions import ClientError
+from threading import Thread
+from dql import Engine as DQLEngine
+from dql.exceptions import EngineRuntimeError
+from dynamo3 import DynamoDBConnection
+from dynamo3.result import Capacity, ConsumedCapacity
+from sys import path
+path.append('src')
+from DynamoDBSQLLibrary.cache import STATEMENTS  # noqa: E402
+from DynamoDBSQLLibrary.engine import Engine, SegmentedConnection  # noqa: E402
+from DynamoDBSQLLibrary.throttle import Throttle  # noqa: E402
+
+
+class EngineTests(unittest.TestCase):
+    """DQL execution engine test class."""
+
+    def setUp(self):
+        """Instantiate the engine class."""
+        STATEMENTS.clear()
+        self.engine = Engine(DynamoDBConnection(mock.Mock()))
+        self.engine._run = mock.Mock(return_value='RESULT')
+
+    def test_execute_should_share_parsed_statements(self):
+        """Execute should share parsed statements across engines."""
+        other = Engine(DynamoDBConnection(mock.Mock()))
+        other._run = mock.Mock(return_value='OTHER')
+        self.assertEqual(self.engine.execute('SCAN * FROM foo'), 'RESULT')
+        self.assertEqual(other.execute('SCAN * FROM foo'), 'OTHER')
+        self.assertIs(self.engine._run.call_args[0][0], other._run.call_args[0][0])
+        self.assertEqual(STATEMENTS.statistics()['hits'], 1)
+
+    def test_execute_should_run_every_statement(self):
+        """Execute should run every statement, and return the last result."""
+        self.engine._run.side_effect = ['FIRST', 'SECOND']
+        self.assertEqual(self.engine.execute('SCAN * FROM foo; SCAN * FROM bar'), 'SECOND')
+        self.assertEqual(self.engine._run.call_count, 2)
+
+    def test_execute_state_should_be_kept_per_thread(self):
+        """Statement state should not be shared by threads executing on one engine."""
+        self.engine._analyzing = True
+        self.engine.consumed_capacities.append('CAPACITY')
+        state = {}
+
+        def run():
+            state['before'] = (self.engine._analyzing, list(self.engine.consumed_capacities))
+            self.engine.execute('SCAN * FROM foo')
+            state['after'] = (self.engine._analyzing, self.engine.consumed_capacities)
+
+        thread = Thread(target=run)
+        thread.start()
+        thread.join()
+        self.assertEqual(state, {'before': (False, []), 'after': (False, [])})
+        self.assertTrue(self.engine._analyzing)
+        self.assertEqual(self.engine.consumed_capacities, ['CAPACITY'])
+        self.assertIsNone(self.engine._query_rate_limit)
+
+
+class EngineMetadataTests(unittest.TestCase):
+    """DQL execution engine table metadata cache test class."""
+
+    def setUp(self):
+        """Instantiate the engine class with simulated table descriptions."""
+        self.engine = Engine(DynamoDBConnection(mock.Mock()), metadata_ttl=60)
+        self.tables = {'foo': 'FOO'}
+        patcher = mock.patch.object(DQLEngine, 'describe', autospec=True,
+                                    side_effect=self._describe)
+        self.describe = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _describe(self, engine, tablename, refresh=False, metrics=False):
+        """Simulate dql describe that caches existing table descriptions."""
+        table = self.tables.get(tablename)
+        if table is not None:
+            engine.cached_descriptions[tablename] = table
+        return table
+
+    def test_describe_should_reuse_metadata_within_ttl(self):
+        """Describe should reuse table metadata within TTL even when refresh is requested."""
+        self.assertEqual(self.engine.describe('foo', refresh=True), 'FOO')
+        self.tables['foo'] = 'NEW-FOO'
+        self.assertEqual(self.engine.describe('foo', refresh=True), 'FOO')
+        self.assertEqual(self.engine.describe('foo'), 'FOO')
+        self.assertEqual(self.describe.call_count, 1)
+
+    def test_describe_should_refresh_expired_metadata(self):
+        """Describe should refresh table metadata after TTL even when refresh is not requested."""
+        with mock.patch('DynamoDBSQLLibrary.engine.monotonic', return_value=0):
+            self.engine.describe('foo')
+        self.tables['foo'] = 'NEW-FOO'
+        with mock.patch('DynamoDBSQLLibrary.engine.monotonic', return_value=61):
+            self.assertEqual(self.engine.describe('foo'), 'NEW-FOO')
+        self.describe.assert_called_with(self.engine, 'foo', True, False)
+
+    def test_describe_should_reuse_missing_table_within_ttl(self):
+        """Describe should remember missing table within TTL, and raise error if required."""
+        self.assertIsNone(self.engine.describe('bar'))
+        with self.assertRaises(EngineRuntimeError) as context:
+            self.engine.describe('bar', refresh=True, require=True)
+        self.assertEqual(str(context.exception), "Table 'bar' not found")
+        self.assertEqual(self.describe.call_count, 1)
+
+    def test_describe_should_not_reuse_metadata_without_ttl(self):
+        """Describe should keep dql behavior when TTL is disabled."""
+        self.engine.metadata_ttl = 0
+        self.engine.describe('foo', refresh=True)
+        self.engine.describe('foo', refresh=True)
+        self.engine.describe('foo')
+        self.assertEqual(self.describe.call_count, 3)
+        self.describe.assert_called_with(self.engine, 'foo', False, False)
+        with self.assertRaises(EngineRuntimeError):
+            self.engine.describe('bar', require=True)
+
+    @mock.patch.object(DQLEngine, '_run')
+    def test_run_should_invalidate_metadata_on_ddl(self, mock_run):
+        """Run should invalidate the table metadata on DDL statements only."""
+        self.engine.describe('foo')
+        self.engine._run(mock.Mock(action='SCAN', table='foo'))
+        self.assertIn('foo', self.engine.cached_descriptions)
+        for action in ('ALTER', 'CREATE', 'DROP'):
+            self.engine.describe('foo')
+            self.engine._run(mock.Mock(action=action, table='foo'))
+            self.assertNotIn('foo', self.engine.cached_descriptions)
+        self.assertEqual(mock_run.call_count, 4)
+        self.assertEqual(self.describe.call_count, 3)
+
+    @mock.patch.object(DQLEngine, '_run')
+    def test_run_should_invalidate_results_on_write(self, mock_run):
+        """Run should invalidate the cached results of all sessions on write statements only."""
+        other = Engine(DynamoDBConnection(mock.Mock()))
+        other.results.resize(4096)
+        for action in ('SCAN', 'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'LOAD', 'DROP'):
+            other.results.fetch('SCAN * FROM foo', {'foo'}, lambda: ['FOO'])
+            mock_run.side_effect = None if action != 'DELETE' else RuntimeError('MY-ERROR')
+            with contextlib.suppress(RuntimeError):
+                self.engine._run(mock.Mock(action=action, table='foo'))
+        self.assertEqual(other.results.statistics()['invalidations'], 5)
+
+    def test_invalidate_should_remove_all_metadata(self):
+        """Invalidate without table name should remove all table metadata."""
+        self.tables['bar'] = 'BAR'
+        self.engine.describe('foo')
+        self.engine.describe('bar')
+        self.engine.invalidate()
+        self.assertEqual(self.engine.cached_descriptions, {})
+        self.engine.describe('foo')
+        self.assertEqual(self.describe.call_count, 3)
+
+
+class EngineCapacityTests(unittest.TestCase):
+    """DQL execution engine consumed capacity test class."""
+
+    def setUp(self):
+        """Instantiate the engine class with a simulated client."""
+        self.client = mock.Mock()
+        self.engine = Engine(DynamoDBConnection(self.client))
+
+    def test_should_add_up_consumed_capacity(self):
+        """Engine should add up the consumed capacity of its calls per table and index."""
+        self.client.query.return_value = {'ConsumedCapacity': {
+            'TableName': 'foo', 'CapacityUnits': 3, 'Table': {'CapacityUnits': 1},
+            'GlobalSecondaryIndexes': {'by-name': {'CapacityUnits': 2}}}}
+        self.engine.connection.call('query', TableName='foo', ReturnConsumedCapacity='INDEXES')
+        self.engine.connection.call('query', TableName='foo', ReturnConsumedCapacity='INDEXES')
+        self.assertEqual(self.engine.capacity.totals(),
+                         {'foo': {'read': 6.0, 'write': 0.0},
+                          'foo:by-name': {'read': 4.0, 'write': 0.0}})
+        self.engine.capacity.reset()
+        self.assertEqual(self.engine.capacity.totals(), {})
+
+    def test_should_add_up_local_index_write_capacity(self):
+        """Engine should add up the write capacity of local indexes."""
+        capacity = ConsumedCapacity('foo', Capacity(0, 2),
+                                    local_index_capacity={'by-date': Capacity(0, 1)})
+        self.engine._on_capacity_data(self.engine.connection, 'put_item', {}, {}, capacity)
+        self.assertEqual(self.engine.capacity.totals(),
+                         {'foo': {'read': 0.0, 'write': 2.0},
+                          'foo:by-date': {'read': 0.0, 'write': 1.0}})
+
+
+class SegmentedConnectionTests(unittest.TestCase):
+    """Parallel scan segment connection test class."""
+
+    def test_segmented_connection_should_scan_segment(self):
+        """Segmented connection should add the segment to scan requests."""
+        connection = DynamoDBConnection(mock.Mock())
+        connection.client.scan.return_value = {}
+        segmented = SegmentedConnection(connection, 1, 4, 10)
+        segmented.call('scan', TableName='foobar')
+        connection.client.scan.assert_called_with(TableName='foobar', Segment=1,
+                                                  TotalSegments=4, Limit=10)
+        with self.assertRaises(ValueError) as context:
+            segmented.call('query', TableName='foobar')
+        self.assertEqual("DynamoDBSQLLibraryError: Parallel scan commands can not "
+                         "be resolved to a query", str(context.exception))
+
+    @mock.patch('dynamo3.connection.time.sleep')
+    def test_segmented_connection_should_keep_throttle_retries(self, mock_sleep):
+        """Segmented connection should back off the throttle on throughput retries."""
+        connection = DynamoDBConnection(mock.Mock())
+        throttle = Throttle(read_capacity=10)
+        throttle.attach(connection)
+        error = ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException',
+                                       'Message': 'Throttled'},
+                             'ResponseMetadata': {'HTTPStatusCode': 400}}, 'Scan')
+        connection.client.scan.side_effect = [error, {}]
+        segmented = SegmentedConnection(connection, 0, 2)
+        with mock.patch.object(throttle, 'on_retry', wraps=throttle.on_retry) as on_retry:
+            segmented.call('scan', TableName='foobar')
+        self.assertEqual(on_retry.call_count, 1)
+        # backed off to half of the rate, and recovered by 5% on the successful retry
+        self.assertEqual(throttle.read.rate, 5.5)
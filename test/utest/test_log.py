@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+import json
+import mock
+import numpy
+import os
+import tempfile
+import unittest
+from array import array
+from decimal import Decimal
+from robot.libraries.BuiltIn import RobotNotRunningError
+from sys import path
+path.append('src')
+from DynamoDBSQLLibrary.log import ResponseLog  # noqa: E402
+
+
+class ResponseLogTests(unittest.TestCase):
+    """DynamoDB response log policy test class."""
+
+    def setUp(self):
+        """Instantiate the response log class."""
+        self.log = ResponseLog(max_items=2, max_bytes=80)
+        patcher = mock.patch('DynamoDBSQLLibrary.log.BuiltIn')
+        self.builtin = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def test_should_be_enabled_on_debug_level(self):
+        """Should be enabled on debug and trace log levels only."""
+        for level, enabled in (('DEBUG', True), ('TRACE:INFO', True), ('INFO', False),
+                               ('WARN', False)):
+            self.builtin.get_variable_value.return_value = level
+            self.assertEqual(self.log.is_enabled(), enabled)
+
+    def test_should_be_enabled_without_robot(self):
+        """Should be enabled when Robot Framework is not running."""
+        self.builtin.get_variable_value.side_effect = RobotNotRunningError()
+        self.assertTrue(self.log.is_enabled())
+
+    def test_format_should_not_truncate_small_response(self):
+        """Format should return the full text of responses within the budget."""
+        self.assertEqual(self.log.format([{'id': 'a'}, {'id': 'b'}]),
+                         ("[{'id': 'a'}, {'id': 'b'}]", False))
+        self.assertEqual(self.log.format('Updated 2 items'), ('Updated 2 items', False))
+
+    def test_format_should_truncate_items(self):
+        """Format should truncate responses to maximum items."""
+        response = [{'id': 'a'}, {'id': 'b'}, {'id': 'c'}, {'id': 'd'}]
+        self.assertEqual(self.log.format(response),
+                         ("[{'id': 'a'}, {'id': 'b'}, ... 2 more items]", True))
+        self.assertEqual(self.log.format({'first': response, 'second': 2}),
+                         ("{'first': [{'id': 'a'}, {'id': 'b'}, ... 2 more items], "
+                          "'second': 2}", True))
+
+    def test_format_should_truncate_columns(self):
+        """Format should truncate columns to maximum items."""
+        columns = {'id': numpy.array(['a', 'b', 'c']), 'n': array('q', [1, 2, 3]),
+                   's': ('x', 'y', 'z'), 'one': numpy.array([1])}
+        self.log.max_bytes = 200
+        self.assertEqual(self.log.format(columns),
+                         ("{'id': ['a', 'b', ... 1 more items], 'n': [1, 2, ... 1 more items], "
+                          "'s': ['x', 'y', ... 1 more items], 'one': [1]}", True))
+
+    def test_format_should_truncate_bytes(self):
+        """Format should truncate responses to maximum bytes."""
+        text, truncated = self.log.format('x' * 100)
+        self.assertTrue(truncated)
+        self.assertEqual(text, 'x' * 80 + '... (100 bytes)')
+
+    def test_write_should_create_sidecar_file(self):
+        """Write should write the full response as JSON relative to the log file."""
+        with tempfile.TemporaryDirectory() as directory:
+            self.builtin.get_variable_value.side_effect = [
+                directory, os.path.join(directory, 'log.html')]
+            link = self.log.write([{'id': 'a', 'price': Decimal('1.5')}])
+            self.assertEqual(link, 'dynamodb-responses/response-1.json')
+            with open(os.path.join(directory, link), encoding='utf-8') as stream:
+                self.assertEqual(json.load(stream), [{'id': 'a', 'price': 1.5}])
+
+    def test_write_should_skip_sidecar_file(self):
+        """Write should not write files when disabled or Robot Framework is not running."""
+        self.builtin.get_variable_value.side_effect = RobotNotRunningError()
+        self.assertIsNone(self.log.write(['a']))
+        self.log.sidecar = False
+        self.assertIsNone(self.log.write(['a']))
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+import json
+import mock
+import os
+import tempfile
+import unittest
+from dynamo3 import DynamoDBConnection
+from robot.libraries.BuiltIn import RobotNotRunningError
+from sys import path
+path.append('src')
+from DynamoDBSQLLibrary.metrics import LatencyHistogram, Metrics  # noqa: E402
+
+
+class LatencyHistogramTests(unittest.TestCase):
+    """Latency histogram test class."""
+
+    def test_should_count_small_values_exactly(self):
+        """Histogram should count values below 64 microseconds exactly."""
+        histogram = LatencyHistogram()
+        for value in range(1, 11):
+            histogram.record(value / 1000000.0)
+        self.assertEqual(histogram.percentile(50), 5)
+        self.assertEqual(histogram.percentile(100), 10)
+        self.assertEqual(histogram.to_dict()['mean'], 5.5)
+
+    def test_should_bound_relative_error(self):
+        """Histogram percentiles should stay within the bucket precision of the values."""
+        histogram = LatencyHistogram()
+        for value in range(1, 100001):
+            histogram.record(value / 1000.0)
+        for percent, expected in ((50, 50000000), (99, 99000000), (99.9, 99900000)):
+            actual = histogram.percentile(percent)
+            self.assertGreaterEqual(actual, expected)
+            self.assertLess((actual - expected) / expected, 1 / 32.0)
+        self.assertEqual(histogram.percentile(100), 100000000)
+        self.assertEqual(histogram.min, 1000)
+
+    def test_should_return_summary(self):
+        """Histogram should return its summary and non-empty buckets."""
+        histogram = LatencyHistogram()
+        self.assertEqual(histogram.to_dict(), {'count': 0, 'min': 0, 'max': 0, 'mean': 0,
+                                               'p50': 0, 'p90': 0, 'p99': 0, 'p99.9': 0,
+                                               'buckets': {}})
+        histogram.record(0.000100)
+        histogram.record(0.000101)
+        self.assertEqual(histogram.to_dict()['buckets'], {'100': 2})
+
+
+class MetricsTests(unittest.TestCase):
+    """Latency metrics test class."""
+
+    def setUp(self):
+        """Instantiate the metrics class with a patched clock."""
+        self.metrics = Metrics()
+        self.now = 0.0
+        patcher = mock.patch('DynamoDBSQLLibrary.metrics.perf_counter', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def advance(self, seconds):
+        """Advances the patched clock, and returns an empty response."""
+        self.now += seconds
+        return {}
+
+    def summary(self, phase):
+        """Returns the max latency of given phase of the only label and statement."""
+        return {item['phase']: item['max'] for item in self.metrics.report()}[phase]
+
+    def test_span_should_split_phases(self):
+        """Span should record parse, network, materialize and total phases."""
+        client = mock.Mock()
+        connection = DynamoDBConnection(client)
+        self.metrics.attach(connection)
+        with self.metrics.span('LABEL', 'SCAN'):
+            self.metrics.add('parse', 0.001)
+            client.scan.side_effect = lambda **kwargs: self.advance(0.010)
+            connection.call('scan', TableName='foo')
+            self.now += 0.004
+        self.assertEqual([(item['label'], item['statement'], item['phase'])
+                          for item in self.metrics.report()],
+                         [('LABEL', 'SCAN', 'parse'), ('LABEL', 'SCAN', 'network'),
+                          ('LABEL', 'SCAN', 'materialize'), ('LABEL', 'SCAN', 'total')])
+        self.assertEqual(self.summary('parse'), 1000)
+        self.assertEqual(self.summary('network'), 10000)
+        self.assertEqual(self.summary('materialize'), 3000)
+        self.assertEqual(self.summary('total'), 14000)
+
+    def test_span_should_record_failures_and_restore_parent(self):
+        """Span should record failing blocks and restore the enclosing span."""
+        with self.metrics.span('LABEL', 'OUTER'):
+            with self.assertRaises(ValueError):
+                with self.metrics.span('LABEL', 'INNER'):
+                    raise ValueError()
+            self.metrics.add('parse', 0.002)
+        report = {(item['statement'], item['phase']): item for item in self.metrics.report()}
+        self.assertEqual(report[('INNER', 'total')]['count'], 1)
+        self.assertEqual(report[('INNER', 'parse')]['max'], 0)
+        self.assertEqual(report[('OUTER', 'parse')]['max'], 2000)
+
+    def test_disabled_metrics_should_not_record(self):
+        """Disabled metrics should not record spans, and should not write a file."""
+        self.metrics.enabled = False
+        with self.metrics.span('LABEL', 'SCAN'):
+            self.metrics.add('parse', 1)
+        self.assertEqual(self.metrics.report(), [])
+        self.assertIsNone(self.metrics.write())
+
+    @mock.patch('DynamoDBSQLLibrary.metrics.BuiltIn')
+    def test_should_write_report_into_output_dir(self, mock_builtin):
+        """Metrics should write the JSON report relative to the output directory."""
+        with self.metrics.span('LABEL', 'SCAN'):
+            pass
+        with tempfile.TemporaryDirectory() as directory:
+            mock_builtin.return_value.get_variable_value.return_value = directory
+            name = self.metrics.write('metrics/latency.json')
+            self.assertEqual(name, os.path.join(directory, 'metrics/latency.json'))
+            with open(name, encoding='utf-8') as stream:
+                report = json.load(stream)
+        self.assertEqual(report['unit'], 'microseconds')
+        self.assertEqual(len(report['histograms']), 4)
+        self.metrics.reset()
+        self.assertEqual(self.metrics.report(), [])
+
+    @mock.patch('DynamoDBSQLLibrary.metrics.BuiltIn')
+    def test_should_write_report_without_robot(self, mock_builtin):
+        """Metrics should write the JSON report relative to current directory without Robot."""
+        mock_builtin.return_value.get_variable_value.side_effect = RobotNotRunningError()
+        with self.metrics.span('LABEL', 'SCAN'):
+            pass
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                self.assertEqual(self.metrics.write('latency.json'), 'latency.json')
+                self.assertTrue(os.path.exists(os.path.join(directory, 'latency.json')))
+            finally:
+                os.chdir(cwd)
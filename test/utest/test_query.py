@@ -21,13 +21,23 @@
 Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
 """
 
+import gzip
 import mock
+import tempfile
 import unittest
-from dql import Engine
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from dynamo3 import DynamoDBConnection
 from dynamo3.result import ResultSet
+from robot.utils import ConnectionCache
 from sys import path
+from threading import Event
 path.append('src')
-from DynamoDBSQLLibrary.keywords import Query  # noqa: E402
+from DynamoDBSQLLibrary.cache import ResultCache, STATEMENTS  # noqa: E402
+from DynamoDBSQLLibrary.engine import Engine  # noqa: E402
+from DynamoDBSQLLibrary.keywords import Assertion, Query  # noqa: E402
+from DynamoDBSQLLibrary.keywords.session import LazySession, SessionCache  # noqa: E402
+from DynamoDBSQLLibrary.rows import Row  # noqa: E402
 
 
 class QueryTests(unittest.TestCase):
@@ -37,11 +47,40 @@ class QueryTests(unittest.TestCase):
         """Instantiate the query class."""
         self.command = 'MY-COMMAND'
         self.engine = mock.create_autospec(Engine)
+        self.engine.results = ResultCache()
         self.label = 'MY-LABEL'
         self.query = Query()
         self.query._cache = mock.Mock()
         self.query._logger = mock.Mock()
 
+    def test_query_result_should_match_file(self):
+        """Query result should match the expected JSON Lines file regardless of order."""
+        self.engine.execute.return_value = iter([{'id': '2', 'n': Decimal('2')},
+                                                 {'id': '1', 'b': {'a'}}])
+        self.query._cache.switch.return_value = self.engine
+        self.query.json_loads = Assertion().json_loads
+        with tempfile.TemporaryDirectory() as directory:
+            name = f'{directory}/expected.jsonl.gz'
+            with gzip.open(name, 'wt') as stream:
+                stream.write('{"id":"1","b":{"py/set":["a"]}}\n\n{"id":"2","n":2.0}\n')
+            self.query.query_result_should_match_file(self.label, self.command, name)
+        self.engine.execute.assert_called_with(self.command)
+
+    def test_query_result_should_not_match_file(self):
+        """Query result should report extra and missing items of the expected file."""
+        self.engine.execute.return_value = iter([{'id': '1'}, {'id': '1'}, {'id': '2'}])
+        self.query._cache.switch.return_value = self.engine
+        self.query.json_loads = Assertion().json_loads
+        with tempfile.TemporaryDirectory() as directory:
+            name = f'{directory}/expected.jsonl'
+            with open(name, 'w') as stream:
+                stream.write('{"id":"3"}\n{"id":"2"}\n')
+            with self.assertRaises(AssertionError) as context:
+                self.query.query_result_should_match_file(self.label, self.command, name)
+        self.assertEqual(f"DynamoDBSQLLibraryError: '{self.command}' results are different "
+                         f"from '{name}', first mismatches:\n- 2 extra: {{'id': '1'}}\n"
+                         "- 1 missing: {'id': '3'}", str(context.exception))
+
     def test_should_return_expected_host(self):
         """Simulate query to return session host endpoint URL."""
         self.engine.connection = mock.PropertyMock()
@@ -58,8 +97,108 @@ class QueryTests(unittest.TestCase):
         response = self.query.dynamodb_region(self.label)
         self.assertEqual(response, 'MY-REGION')
 
-    @mock.patch("DynamoDBSQLLibrary.keywords.query.ResultSet")
-    def test_should_return_table_list(self, mock_rs):
+    def test_should_flush_table_metadata(self):
+        """Should invalidate the table metadata of requested session."""
+        self.query._cache.switch.return_value = self.engine
+        self.query.flush_dynamodb_table_metadata(self.label)
+        self.engine.invalidate.assert_called_with(None)
+        self.query.flush_dynamodb_table_metadata(self.label, 'my-table')
+        self.engine.invalidate.assert_called_with('my-table')
+        self.query._cache.switch.assert_called_with(self.label)
+
+    @mock.patch("DynamoDBSQLLibrary.keywords.query.RESPONSE_LOG")
+    def test_query_should_not_format_response_without_debug(self, mock_log):
+        """Simulate query to skip response logging when debug level is disabled."""
+        mock_log.is_enabled.return_value = False
+        self.engine.execute.return_value = 'MY-RESPONSE'
+        self.query._cache.switch.return_value = self.engine
+        self.query.query_dynamodb(self.label, self.command)
+        mock_log.format.assert_not_called()
+        self.query._logger.debug.assert_not_called()
+
+    @mock.patch("DynamoDBSQLLibrary.keywords.query.RESPONSE_LOG")
+    def test_query_should_link_truncated_response(self, mock_log):
+        """Simulate query to log truncated response with a link to its sidecar file."""
+        response = ['a', 'b', 'c']
+        mock_log.format.return_value = ("['a', ... 2 more items]", True)
+        mock_log.write.return_value = 'dynamodb-responses/response-1.json'
+        self.engine.execute.return_value = response
+        self.query._cache.switch.return_value = self.engine
+        self.query.query_dynamodb(self.label, self.command)
+        mock_log.write.assert_called_with(response)
+        self.query._logger.debug.assert_has_calls([
+            mock.call(f"'{self.command}' response:\n['a', ... 2 more items]"),
+            mock.call(f"Full '{self.command}' response: "
+                      '<a href="dynamodb-responses/response-1.json">'
+                      'dynamodb-responses/response-1.json</a>', html=True)])
+
+    @mock.patch("DynamoDBSQLLibrary.keywords.query.RESPONSE_LOG")
+    def test_should_set_response_log_policy(self, mock_log):
+        """Should set the response log policy."""
+        mock_log.max_bytes = 1
+        self.query.set_dynamodb_response_log_policy(max_items='10', sidecar='False')
+        self.assertEqual(mock_log.max_items, 10)
+        self.assertEqual(mock_log.max_bytes, 1)
+        self.assertFalse(mock_log.sidecar)
+
+    def test_should_return_consumed_capacity(self):
+        """Should return the consumed capacity totals of the session, or of a table."""
+        totals = {'foo': {'read': 1.0, 'write': 2.0}}
+        self.engine.capacity = mock.Mock()
+        self.engine.capacity.totals.return_value = totals
+        self.query._cache.switch.return_value = self.engine
+        self.assertEqual(self.query.get_dynamodb_consumed_capacity(self.label), totals)
+        self.assertEqual(self.query.get_dynamodb_consumed_capacity(self.label, 'foo'),
+                         {'read': 1.0, 'write': 2.0})
+        self.assertEqual(self.query.get_dynamodb_consumed_capacity(self.label, 'foo:bar'),
+                         {'read': 0.0, 'write': 0.0})
+        self.query._cache.switch.assert_called_with(self.label, create=False)
+
+    def test_should_reset_consumed_capacity(self):
+        """Should reset the consumed capacity totals of requested sessions."""
+        self.engine.capacity = mock.Mock()
+        self.query._cache.switch.return_value = self.engine
+        self.query.reset_dynamodb_consumed_capacity('a, b')
+        self.assertEqual(self.query._cache.switch.call_args_list,
+                         [mock.call('a', create=False), mock.call('b', create=False)])
+        self.assertEqual(self.engine.capacity.reset.call_count, 2)
+
+    def test_consumed_capacity_should_not_create_lazy_sessions(self):
+        """Consumed capacity keywords should skip lazy sessions without creating them."""
+        factory = mock.Mock()
+        self.engine.capacity = mock.Mock()
+        self.query._cache = SessionCache()
+        self.query._cache.register(LazySession(factory), alias='lazy')
+        self.query._cache.register(self.engine, alias=self.label)
+        self.query.reset_dynamodb_consumed_capacity()
+        self.query.reset_dynamodb_consumed_capacity('lazy')
+        self.assertEqual(self.query.get_dynamodb_consumed_capacity('lazy'), {})
+        self.assertEqual(self.query.get_dynamodb_consumed_capacity('lazy', 'foo'),
+                         {'read': 0.0, 'write': 0.0})
+        factory.assert_not_called()
+        self.engine.capacity.reset.assert_called_once_with()
+
+    @mock.patch("DynamoDBSQLLibrary.keywords.query.STATEMENTS")
+    def test_should_return_statement_cache_statistics(self, mock_statements):
+        """Should return parsed statement cache statistics."""
+        stats = {'hits': 1, 'max_size': 256, 'misses': 2, 'size': 2}
+        mock_statements.statistics.return_value = stats
+        self.assertEqual(self.query.get_dynamodb_statement_cache_statistics(), stats)
+        self.query._logger.info.assert_called_with(f'DynamoDB statement cache: {stats}')
+
+    def test_should_enable_and_disable_result_cache(self):
+        """Should resize the result cache of the session, and return its statistics."""
+        self.query._cache.switch.return_value = self.engine
+        self.query.enable_dynamodb_result_cache(self.label, max_bytes='1024')
+        stats = self.query.get_dynamodb_result_cache_statistics(self.label)
+        self.assertEqual(stats['max_bytes'], 1024)
+        self.query._logger.info.assert_called_with(f'DynamoDB result cache of {self.label}: '
+                                                   f'{stats}')
+        self.query.disable_dynamodb_result_cache(self.label)
+        self.assertFalse(self.engine.results.enabled)
+        self.query._cache.switch.assert_called_with(self.label)
+
+    def test_should_return_table_list(self):
         """Simulate query to return table list."""
         self.query._cache.switch.return_value = self.engine
         self.query.list_dynamodb_tables(self.label)
@@ -67,6 +206,44 @@ class QueryTests(unittest.TestCase):
         self.engine.connection.call.assert_called_with('list_tables', Limit=100)
         self.query._logger.debug.assert_called_with("List tables response:\n[]")
 
+    def test_should_follow_table_list_pages(self):
+        """Should follow table list pages until all or limit tables are listed."""
+        pages = [{'TableNames': ['a', 'b'], 'LastEvaluatedTableName': 'b'},
+                 {'TableNames': ['c'], 'LastEvaluatedTableName': 'c'},
+                 {'TableNames': ['d']}]
+        self.engine.connection.call.side_effect = pages
+        self.query._cache.switch.return_value = self.engine
+        self.assertEqual(self.query.list_dynamodb_tables(self.label), ['a', 'b', 'c', 'd'])
+        self.assertEqual(self.engine.connection.call.call_args_list,
+                         [mock.call('list_tables', Limit=100),
+                          mock.call('list_tables', ExclusiveStartTableName='b', Limit=100),
+                          mock.call('list_tables', ExclusiveStartTableName='c', Limit=100)])
+        self.engine.connection.call.reset_mock()
+        self.engine.connection.call.side_effect = pages[1:]
+        self.assertEqual(self.query.list_dynamodb_tables(self.label, Limit='2',
+                                                         ExclusiveStartTableName='a'), ['c', 'd'])
+        self.assertEqual(self.engine.connection.call.call_args_list,
+                         [mock.call('list_tables', ExclusiveStartTableName='a', Limit=2),
+                          mock.call('list_tables', ExclusiveStartTableName='c', Limit=1)])
+
+    def test_should_describe_tables_concurrently(self):
+        """Should describe the requested tables, or all tables, in a thread pool."""
+        tables = {name: {'ItemCount': 1, 'KeySchema': [], 'TableName': name,
+                         'TableSizeBytes': 2, 'TableStatus': 'ACTIVE'} for name in 'ab'}
+
+        def call(command, **kwargs):
+            if command == 'list_tables':
+                return {'TableNames': list(tables)}
+            return {'Table': tables[kwargs['TableName']]}
+
+        self.engine.connection.call.side_effect = call
+        self.query._cache.switch.return_value = self.engine
+        expected = {'ItemCount': 1, 'KeySchema': [], 'TableSizeBytes': 2, 'TableStatus': 'ACTIVE'}
+        self.assertEqual(self.query.describe_dynamodb_tables(self.label, 'b', workers='2'),
+                         {'b': expected})
+        self.assertEqual(self.query.describe_dynamodb_tables(self.label),
+                         {'a': expected, 'b': expected})
+
     def test_query_should_return_string(self):
         """Simulate query to return string literal."""
         response = 'MY-RESPONSE'
@@ -86,3 +263,333 @@ class QueryTests(unittest.TestCase):
         self.query._cache.switch.assert_called_with(self.label)
         self.engine.execute.assert_called_with(self.command)
         self.query._logger.debug.assert_called_with(f"'{self.command}' response:\n[]")
+
+    def test_query_should_return_columns(self):
+        """Simulate query to return the result set as columns."""
+        self.engine.execute.return_value = iter([{'id': 'a', 'n': Decimal(1)}, {'id': 'b'}])
+        self.query._cache.switch.return_value = self.engine
+        response = self.query.query_dynamodb(self.label, self.command, columnar='True')
+        self.assertEqual(response['id'].tolist(), ['a', 'b'])
+        self.assertEqual(response['n'][:1].tolist(), [1.0])
+        self.engine.execute.return_value = 'MY-RESPONSE'
+        self.assertEqual(self.query.query_dynamodb(self.label, self.command, columnar=True),
+                         'MY-RESPONSE')
+
+    def test_query_should_return_compact_rows(self):
+        """Simulate query to return the result set as compact rows."""
+        self.engine.execute.return_value = iter([{'id': 'a', 'n': Decimal(1)}, {'id': 'b', 'n': 2}])
+        self.query._cache.switch.return_value = self.engine
+        response = self.query.query_dynamodb(self.label, self.command, compact='True')
+        self.assertEqual(response, [{'id': 'a', 'n': 1}, {'id': 'b', 'n': 2}])
+        self.assertIsInstance(response[0], Row)
+        self.assertIs(response[0]._schema, response[1]._schema)
+
+    def test_query_should_reuse_cached_results(self):
+        """Simulate repeated read-only queries answered from the result cache."""
+        self.engine.execute.side_effect = lambda *_, **__: iter([{'id': 'a', 'n': Decimal(1)}])
+        self.engine.results.resize(4096)
+        self.query._cache.switch.return_value = self.engine
+        for _ in range(2):
+            self.assertEqual(self.query.query_dynamodb(self.label, 'SCAN * FROM foo'),
+                             [{'id': 'a', 'n': 1}])
+        response = self.query.query_dynamodb(self.label, 'SCAN * FROM foo', compact=True)
+        self.assertIsInstance(response[0], Row)
+        self.assertEqual(self.engine.execute.call_count, 1)
+        self.engine.execute.side_effect = None
+        self.engine.execute.return_value = 'MY-RESPONSE'
+        for command in ('INSERT INTO foo (id) VALUES (1)', 'SELECT COUNT(*) FROM foo',
+                        'SCAN * FROM foo SAVE out.json'):
+            self.query.query_dynamodb(self.label, command)
+            self.query.query_dynamodb(self.label, command)
+        self.assertEqual(self.engine.execute.call_count, 6)
+        self.assertEqual(self.engine.results.statistics()['hits'], 3)
+        with self.assertRaises(Exception):
+            self.query.query_dynamodb(self.label, 'NOT DQL')
+        self.assertEqual(self.engine.execute.call_count, 6)
+
+    def test_query_should_parse_cached_results_once(self):
+        """Result cache lookups should share the parsed statements with the execution."""
+        STATEMENTS.clear()
+        engine = Engine(DynamoDBConnection(mock.Mock()))
+        engine._run = mock.Mock(return_value='RESULT')
+        engine.results.resize(4096)
+        self.query._cache.switch.return_value = engine
+        for command in ('SCAN * FROM foo', 'SCAN * FROM foo', 'INSERT INTO foo (id) VALUES (1)'):
+            self.query.query_dynamodb(self.label, command)
+        self.assertEqual(engine._run.call_count, 2)
+        self.assertEqual(STATEMENTS.statistics()['hits'], 1)
+        self.assertEqual(STATEMENTS.statistics()['misses'], 2)
+        STATEMENTS.clear()
+
+    def test_cursor_should_fetch_batches(self):
+        """Cursor should return results in batches until exhausted."""
+        self.engine.execute.return_value = iter([1, 2, 3, 4, 5])
+        self.query._cache.switch.return_value = self.engine
+        cursor = self.query.open_dynamodb_cursor(self.label, self.command)
+        self.query._cache.switch.assert_called_with(self.label)
+        self.engine.execute.assert_called_with(self.command)
+        self.assertEqual(self.query.fetch_next_dynamodb_batch(cursor, 2), [1, 2])
+        self.assertEqual(self.query.fetch_next_dynamodb_batch(str(cursor), '2'), [3, 4])
+        self.assertEqual(self.query.fetch_next_dynamodb_batch(cursor), [5])
+        self.assertEqual(self.query.fetch_next_dynamodb_batch(cursor), [])
+        self.query.close_dynamodb_cursor(cursor)
+        with self.assertRaises(ValueError) as context:
+            self.query.fetch_next_dynamodb_batch(cursor)
+        self.assertEqual(f"DynamoDBSQLLibraryError: Non-existing cursor '{cursor}'",
+                         str(context.exception))
+
+    def test_cursor_should_be_lazy(self):
+        """Cursor should not consume more results than requested."""
+        response = iter(range(10))
+        self.engine.execute.return_value = response
+        self.query._cache.switch.return_value = self.engine
+        cursor = self.query.open_dynamodb_cursor(self.label, self.command)
+        self.assertEqual(self.query.fetch_next_dynamodb_batch(cursor, 3), [0, 1, 2])
+        self.assertEqual(next(response), 3)
+
+    def test_cursor_should_close_all(self):
+        """Close all cursors should release every opened cursor."""
+        self.engine.execute.side_effect = lambda command: iter([])
+        self.query._cache.switch.return_value = self.engine
+        first = self.query.open_dynamodb_cursor(self.label, self.command)
+        second = self.query.open_dynamodb_cursor(self.label, self.command)
+        self.assertNotEqual(first, second)
+        self.query.close_all_dynamodb_cursors()
+        for cursor in (first, second):
+            with self.assertRaises(ValueError):
+                self.query.close_dynamodb_cursor(cursor)
+
+    def test_cursor_should_reject_non_result_set(self):
+        """Cursor should only be opened on commands returning a result set."""
+        self.engine.execute.return_value = 2
+        self.query._cache.switch.return_value = self.engine
+        with self.assertRaises(ValueError) as context:
+            self.query.open_dynamodb_cursor(self.label, self.command)
+        self.assertEqual(f"DynamoDBSQLLibraryError: '{self.command}' does not return "
+                         "a result set", str(context.exception))
+
+    def test_query_should_return_list_from_iterator(self):
+        """Simulate query to materialize lazily generated results."""
+        self.engine.execute.return_value = (item for item in [{'id': 'a'}])
+        self.query._cache.switch.return_value = self.engine
+        response = self.query.query_dynamodb(self.label, self.command)
+        self.assertEqual(response, [{'id': 'a'}])
+
+    @mock.patch("DynamoDBSQLLibrary.engine.Engine")
+    def test_parallel_scan_should_merge_segments(self, mock_engine):
+        """Parallel scan should merge the results of all segments."""
+        def engine(connection):
+            instance = mock.Mock()
+            instance.execute.return_value = iter([connection.segment] * 150)
+            return instance
+        mock_engine.side_effect = engine
+        self.engine.cached_descriptions = {}
+        self.engine.connection = DynamoDBConnection(mock.Mock())
+        self.query._cache.switch.return_value = self.engine
+        response = self.query.parallel_scan_dynamodb(self.label, self.command, '3',
+                                                     workers='2', page_size='10')
+        self.query._cache.switch.assert_called_with(self.label)
+        self.assertEqual(sorted(response), [0] * 150 + [1] * 150 + [2] * 150)
+
+    @mock.patch("DynamoDBSQLLibrary.engine.Engine")
+    def test_parallel_scan_should_raise_worker_error(self, mock_engine):
+        """Parallel scan should raise the error of a failing segment."""
+        mock_engine.return_value.execute.return_value = 2
+        self.engine.cached_descriptions = {}
+        self.engine.connection = DynamoDBConnection(mock.Mock())
+        self.query._cache.switch.return_value = self.engine
+        with self.assertRaises(ValueError) as context:
+            self.query.parallel_scan_dynamodb(self.label, self.command)
+        self.assertEqual(f"DynamoDBSQLLibraryError: '{self.command}' does not return "
+                         "a result set", str(context.exception))
+
+    @mock.patch("DynamoDBSQLLibrary.engine.Engine")
+    def test_parallel_cursor_should_stream_segments(self, mock_engine):
+        """Cursor with segments should stream the results of all segments."""
+        mock_engine.return_value.execute.side_effect = lambda command: iter(range(500))
+        self.engine.cached_descriptions = {}
+        self.engine.connection = DynamoDBConnection(mock.Mock())
+        self.query._cache.switch.return_value = self.engine
+        cursor = self.query.open_dynamodb_cursor(self.label, self.command, segments=2)
+        self.assertEqual(len(self.query.fetch_next_dynamodb_batch(cursor, 10)), 10)
+        self.query.close_dynamodb_cursor(cursor)
+
+    @mock.patch("DynamoDBSQLLibrary.engine.Engine")
+    def test_parallel_cursor_close_should_cancel_segments(self, mock_engine):
+        """Closing a cursor with segments should stop scanning the remaining pages."""
+        fetched, closed = [], []
+
+        def scan(command):
+            try:
+                for index in range(100000):
+                    fetched.append(index)
+                    yield {'id': index}
+            finally:
+                closed.append(command)
+        mock_engine.return_value.execute.side_effect = scan
+        self.engine.cached_descriptions = {}
+        self.engine.connection = DynamoDBConnection(mock.Mock())
+        self.query._cache.switch.return_value = self.engine
+        cursor = self.query.open_dynamodb_cursor(self.label, self.command, segments=4)
+        self.assertEqual(len(self.query.fetch_next_dynamodb_batch(cursor, 1)), 1)
+        self.query.close_dynamodb_cursor(cursor)
+        self.assertEqual(closed, [self.command] * 4)
+        self.assertLess(len(fetched), 40000)
+
+    @mock.patch("DynamoDBSQLLibrary.engine.Engine")
+    def test_parallel_cursor_drop_should_stop_segments(self, mock_engine):
+        """Dropping a cursor with segments without closing it should stop its workers."""
+        closed = []
+
+        def scan(command):
+            try:
+                yield from ({'id': index} for index in range(100000))
+            finally:
+                closed.append(command)
+        mock_engine.return_value.execute.side_effect = scan
+        self.engine.cached_descriptions = {}
+        self.engine.connection = DynamoDBConnection(mock.Mock())
+        self.query._cache.switch.return_value = self.engine
+        cursor = self.query.open_dynamodb_cursor(self.label, self.command, segments=2)
+        self.assertEqual(len(self.query.fetch_next_dynamodb_batch(cursor, 5)), 5)
+        del self.query._cursors[cursor]
+        self.assertEqual(closed, [self.command] * 2)
+
+    def test_start_query_should_return_handle_to_wait_for(self):
+        """Started query should run in the background and return its response on wait."""
+        self.engine.execute.return_value = iter([1, 2])
+        self.query._cache.switch.return_value = self.engine
+        handle = self.query.start_dynamodb_query(self.label, self.command)
+        self.query._cache.switch.assert_called_with(self.label)
+        self.assertEqual(self.query.wait_for_dynamodb_query(str(handle), timeout='10 s'), [1, 2])
+        self.engine.execute.assert_called_with(self.command)
+        self.query._logger.debug.assert_called_with(f"'{self.command}' response:\n[1, 2]")
+        with self.assertRaises(ValueError) as context:
+            self.query.wait_for_dynamodb_query(handle)
+        self.assertEqual(f"DynamoDBSQLLibraryError: Non-existing query handle '{handle}'",
+                         str(context.exception))
+        self.query._shutdown_queries()
+
+    def test_wait_for_query_should_keep_handle_on_timeout(self):
+        """Wait for query should fail on timeout, and the query can be waited for again."""
+        started = Event()
+        self.engine.execute.side_effect = lambda commands: started.wait(10) and 'DONE'
+        self.query._cache.switch.return_value = self.engine
+        handle = self.query.start_dynamodb_query(self.label, self.command)
+        with self.assertRaises(RuntimeError) as context:
+            self.query.wait_for_dynamodb_query(handle, timeout='0.01')
+        self.assertEqual(f"DynamoDBSQLLibraryError: DynamoDB query {handle} "
+                         f"'{self.command}' did not finish in 0.01", str(context.exception))
+        with self.assertRaises(RuntimeError) as context:
+            self.query.wait_for_all_dynamodb_queries(timeout='0.01')
+        self.assertEqual(f"DynamoDBSQLLibraryError: DynamoDB queries {handle} did not "
+                         "finish in 0.01", str(context.exception))
+        started.set()
+        self.assertEqual(self.query.wait_for_dynamodb_query(handle, timeout='NONE'), 'DONE')
+        self.query._shutdown_queries()
+
+    def test_wait_for_query_should_raise_query_error(self):
+        """Wait for query should fail with the query error, and release the handle."""
+        self.engine.execute.side_effect = RuntimeError('MY-ERROR')
+        self.query._cache.switch.return_value = self.engine
+        handle = self.query.start_dynamodb_query(self.label, self.command)
+        with self.assertRaises(RuntimeError) as context:
+            self.query.wait_for_dynamodb_query(handle)
+        self.assertEqual('MY-ERROR', str(context.exception))
+        self.assertEqual(self.query._queries, {})
+        self.query._shutdown_queries()
+
+    def test_wait_for_all_queries_should_return_responses_in_order(self):
+        """Wait for all queries should return the responses in the start order, and report
+        the errors after every query is done.
+        """
+        self.query._cache.switch.return_value = self.engine
+        self.engine.execute.side_effect = lambda commands: commands
+        first = self.query.start_dynamodb_query(self.label, 'FIRST')
+        self.query.start_dynamodb_query(self.label, 'SECOND')
+        self.assertEqual(self.query.wait_for_all_dynamodb_queries(), ['FIRST', 'SECOND'])
+        self.assertEqual(self.query.wait_for_all_dynamodb_queries(), [])
+        self.engine.execute.side_effect = [RuntimeError('MY-ERROR'), 'SECOND']
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.query._executor = executor
+            third = self.query.start_dynamodb_query(self.label, 'THIRD')
+            self.query.start_dynamodb_query(self.label, 'FOURTH')
+            with self.assertRaises(RuntimeError) as context:
+                self.query.wait_for_all_dynamodb_queries('1 minute')
+        self.assertEqual(f"DynamoDBSQLLibraryError: DynamoDB queries failed:\n"
+                         f"{third} 'THIRD': MY-ERROR", str(context.exception))
+        self.assertEqual(self.query._queries, {})
+        self.assertEqual(third, first + 2)
+
+    def test_query_on_sessions_should_return_responses(self):
+        """Query on sessions should return the response of every requested session."""
+        self.query._cache = ConnectionCache()
+        for label in ('oregon', 'singapore', 'frankfurt'):
+            engine = mock.create_autospec(Engine)
+            engine.results = ResultCache()
+            engine.execute.return_value = iter([{'id': label}])
+            self.query._cache.register(engine, alias=label)
+        response = self.query.query_dynamodb_on_sessions(['oregon', 'Singapore'],
+                                                         self.command)
+        self.assertEqual(response, {'oregon': [{'id': 'oregon'}],
+                                    'Singapore': [{'id': 'singapore'}]})
+
+    def test_query_on_sessions_should_query_all_sessions(self):
+        """Query on sessions should query all registered sessions if none is requested."""
+        self.query._cache = ConnectionCache()
+        for label in ('oregon', 'singapore', 'frankfurt'):
+            engine = mock.create_autospec(Engine)
+            engine.results = ResultCache()
+            engine.execute.return_value = label
+            self.query._cache.register(engine, alias=label)
+        self.query._cache._connections[1] = None
+        response = self.query.query_dynamodb_on_sessions('', self.command, workers=1)
+        self.assertEqual(response, {'oregon': 'oregon', 'frankfurt': 'frankfurt'})
+        response = self.query.query_dynamodb_on_sessions('oregon, oregon', self.command)
+        self.assertEqual(response, {'oregon': 'oregon'})
+
+    def test_query_on_sessions_should_share_session_responses(self):
+        """Query on sessions should query a session once and share its response by label."""
+        self.query._cache = ConnectionCache()
+        engine = mock.create_autospec(Engine)
+        engine.results = ResultCache()
+        engine.execute.return_value = 1
+        self.query._cache.register(engine, alias='oregon')
+        self.query._cache.register(engine, alias='us-west-2')
+        response = self.query.query_dynamodb_on_sessions('', self.command)
+        self.assertEqual(response, {'oregon': 1, 'us-west-2': 1})
+        engine.execute.assert_called_once()
+
+    def test_query_on_sessions_should_collect_switch_errors(self):
+        """Query on sessions should report the labels that can not be switched to."""
+        self.query._cache = ConnectionCache()
+        engine = mock.create_autospec(Engine)
+        engine.results = ResultCache()
+        engine.execute.return_value = 1
+        self.query._cache.register(engine, alias='oregon')
+        response = self.query.query_dynamodb_on_sessions('missing, oregon', self.command,
+                                                         fail_on_error=False)
+        self.assertEqual(list(response), ['missing', 'oregon'])
+        self.assertIsInstance(response['missing'], RuntimeError)
+        self.assertEqual(response['oregon'], 1)
+        with self.assertRaises(RuntimeError) as context:
+            self.query.query_dynamodb_on_sessions('missing, oregon', self.command)
+        self.assertIn('DynamoDB sessions:\nmissing: ', str(context.exception))
+
+    def test_query_on_sessions_should_collect_errors(self):
+        """Query on sessions should report the errors after querying every session."""
+        self.query._cache = ConnectionCache()
+        error = RuntimeError('MY-ERROR')
+        for label, side_effect in (('oregon', error), ('singapore', None)):
+            engine = mock.create_autospec(Engine)
+            engine.results = ResultCache()
+            engine.execute.side_effect = side_effect
+            engine.execute.return_value = 1
+            self.query._cache.register(engine, alias=label)
+        with self.assertRaises(RuntimeError) as context:
+            self.query.query_dynamodb_on_sessions(None, self.command)
+        self.assertEqual(f"DynamoDBSQLLibraryError: '{self.command}' failed on "
+                         "DynamoDB sessions:\noregon: MY-ERROR", str(context.exception))
+        response = self.query.query_dynamodb_on_sessions(None, self.command,
+                                                         fail_on_error='False')
+        self.assertEqual(response, {'oregon': error, 'singapore': 1})
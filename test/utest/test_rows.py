@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+import pickle
+import tracemalloc
+import unittest
+from decimal import Decimal
+from json import dumps
+from sys import path
+path.append('src')
+from DynamoDBSQLLibrary.keywords import Assertion  # noqa: E402
+from DynamoDBSQLLibrary.keywords.assertion import DecimalEncoder  # noqa: E402
+from DynamoDBSQLLibrary.rows import Row, to_rows  # noqa: E402
+
+
+class RowTests(unittest.TestCase):
+    """Compact row test class."""
+
+    def setUp(self):
+        """Simulate DynamoDB items with two schemas."""
+        self.items = [{'id': 'a', 'n': Decimal(1)}, {'id': 'b', 'n': Decimal(2)},
+                      {'id': 'c', 'tags': {'x'}}]
+        self.rows = to_rows(iter(self.items))
+
+    def test_rows_should_be_read_only_mappings(self):
+        """Rows should support mapping access like the items."""
+        row = self.rows[0]
+        self.assertEqual(row['id'], 'a')
+        self.assertEqual(row.get('tags'), None)
+        self.assertIn('n', row)
+        self.assertNotIn('tags', row)
+        self.assertEqual(list(row), ['id', 'n'])
+        self.assertEqual(len(row), 2)
+        self.assertEqual(dict(row.items()), self.items[0])
+        self.assertEqual(repr(row), repr(self.items[0]))
+        with self.assertRaises(KeyError):
+            row['tags']  # pylint: disable=pointless-statement
+        with self.assertRaises(TypeError):
+            row['id'] = 'x'
+
+    def test_rows_should_share_schemas(self):
+        """Rows with the same attributes should share one schema."""
+        self.assertIs(self.rows[0]._schema, self.rows[1]._schema)
+        self.assertIsNot(self.rows[0]._schema, self.rows[2]._schema)
+        self.assertFalse(hasattr(self.rows[0], '__dict__'))
+
+    def test_rows_should_equal_items(self):
+        """Rows should be equal to rows and items with the same attributes."""
+        self.assertEqual(self.rows, self.items)
+        self.assertEqual(self.rows, to_rows(self.items))
+        self.assertNotEqual(self.rows[0], self.rows[1])
+        self.assertNotEqual(self.rows[0], Row({'id': 0}, ('a',)))
+        self.assertNotEqual(self.rows[0], ['id', 'n'])
+
+    def test_rows_should_be_pickled_and_encoded(self):
+        """Rows should survive pickling, and be encoded as JSON objects."""
+        self.assertEqual(pickle.loads(pickle.dumps(self.rows)), self.items)
+        self.assertEqual(dumps(self.rows, cls=DecimalEncoder),
+                         '[{"id": "a", "n": 1}, {"id": "b", "n": 2}, '
+                         '{"id": "c", "tags": {"py/set": ["x"]}}]')
+
+    def test_rows_should_be_compared_with_items(self):
+        """Rows should work with the list comparison keywords."""
+        assertion = Assertion()
+        self.assertEqual(assertion.lists_deep_compare(self.rows, self.items[::-1]), 0)
+        self.assertEqual(Assertion._cmp(self.rows, self.items, key=None), 0)
+        self.assertEqual(assertion.lists_deep_diff(self.rows, self.items[:2]),
+                         ["id 'c' is extra"])
+
+    def test_rows_should_be_smaller_than_items(self):
+        """Rows should take less memory than the item dictionaries besides the values."""
+        values = [(f'{index:08d}', Decimal(index), 'name', True) for index in range(1000)]
+        sizes = []
+        for factory in (lambda: [dict(zip(('id', 'n', 's', 'b'), value)) for value in values],
+                        lambda: to_rows(dict(zip(('id', 'n', 's', 'b'), value))
+                                        for value in values)):
+            tracemalloc.start()
+            result = factory()
+            sizes.append(tracemalloc.get_traced_memory()[0])
+            tracemalloc.stop()
+            self.assertEqual(len(result), 1000)
+        self.assertLess(sizes[1], sizes[0] * 0.7)
@@ -23,11 +23,16 @@ Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like D
 
 import mock
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from boto3.session import Session
+from dql import Engine
 from robot.utils import ConnectionCache
 from sys import path
+from time import sleep
 path.append('src')
 from DynamoDBSQLLibrary.keywords import SessionManager  # noqa: E402
+from DynamoDBSQLLibrary.keywords.session import LazySession, POOL  # noqa: E402
+from DynamoDBSQLLibrary.metrics import METRICS  # noqa: E402
 
 
 class SessionManagerTests(unittest.TestCase):
@@ -39,6 +44,7 @@ class SessionManagerTests(unittest.TestCase):
         self.region = 'MY-REGION'
         self.session = SessionManager()
         self.session._logger = mock.Mock()
+        POOL.clear()
 
     def test_class_should_initiate(self):
         """Class init should instantiate required classes."""
@@ -169,6 +175,147 @@ class SessionManagerTests(unittest.TestCase):
             self.fail("Label '%s' should be exist." % label)
         self.session.delete_all_dynamodb_sessions()
 
+    def test_create_should_reuse_pooled_session_and_client(self):
+        """Create session should reuse boto3 session and client for identical arguments."""
+        self.session.create_dynamodb_session(self.region, label=self.label)
+        self.session.create_dynamodb_session(self.region, label='OTHER')
+        first = self.session._cache.switch(self.label)
+        second = self.session._cache.switch('OTHER')
+        self.assertIsNot(first, second)
+        self.assertIsNot(first.connection, second.connection)
+        self.assertIs(first._session, second._session)
+        self.assertIs(first.connection.client, second.connection.client)
+        self.assertEqual(self.session.get_dynamodb_session_pool_statistics(),
+                         {'client_hits': 1, 'client_misses': 1, 'clients': 1,
+                          'session_hits': 1, 'session_misses': 1, 'sessions': 1})
+        self.session.delete_all_dynamodb_sessions()
+
+    def test_create_should_not_reuse_pooled_client_for_different_endpoint(self):
+        """Create session should create new client for different endpoint."""
+        self.session.create_dynamodb_session(self.region, label=self.label)
+        self.session.create_dynamodb_session(self.region, host='127.0.0.1', port=8000,
+                                             is_secure=False, label='LOCAL')
+        self.session.create_dynamodb_session(self.region, host='127.0.0.1', port='8000',
+                                             is_secure=False, label='OTHER')
+        first = self.session._cache.switch(self.label)
+        second = self.session._cache.switch('LOCAL')
+        third = self.session._cache.switch('OTHER')
+        self.assertIs(first._session, second._session)
+        self.assertIsNot(first.connection.client, second.connection.client)
+        self.assertIs(second.connection.client, third.connection.client)
+        stats = self.session.get_dynamodb_session_pool_statistics()
+        self.assertEqual(stats['clients'], 2)
+        self.assertEqual(stats['sessions'], 1)
+        self.session.delete_all_dynamodb_sessions()
+
+    def test_create_should_not_pool_given_session(self):
+        """Create session should not pool given session object."""
+        given = Session()
+        self.session.create_dynamodb_session(self.region, session=given, label=self.label)
+        session = self.session._cache.switch(self.label)
+        self.assertIs(session._session, given)
+        self.assertEqual(self.session.get_dynamodb_session_pool_statistics()['clients'], 0)
+        self.session.delete_all_dynamodb_sessions()
+
+    def test_clear_pool_should_remove_pooled_sessions(self):
+        """Clear pool should remove pooled sessions and reset the statistics."""
+        self.session.create_dynamodb_session(self.region, label=self.label)
+        first = self.session._cache.switch(self.label)
+        self.session.clear_dynamodb_session_pool()
+        self.assertEqual(self.session.get_dynamodb_session_pool_statistics(),
+                         {'client_hits': 0, 'client_misses': 0, 'clients': 0,
+                          'session_hits': 0, 'session_misses': 0, 'sessions': 0})
+        self.session.create_dynamodb_session(self.region, label='OTHER')
+        second = self.session._cache.switch('OTHER')
+        self.assertIsNot(first.connection.client, second.connection.client)
+        self.session.delete_all_dynamodb_sessions()
+
+    def test_create_should_register_lazy_session(self):
+        """Create session should defer the client creation of lazy session until first use."""
+        label = self.session.create_dynamodb_session(self.region, lazy=True)
+        self.assertEqual(label, self.region)
+        self.assertEqual(self.session.get_dynamodb_session_pool_statistics()['clients'], 0)
+        session = self.session._cache.switch(label)
+        self.assertIsInstance(session, Engine)
+        self.assertEqual(session.connection.region, self.region)
+        self.assertIs(self.session._cache.switch(label), session)
+        self.assertIs(self.session._cache.current, session)
+        self.assertEqual(self.session.get_dynamodb_session_pool_statistics()['clients'], 1)
+        self.session.delete_all_dynamodb_sessions()
+
+    @mock.patch("DynamoDBSQLLibrary.keywords.session.METRICS")
+    def test_lazy_session_creation_should_be_measured(self, mock_metrics):
+        """Lazy session should measure its creation on first use like an eager session."""
+        self.session._create_session = mock.Mock()
+        self.session.create_dynamodb_session(self.region, label=self.label, lazy=True)
+        mock_metrics.span.assert_not_called()
+        self.session._cache.switch(self.label)
+        mock_metrics.span.assert_called_once_with(self.label, 'CREATE SESSION')
+        self.session._create_session.assert_called_once_with(self.region)
+        self.session.delete_all_dynamodb_sessions()
+
+    def test_lazy_session_should_be_created_once_by_concurrent_switches(self):
+        """Concurrent switches to a lazy session should create the session only once."""
+        factory = mock.Mock(side_effect=lambda: sleep(0.05) or mock.Mock())
+        self.session._cache.register(LazySession(factory), alias=self.label)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            sessions = list(executor.map(self.session._cache.switch, [self.label] * 4))
+        factory.assert_called_once_with()
+        self.assertTrue(all(session is sessions[0] for session in sessions))
+        self.session.delete_all_dynamodb_sessions()
+
+    def test_switch_should_not_create_lazy_session_on_request(self):
+        """Switch should return None and keep the current session for a lazy session
+        that is not requested to be created.
+        """
+        factory = mock.Mock()
+        current = mock.Mock()
+        self.session._cache.register(LazySession(factory), alias=self.label)
+        self.session._cache.register(current, alias='OTHER')
+        self.assertIsNone(self.session._cache.switch(self.label, create=False))
+        self.assertIs(self.session._cache.current, current)
+        self.assertIs(self.session._cache.switch('OTHER', create=False), current)
+        factory.assert_not_called()
+        self.session.delete_all_dynamodb_sessions()
+
+    def test_create_should_register_lazy_session_by_default(self):
+        """Create session should register lazy session when lazy is enabled by default."""
+        self.session._lazy = True
+        self.session.create_dynamodb_session(self.region, label=self.label)
+        self.session.create_dynamodb_session(self.region, label='EAGER', lazy='false')
+        self.assertEqual(self.session.get_dynamodb_session_pool_statistics()['clients'], 1)
+        self.session._cache.switch(self.label)
+        self.assertEqual(self.session.get_dynamodb_session_pool_statistics()['client_hits'], 1)
+        self.session.delete_all_dynamodb_sessions()
+
+    def test_create_should_not_register_lazy_session_without_label(self):
+        """Create session should create session immediately when label can not be resolved."""
+        label = self.session.create_dynamodb_session(lazy=True)
+        self.assertEqual(label, 'us-east-1')
+        self.assertEqual(self.session.get_dynamodb_session_pool_statistics()['clients'], 1)
+        self.session.delete_all_dynamodb_sessions()
+
+    def test_create_should_set_metadata_ttl(self):
+        """Create session should set table metadata TTL from argument or default."""
+        self.session._metadata_ttl = 30
+        self.session.create_dynamodb_session(self.region, label=self.label)
+        self.session.create_dynamodb_session(self.region, label='OTHER', metadata_ttl='5')
+        self.assertEqual(self.session._cache.switch(self.label).metadata_ttl, 30)
+        self.assertEqual(self.session._cache.switch('OTHER').metadata_ttl, 5)
+        self.session.delete_all_dynamodb_sessions()
+
+    def test_create_should_attach_throttle(self):
+        """Create session should attach throttle hooks only when a limit is requested."""
+        self.session.create_dynamodb_session(self.region, label=self.label)
+        self.session.create_dynamodb_session(self.region, label='OTHER', read_capacity='5')
+        hooks = self.session._cache.switch(self.label).connection._hooks
+        self.assertEqual([hook.__self__ for hook in hooks['precall']], [METRICS])
+        hooks = self.session._cache.switch('OTHER').connection._hooks
+        self.assertEqual(len(hooks['precall']), 2)
+        self.assertEqual(hooks['precall'][0].__self__.read.rate, 5)
+        self.assertIsNone(hooks['precall'][0].__self__.write)
+        self.session.delete_all_dynamodb_sessions()
+
     def test_delete_should_remove_all_sessions(self):
         """Delete session should successfully remove all existing sessions."""
         self.session.create_dynamodb_session(self.region, label=self.label)
@@ -191,6 +338,17 @@ class SessionManagerTests(unittest.TestCase):
             self.fail("Label '%s' should be exist." % self.label)
         self.session.delete_all_dynamodb_sessions()
 
+    def test_delete_should_not_create_lazy_session(self):
+        """Delete session should remove a lazy session without creating it."""
+        factory = mock.Mock()
+        self.session._cache.register(LazySession(factory), alias=self.label)
+        self.session.delete_dynamodb_session(self.label)
+        factory.assert_not_called()
+        with self.assertRaises(RuntimeError) as context:
+            self.session._cache.switch(self.label)
+        self.assertIn(f"Non-existing index or alias '{self.label}'.", str(context.exception))
+        self.session.delete_all_dynamodb_sessions()
+
     def test_delete_should_log_error(self):
         self.session.delete_dynamodb_session(self.region, info_on_fail=True)
         self.session._logger.info.assert_called_with(f"Non-existing index or alias '{self.region}'.")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+#    Copyright (C) 2014 - 2023  Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Amazon DynamoDB SQL Library - an Amazon DynamoDB testing library with SQL-like DSL.
+"""
+
+import mock
+import unittest
+from botocore.exceptions import ClientError
+from dynamo3 import DynamoDBConnection
+from dynamo3.result import Capacity, ConsumedCapacity
+from sys import path
+path.append('src')
+from DynamoDBSQLLibrary.throttle import Throttle, TokenBucket  # noqa: E402
+
+
+class TokenBucketTests(unittest.TestCase):
+    """Token bucket test class."""
+
+    def setUp(self):
+        """Patch the clock and sleep of the throttle module."""
+        self.now = 100.0
+        patcher = mock.patch('DynamoDBSQLLibrary.throttle.monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('DynamoDBSQLLibrary.throttle.sleep', side_effect=self.sleep)
+        self.sleep_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sleep(self, seconds):
+        """Advances the patched clock."""
+        self.now += seconds
+
+    def test_should_not_wait_without_debt(self):
+        """Bucket should not wait while it has tokens."""
+        bucket = TokenBucket(10)
+        bucket.charge(10)
+        self.assertEqual(bucket.wait(), 0)
+        self.sleep_mock.assert_not_called()
+
+    def test_should_wait_for_debt(self):
+        """Bucket should wait until its debt is refilled."""
+        bucket = TokenBucket(10)
+        bucket.charge(25)
+        self.assertEqual(bucket.wait(), 1.5)
+        self.assertEqual(bucket.wait(), 0)
+
+    def test_should_not_refill_above_one_second(self):
+        """Bucket should hold at most one second worth of tokens."""
+        bucket = TokenBucket(10)
+        self.now += 60
+        bucket.charge(15)
+        self.assertEqual(bucket.wait(), 0.5)
+
+    def test_should_backoff_and_recover_rate(self):
+        """Bucket rate should halve on backoff down to a tenth, and recover additively."""
+        bucket = TokenBucket(100)
+        for _ in range(5):
+            bucket.backoff()
+        self.assertEqual(bucket.rate, 10)
+        bucket.recover()
+        self.assertEqual(bucket.rate, 15)
+        for _ in range(20):
+            bucket.recover()
+        self.assertEqual(bucket.rate, 100)
+
+
+class ThrottleTests(unittest.TestCase):
+    """Throttle test class."""
+
+    def setUp(self):
+        """Instantiate a throttle attached to a connection with a mocked client."""
+        self.client = mock.Mock()
+        self.connection = DynamoDBConnection(self.client)
+        self.throttle = Throttle(read_capacity=10, write_capacity='5')
+        self.throttle.read = mock.Mock(wraps=self.throttle.read)
+        self.throttle.write = mock.Mock(wraps=self.throttle.write)
+        self.throttle.attach(self.connection)
+
+    def test_should_charge_consumed_capacity(self):
+        """Throttle should request and charge consumed capacity to the command bucket."""
+        self.client.query.return_value = {'ConsumedCapacity': {'TableName': 't',
+                                                               'CapacityUnits': 2}}
+        self.connection.call('query', TableName='t', ReturnConsumedCapacity='NONE')
+        self.client.query.assert_called_with(TableName='t', ReturnConsumedCapacity='TOTAL')
+        self.throttle.read.wait.assert_called_once_with()
+        self.throttle.read.charge.assert_called_once_with(2)
+        self.throttle.read.recover.assert_called_once_with()
+        self.throttle.write.wait.assert_not_called()
+
+    def test_should_backoff_on_unprocessed_items(self):
+        """Throttle should back off the write bucket on unprocessed batch items."""
+        self.client.batch_write_item.return_value = {'UnprocessedItems': {'t': [{}]}}
+        self.connection.call('batch_write_item', RequestItems={},
+                             ReturnConsumedCapacity='INDEXES')
+        self.client.batch_write_item.assert_called_with(RequestItems={},
+                                                        ReturnConsumedCapacity='INDEXES')
+        self.throttle.write.wait.assert_called_once_with()
+        self.throttle.write.backoff.assert_called_once_with()
+
+    @mock.patch('dynamo3.connection.time.sleep')
+    def test_should_backoff_on_throughput_errors(self, mock_sleep):
+        """Throttle should back off the bucket of calls retried on throughput errors."""
+        error = ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException',
+                                       'Message': 'Throttled'},
+                             'ResponseMetadata': {'HTTPStatusCode': 400}}, 'Query')
+        self.client.query.side_effect = [error, error, {}]
+        self.connection.call('query', TableName='t')
+        self.assertEqual(self.client.query.call_count, 3)
+        self.assertEqual(self.throttle.read.backoff.call_count, 2)
+        self.assertEqual(self.throttle.read.wait.call_count, 3)
+        self.throttle.read.recover.assert_called_once_with()
+        mock_sleep.assert_called_once_with(0.4)
+        self.throttle.write.backoff.assert_not_called()
+
+    def test_should_not_limit_other_commands(self):
+        """Throttle should not limit commands without consumed capacity."""
+        self.client.describe_table.return_value = {}
+        self.connection.call('describe_table', TableName='t')
+        self.client.describe_table.assert_called_with(TableName='t')
+        self.throttle.read.wait.assert_not_called()
+        self.throttle.write.wait.assert_not_called()
+
+    def test_should_charge_write_capacity(self):
+        """Throttle should charge the write units of consumed capacity."""
+        capacity = ConsumedCapacity('t', Capacity(0, 3))
+        self.throttle.on_capacity(self.connection, 'put_item', {}, {}, capacity)
+        self.throttle.write.charge.assert_called_once_with(3)
+        self.throttle.read.charge.assert_not_called()